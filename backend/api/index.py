@@ -1,8 +1,533 @@
+import base64
+import bisect
+import functools
+import hashlib
+import itertools
 import json
+import logging
 import os
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from decimal import Decimal
+from json.encoder import encode_basestring_ascii
 import psycopg2
-from typing import Dict, Any, List, Optional
+from psycopg2 import extensions, pool
+from typing import Dict, Any, List, Optional, Tuple, Callable
 
+DB_POOL_MIN_SIZE = int(os.environ.get('DB_POOL_MIN_SIZE', '1'))
+DB_POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', '5'))
+DB_POOL_HEALTHCHECK_INTERVAL = float(os.environ.get('DB_POOL_HEALTHCHECK_INTERVAL', '30'))
+
+DEFAULT_PAGE_LIMIT = 100
+MAX_PAGE_LIMIT = 500
+MAX_BATCH_IDS = 100
+
+SEARCH_HEADLINE_OPTIONS = 'MaxFragments=2, MaxWords=20, MinWords=5, StartSel=<mark>, StopSel=</mark>'
+SEARCH_EXTRA_COLUMNS = (('search_rank', 'float'), ('search_snippet', 'text'))
+
+OBJECT_COLUMNS = [
+    ('id', 'int'), ('broker_id', 'int'), ('title', 'text'), ('city', 'text'), ('address', 'text'),
+    ('property_type', 'text'), ('area', 'number'), ('price', 'number'), ('yield_percent', 'number'),
+    ('payback_years', 'number'), ('description', 'text'), ('images', 'list'), ('status', 'text'),
+    ('created_at', 'isoformat'), ('favorites_count', 'int')
+]
+OBJECT_SORTS: Dict[str, Tuple[str, Callable[[Any], Any], str]] = {
+    'created': ('created_at', datetime.fromisoformat, 'desc'),
+    'popular': ('favorites_count', int, 'desc'),
+    'price': ('price', Decimal, 'asc'),
+    'yield': ('yield_percent', Decimal, 'desc'),
+    'payback': ('payback_years', Decimal, 'asc')
+}
+SORT_DIRECTIONS = ('asc', 'desc')
+OBJECT_EQUALITY_FILTERS = ['status', 'city', 'property_type']
+OBJECT_RANGE_FILTERS = {
+    'min_price': 'price >= %s',
+    'max_price': 'price <= %s',
+    'min_yield': 'yield_percent >= %s',
+    'max_yield': 'yield_percent <= %s',
+    'max_payback': 'payback_years <= %s'
+}
+OBJECT_HOT_STATUS = 'available'
+OBJECT_LIST_INDEXES: Dict[Tuple[Tuple[str, ...], str], str] = {
+    ((), 'created'): 'idx_objects_created_id',
+    ((), 'popular'): 'idx_objects_favorites_id',
+    ((), 'price'): 'idx_objects_price_id',
+    ((), 'yield'): 'idx_objects_yield_id',
+    ((), 'payback'): 'idx_objects_payback_id',
+    (('city',), 'created'): 'idx_objects_city_created_id',
+    (('city',), 'price'): 'idx_objects_city_price_id',
+    ((OBJECT_HOT_STATUS,), 'created'): 'idx_objects_available_created_id',
+    ((OBJECT_HOT_STATUS,), 'price'): 'idx_objects_available_price_id',
+    ((OBJECT_HOT_STATUS,), 'yield'): 'idx_objects_available_yield_id',
+    ((OBJECT_HOT_STATUS,), 'payback'): 'idx_objects_available_payback_id',
+    ((OBJECT_HOT_STATUS, 'city'), 'created'): 'idx_objects_city_created_id',
+    ((OBJECT_HOT_STATUS, 'city'), 'price'): 'idx_objects_available_city_price_id',
+    ((OBJECT_HOT_STATUS, 'city', 'property_type'), 'price'): 'idx_objects_available_city_type_price_id'
+}
+OBJECT_FACETS = ['city', 'property_type', 'status', 'price', 'yield']
+OBJECT_FACET_BOUNDS = {
+    'price': [5_000_000, 10_000_000, 20_000_000, 50_000_000],
+    'yield': [6, 8, 10, 12]
+}
+
+MARKET_SKETCH_GAMMA = 1.01 / 0.99
+MARKET_QUANTILES = (('p10', 0.1), ('p50', 0.5), ('p90', 0.9))
+
+COLUMN_ENCODERS: Dict[str, Callable[[Any], str]] = {
+    'text': encode_basestring_ascii,
+    'int': int.__repr__,
+    'float': float.__repr__,
+    'number': lambda value: float.__repr__(float(value)) if value else '0',
+    'list': json.dumps,
+    'isoformat': lambda value: f'"{value.isoformat()}"'
+}
+COLUMN_NULLS = {'number': '0', 'list': '[]'}
+ENCODER_PLAN_CACHE_SIZE = 64
+
+CATALOG_CACHE_SIZE = int(os.environ.get('CATALOG_CACHE_SIZE', '256'))
+CATALOG_CACHE_TTL = float(os.environ.get('CATALOG_CACHE_TTL', '30'))
+
+FUNCTION_NAME = 'api'
+ROUTE_PARAMS = ('resource', 'mode', 'sort', 'order')
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', '250'))
+SLOW_QUERY_EXPLAIN_INTERVAL = float(os.environ.get('SLOW_QUERY_EXPLAIN_INTERVAL', '60'))
+QUERY_STATS_LOG_INTERVAL = float(os.environ.get('QUERY_STATS_LOG_INTERVAL', '300'))
+QUERY_STATS_MAX_SHAPES = 200
+QUERY_STATS_LOG_TOP = 20
+QUERY_HISTOGRAM_BOUNDS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+SQL_LITERALS = re.compile(r"'(?:[^']|'')*'|%\(\w+\)s|%s|\b\d+(?:\.\d+)?\b|\bNULL\b(?=::|,|\))")
+SQL_TUPLES = re.compile(r"\(\?(?:::\w+)?(?:, \?(?:::\w+)?)+\)")
+SQL_REPEATED_TUPLES = re.compile(r"\(\?\)(?:, \(\?\))+")
+SQL_WHITESPACE = re.compile(r'\s+')
+
+PREFLIGHT_RESPONSE = {
+    'statusCode': 200,
+    'headers': {
+        'Access-Control-Allow-Origin': '*',
+        'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
+        'Access-Control-Allow-Headers': 'Content-Type, X-User-Id, X-Auth-Token, If-None-Match',
+        'Access-Control-Max-Age': '86400'
+    },
+    'body': '',
+    'isBase64Encoded': False
+}
+NOT_FOUND_RESPONSE = {
+    'statusCode': 404,
+    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+    'body': json.dumps({'error': 'Resource not found'}),
+    'isBase64Encoded': False
+}
+METHOD_NOT_ALLOWED_RESPONSE = {
+    'statusCode': 405,
+    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+    'body': json.dumps({'error': 'Method not allowed'}),
+    'isBase64Encoded': False
+}
+
+
+# >>> shared/blocks/response_cache.py (copied by shared/sync.py, edit the block and re-run)
+class ResponseCache:
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+    
+    def get(self, key: Any) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, response = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return response
+    
+    def set(self, key: Any, response: Dict[str, Any]) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        self._entries.clear()
+# <<< shared/blocks/response_cache.py
+
+
+_catalog_cache = ResponseCache(CATALOG_CACHE_SIZE, CATALOG_CACHE_TTL)
+
+
+# >>> shared/blocks/row_encoder.py (copied by shared/sync.py, edit the block and re-run)
+class RowEncoder:
+    def __init__(self, columns: List[Tuple[str, str]]):
+        self.kinds = dict(columns)
+        self.default_fields = tuple(self.kinds)
+        self._plans: Dict[Any, List[Tuple[str, Callable[[Any], str], str]]] = {}
+        self.plan(self.default_fields)
+    
+    def parse_fields(self, raw: Optional[str]) -> Tuple[str, ...]:
+        if not raw:
+            return self.default_fields
+        fields = tuple(dict.fromkeys(field.strip() for field in raw.split(',') if field.strip()))
+        if not fields or any(field not in self.kinds for field in fields):
+            raise ValueError('Unknown field')
+        return fields
+    
+    def plan(
+        self, fields: Tuple[str, ...], extra: Tuple[Tuple[str, str], ...] = ()
+    ) -> List[Tuple[str, Callable[[Any], str], str]]:
+        plan = self._plans.get((fields, extra))
+        if plan is None:
+            columns = [(field, self.kinds[field]) for field in fields] + list(extra)
+            plan = [
+                (
+                    ('{' if position == 0 else ', ') + encode_basestring_ascii(name) + ': ',
+                    COLUMN_ENCODERS[kind], COLUMN_NULLS.get(kind, 'null')
+                )
+                for position, (name, kind) in enumerate(columns)
+            ]
+            if len(self._plans) < ENCODER_PLAN_CACHE_SIZE:
+                self._plans[(fields, extra)] = plan
+        return plan
+    
+    def write(self, out: List[str], row: Tuple[Any, ...], plan: List[Tuple[str, Callable[[Any], str], str]]) -> None:
+        for (prefix, encode, null), value in zip(plan, row):
+            out.append(prefix)
+            out.append(null if value is None else encode(value))
+        out.append('}')
+    
+    def encode_row(self, row: Tuple[Any, ...], fields: Tuple[str, ...], extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+        started = time.perf_counter()
+        out: List[str] = []
+        self.write(out, row, self.plan(fields, extra))
+        record_phase('encode', started)
+        return ''.join(out)
+    
+    def encode_rows(
+        self, rows: List[Tuple[Any, ...]], fields: Tuple[str, ...], extra: Tuple[Tuple[str, str], ...] = ()
+    ) -> str:
+        started = time.perf_counter()
+        plan = self.plan(fields, extra)
+        out = ['[']
+        for position, row in enumerate(rows):
+            if position:
+                out.append(', ')
+            self.write(out, row, plan)
+        out.append(']')
+        record_phase('encode', started)
+        return ''.join(out)
+# <<< shared/blocks/row_encoder.py
+
+
+_object_encoder = RowEncoder(OBJECT_COLUMNS)
+
+
+# >>> shared/blocks/router.py (copied by shared/sync.py, edit the block and re-run)
+class Router:
+    def __init__(self, resource_param: str, default_resource: str):
+        self.resource_param = resource_param
+        self.default_resource = default_resource
+        self.routes: Dict[Tuple[str, str, Optional[str]], Callable[..., Dict[str, Any]]] = {}
+        self.resources: set = set()
+    
+    def route(self, resource: str, *methods: str, action: Optional[str] = None) -> Callable:
+        def register(handle: Callable[..., Dict[str, Any]]) -> Callable[..., Dict[str, Any]]:
+            for method in methods:
+                self.routes[(method, resource, action)] = handle
+            self.resources.add(resource)
+            return handle
+        return register
+    
+    def resolve(
+        self, method: str, params: Dict[str, str]
+    ) -> Tuple[Optional[Callable[..., Dict[str, Any]]], Optional[Dict[str, Any]]]:
+        if method == 'OPTIONS':
+            return None, PREFLIGHT_RESPONSE
+        resource = params.get(self.resource_param, self.default_resource)
+        handle = self.routes.get((method, resource, params.get('action'))) or self.routes.get((method, resource, None))
+        if handle:
+            return handle, None
+        if resource in self.resources:
+            return None, METHOD_NOT_ALLOWED_RESPONSE
+        return None, NOT_FOUND_RESPONSE
+# <<< shared/blocks/router.py
+
+
+# >>> shared/blocks/timing.py (copied by shared/sync.py, edit the block and re-run)
+class RequestTiming:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self.queries = 0
+        self._lock = threading.Lock()
+    
+    def add(self, phase: str, ms: float, query: bool = False) -> None:
+        with self._lock:
+            self.phases[phase] = self.phases.get(phase, 0.0) + ms
+            self.queries += query
+    
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+    
+    def header(self) -> str:
+        phases = [f'{name};dur={ms:.1f}' for name, ms in self.phases.items()]
+        return ', '.join(phases + [f'total;dur={self.elapsed_ms():.1f}'])
+
+
+class QueryStats:
+    def __init__(self, max_shapes: int):
+        self.max_shapes = max_shapes
+        self._shapes: Dict[str, List[float]] = {}
+        self._explained_at: Dict[str, float] = {}
+        self._logged_at = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def record(self, shape: str, ms: float) -> None:
+        with self._lock:
+            stats = self._shapes.get(shape)
+            if stats is None:
+                if len(self._shapes) >= self.max_shapes:
+                    shape = 'other'
+                stats = self._shapes.setdefault(shape, [0, 0.0, 0.0] + [0] * (len(QUERY_HISTOGRAM_BOUNDS_MS) + 1))
+            stats[0] += 1
+            stats[1] += ms
+            stats[2] = max(stats[2], ms)
+            stats[3 + bisect.bisect_left(QUERY_HISTOGRAM_BOUNDS_MS, ms)] += 1
+    
+    def should_explain(self, shape: str) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            if now - self._explained_at.get(shape, -SLOW_QUERY_EXPLAIN_INTERVAL) < SLOW_QUERY_EXPLAIN_INTERVAL:
+                return False
+            self._explained_at[shape] = now
+            return True
+    
+    def summary(self, limit: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            ranked = sorted(self._shapes.items(), key=lambda item: -item[1][1])[:limit]
+        return [{
+            'sql': shape,
+            'count': stats[0],
+            'total_ms': round(stats[1], 1),
+            'max_ms': round(stats[2], 1),
+            'p50_ms': histogram_quantile(stats, 0.5),
+            'p95_ms': histogram_quantile(stats, 0.95),
+            'p99_ms': histogram_quantile(stats, 0.99)
+        } for shape, stats in ranked]
+    
+    def maybe_log(self) -> None:
+        if time.monotonic() - self._logged_at < QUERY_STATS_LOG_INTERVAL:
+            return
+        self._logged_at = time.monotonic()
+        log_event('query_stats', shapes=self.summary(QUERY_STATS_LOG_TOP))
+
+
+class TimingCursor(extensions.cursor):
+    def execute(self, query, vars=None):
+        started = time.perf_counter()
+        result = super().execute(query, vars)
+        ms = (time.perf_counter() - started) * 1000
+        shape = normalize_sql(query)
+        _query_stats.record(shape, ms)
+        if _timing:
+            _timing.add('db', ms, query=True)
+        if ms >= SLOW_QUERY_MS and _query_stats.should_explain(shape):
+            log_event(
+                'slow_query', logging.WARNING,
+                sql=shape, duration_ms=round(ms, 1), plan=explain(self.connection, query, vars)
+            )
+        return result
+    
+    def fetchone(self):
+        started = time.perf_counter()
+        try:
+            return super().fetchone()
+        finally:
+            record_phase('fetch', started)
+    
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        try:
+            return super().fetchmany(size) if size is not None else super().fetchmany()
+        finally:
+            record_phase('fetch', started)
+    
+    def fetchall(self):
+        started = time.perf_counter()
+        try:
+            return super().fetchall()
+        finally:
+            record_phase('fetch', started)
+    
+    def __iter__(self):
+        while True:
+            rows = self.fetchmany(self.itersize)
+            if not rows:
+                return
+            yield from rows
+
+
+class JsonLogFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps({
+            'event': record.getMessage(),
+            'function': FUNCTION_NAME,
+            'level': record.levelname,
+            **getattr(record, 'fields', {})
+        }, default=str, ensure_ascii=False)
+
+
+def json_logger(name: str) -> logging.Logger:
+    logger = logging.getLogger(name)
+    if not logger.handlers:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(JsonLogFormatter())
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
+
+
+_logger = json_logger(FUNCTION_NAME)
+_timing: Optional[RequestTiming] = None
+_query_stats = QueryStats(QUERY_STATS_MAX_SHAPES)
+_cold_start = True
+
+
+@functools.lru_cache(maxsize=512)
+def normalize_sql(query: Any) -> str:
+    text = query.decode('utf-8', 'replace') if isinstance(query, bytes) else str(query)
+    text = SQL_LITERALS.sub('?', SQL_WHITESPACE.sub(' ', text).strip())
+    return SQL_REPEATED_TUPLES.sub('(?), ...', SQL_TUPLES.sub('(?)', text))
+
+
+def histogram_quantile(stats: List[float], q: float) -> Optional[float]:
+    target = stats[0] * q
+    seen = 0
+    for position, count in enumerate(stats[3:]):
+        seen += count
+        if count and seen >= target:
+            return QUERY_HISTOGRAM_BOUNDS_MS[position] if position < len(QUERY_HISTOGRAM_BOUNDS_MS) else round(stats[2], 1)
+    return None
+
+
+def explain(conn, query: Any, vars: Any) -> Optional[str]:
+    prefix = b'EXPLAIN ' if isinstance(query, bytes) else 'EXPLAIN '
+    in_transaction = conn.get_transaction_status() == extensions.TRANSACTION_STATUS_INTRANS
+    try:
+        with conn.cursor(cursor_factory=extensions.cursor) as cur:
+            if in_transaction:
+                cur.execute('SAVEPOINT slow_query_explain')
+            try:
+                cur.execute(prefix + query, vars)
+                return '\n'.join(row[0] for row in cur.fetchall())
+            finally:
+                if in_transaction:
+                    cur.execute('ROLLBACK TO SAVEPOINT slow_query_explain')
+    except psycopg2.Error as error:
+        return f'EXPLAIN failed: {error}'.strip()
+
+
+def record_phase(phase: str, started: float) -> None:
+    if _timing:
+        _timing.add(phase, (time.perf_counter() - started) * 1000)
+
+
+def log_event(event: str, level: int = logging.INFO, **fields: Any) -> None:
+    _logger.log(level, event, extra={'fields': fields})
+
+
+def instrumented(handle: Callable[[Dict[str, Any], Any], Dict[str, Any]]) -> Callable[[Dict[str, Any], Any], Dict[str, Any]]:
+    @functools.wraps(handle)
+    def wrapper(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+        global _timing, _cold_start
+        timing = _timing = RequestTiming()
+        cold_start, _cold_start = _cold_start, False
+        status = 500
+        try:
+            response = handle(event, context)
+            status = response['statusCode']
+            headers = {**(response.get('headers') or {}), 'Server-Timing': timing.header(), 'Timing-Allow-Origin': '*'}
+            return {**response, 'headers': headers}
+        finally:
+            _timing = None
+            params = event.get('queryStringParameters') or {}
+            log_event(
+                'request',
+                method=event.get('httpMethod', 'GET'),
+                route={key: params[key] for key in ROUTE_PARAMS if key in params},
+                params=sorted(params),
+                status=status,
+                duration_ms=round(timing.elapsed_ms(), 2),
+                phases={name: round(ms, 2) for name, ms in timing.phases.items()},
+                queries=timing.queries,
+                cold_start=cold_start
+            )
+            _query_stats.maybe_log()
+    return wrapper
+# <<< shared/blocks/timing.py
+
+
+# >>> shared/blocks/pool.py (copied by shared/sync.py, edit the block and re-run)
+_pool: Optional[pool.ThreadedConnectionPool] = None
+_last_used: Dict[int, float] = {}
+
+
+def get_connection():
+    global _pool
+    started = time.perf_counter()
+    try:
+        if _pool is None or _pool.closed:
+            _pool = pool.ThreadedConnectionPool(
+                DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, os.environ.get('DATABASE_URL'), cursor_factory=TimingCursor
+            )
+        for _ in range(DB_POOL_MAX_SIZE):
+            conn = _pool.getconn()
+            if connection_is_healthy(conn):
+                return conn
+            discard_connection(conn)
+        return _pool.getconn()
+    finally:
+        record_phase('connect', started)
+
+
+def release_connection(conn) -> None:
+    if conn.closed:
+        discard_connection(conn)
+        return
+    _last_used[id(conn)] = time.monotonic()
+    _pool.putconn(conn)
+
+
+def discard_connection(conn) -> None:
+    _last_used.pop(id(conn), None)
+    _pool.putconn(conn, close=True)
+
+
+def connection_is_healthy(conn) -> bool:
+    if conn.closed or conn.info.transaction_status == extensions.TRANSACTION_STATUS_UNKNOWN:
+        return False
+    last_used = _last_used.get(id(conn))
+    if last_used is None or time.monotonic() - last_used < DB_POOL_HEALTHCHECK_INTERVAL:
+        return True
+    try:
+        with conn.cursor() as cur:
+            cur.execute('SELECT 1')
+        conn.rollback()
+    except psycopg2.Error:
+        return False
+    return True
+# <<< shared/blocks/pool.py
+
+
+_router = Router('resource', 'objects')
+
+
+@instrumented
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     '''
     Business: Main API - users, objects, favorites management
@@ -10,345 +535,665 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     Returns: HTTP response with JSON data
     '''
     method: str = event.get('httpMethod', 'GET')
-    params = event.get('queryStringParameters') or {}
-    resource = params.get('resource', 'objects')
-    
-    if method == 'OPTIONS':
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type, X-User-Id, X-Auth-Token',
-                'Access-Control-Max-Age': '86400'
-            },
-            'body': '',
-            'isBase64Encoded': False
-        }
+    handle, response = _router.resolve(method, event.get('queryStringParameters') or {})
+    if response:
+        return response
     
     conn = None
     try:
-        dsn = os.environ.get('DATABASE_URL')
-        conn = psycopg2.connect(dsn)
+        conn = get_connection()
         cur = conn.cursor()
-        
-        if resource == 'users':
-            return handle_users(cur, conn, method, event)
-        elif resource == 'objects':
-            return handle_objects(cur, conn, method, event)
-        elif resource == 'favorites':
-            return handle_favorites(cur, conn, method, event)
-        else:
-            return {
-                'statusCode': 404,
-                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                'body': json.dumps({'error': 'Resource not found'}),
-                'isBase64Encoded': False
-            }
+        return handle(cur, conn, event)
     
     finally:
         if conn:
-            conn.close()
+            release_connection(conn)
 
 
-def handle_users(cur, conn, method: str, event: Dict[str, Any]) -> Dict[str, Any]:
-    if method == 'GET':
-        params = event.get('queryStringParameters') or {}
-        user_id = params.get('id')
-        email = params.get('email')
-        
-        if user_id:
-            cur.execute(
-                "SELECT id, email, name, role, created_at FROM users WHERE id = %s",
-                (int(user_id),)
-            )
-            row = cur.fetchone()
-            if row:
-                return success_response({
-                    'id': row[0], 'email': row[1], 'name': row[2],
-                    'role': row[3], 'created_at': row[4].isoformat() if row[4] else None
-                })
-            return error_response('User not found', 404)
-        
-        elif email:
-            cur.execute(
-                "SELECT id, email, name, role, created_at FROM users WHERE email = %s",
-                (email,)
-            )
-            row = cur.fetchone()
-            if row:
-                return success_response({
-                    'id': row[0], 'email': row[1], 'name': row[2],
-                    'role': row[3], 'created_at': row[4].isoformat() if row[4] else None
-                })
-            return error_response('User not found', 404)
-        
-        else:
-            cur.execute("SELECT id, email, name, role, created_at FROM users ORDER BY created_at DESC LIMIT 100")
-            rows = cur.fetchall()
-            users = [{
-                'id': r[0], 'email': r[1], 'name': r[2],
-                'role': r[3], 'created_at': r[4].isoformat() if r[4] else None
-            } for r in rows]
-            return success_response(users)
-    
-    elif method == 'POST':
-        body = json.loads(event.get('body', '{}'))
-        email = body.get('email')
-        name = body.get('name')
-        role = body.get('role', 'investor')
-        
-        if not email or not name:
-            return error_response('Email and name are required', 400)
-        
-        cur.execute("SELECT id FROM users WHERE email = %s", (email,))
-        existing = cur.fetchone()
-        
-        if existing:
-            return success_response({'id': existing[0], 'message': 'User already exists'})
+@_router.route('users', 'GET')
+def get_users(cur, conn, event: Dict[str, Any]) -> Dict[str, Any]:
+    params = event.get('queryStringParameters') or {}
+    user_id = params.get('id')
+    email = params.get('email')
+    
+    if params.get('ids'):
+        try:
+            ids = parse_id_list(params['ids'], int)
+        except ValueError:
+            return error_response(f'ids must be 1-{MAX_BATCH_IDS} comma-separated integers', 400)
         
         cur.execute(
-            "INSERT INTO users (email, name, role) VALUES (%s, %s, %s) RETURNING id, email, name, role, created_at",
-            (email, name, role)
+            "SELECT id, email, name, role, created_at FROM users WHERE id = ANY(%s)",
+            (ids,)
+        )
+        users = [{
+            'id': r[0], 'email': r[1], 'name': r[2],
+            'role': r[3], 'created_at': r[4].isoformat() if r[4] else None
+        } for r in cur.fetchall()]
+        return success_response(order_by_ids(ids, users))
+    
+    elif user_id:
+        cur.execute(
+            "SELECT id, email, name, role, created_at FROM users WHERE id = %s",
+            (int(user_id),)
         )
         row = cur.fetchone()
-        conn.commit()
+        if row:
+            return success_response({
+                'id': row[0], 'email': row[1], 'name': row[2],
+                'role': row[3], 'created_at': row[4].isoformat() if row[4] else None
+            })
+        return error_response('User not found', 404)
+    
+    elif email:
+        cur.execute(
+            "SELECT id, email, name, role, created_at FROM users WHERE email = %s",
+            (email,)
+        )
+        row = cur.fetchone()
+        if row:
+            return success_response({
+                'id': row[0], 'email': row[1], 'name': row[2],
+                'role': row[3], 'created_at': row[4].isoformat() if row[4] else None
+            })
+        return error_response('User not found', 404)
+    
+    else:
+        try:
+            limit, after = parse_page_params(params, int)
+        except ValueError:
+            return error_response('Invalid pagination parameters', 400)
         
-        return success_response({
-            'id': row[0], 'email': row[1], 'name': row[2],
-            'role': row[3], 'created_at': row[4].isoformat() if row[4] else None
-        }, 201)
+        keyset = keyset_condition('created_at', 'id', after)
+        cur.execute(f"""
+            SELECT id, email, name, role, created_at FROM users
+            WHERE 1=1 {keyset['query']}
+            ORDER BY created_at DESC, id DESC LIMIT %s
+        """, keyset['params'] + [limit + 1])
+        rows, next_cursor = paginate(cur.fetchall(), limit, lambda r: (r[4], r[0]))
+        users = [{
+            'id': r[0], 'email': r[1], 'name': r[2],
+            'role': r[3], 'created_at': r[4].isoformat() if r[4] else None
+        } for r in rows]
+        return success_response(users, headers=cursor_headers(next_cursor))
+
+
+@_router.route('users', 'POST')
+def create_user(cur, conn, event: Dict[str, Any]) -> Dict[str, Any]:
+    body = json.loads(event.get('body', '{}'))
+    email = body.get('email')
+    name = body.get('name')
+    role = body.get('role', 'investor')
+    
+    if not email or not name:
+        return error_response('Email and name are required', 400)
     
-    return error_response('Method not allowed', 405)
+    cur.execute("SELECT id FROM users WHERE email = %s", (email,))
+    existing = cur.fetchone()
+    
+    if existing:
+        return success_response({'id': existing[0], 'message': 'User already exists'})
+    
+    cur.execute(
+        "INSERT INTO users (email, name, role) VALUES (%s, %s, %s) RETURNING id, email, name, role, created_at",
+        (email, name, role)
+    )
+    row = cur.fetchone()
+    conn.commit()
+    
+    return success_response({
+        'id': row[0], 'email': row[1], 'name': row[2],
+        'role': row[3], 'created_at': row[4].isoformat() if row[4] else None
+    }, 201)
 
 
-def handle_objects(cur, conn, method: str, event: Dict[str, Any]) -> Dict[str, Any]:
-    if method == 'GET':
-        params = event.get('queryStringParameters') or {}
-        object_id = params.get('id')
-        
-        if object_id:
-            cur.execute("""
-                SELECT id, broker_id, title, city, address, property_type, area, price, 
-                       yield_percent, payback_years, description, images, status, created_at
-                FROM investment_objects WHERE id = %s
-            """, (int(object_id),))
-            row = cur.fetchone()
-            
-            if row:
-                return success_response(format_object(row))
-            return error_response('Object not found', 404)
-        
-        else:
-            filters = build_object_filters(params)
-            query = f"""
-                SELECT id, broker_id, title, city, address, property_type, area, price, 
-                       yield_percent, payback_years, description, images, status, created_at
-                FROM investment_objects WHERE 1=1 {filters['query']}
-                ORDER BY created_at DESC LIMIT 100
-            """
-            
-            cur.execute(query, filters['params'])
-            rows = cur.fetchall()
-            objects = [format_object(r) for r in rows]
-            return success_response(objects)
-    
-    elif method == 'POST':
-        body = json.loads(event.get('body', '{}'))
-        
-        required_fields = ['title', 'city', 'address', 'property_type', 'area', 'price', 'yield_percent', 'payback_years']
-        if not all(body.get(f) for f in required_fields):
-            return error_response('Missing required fields', 400)
-        
-        cur.execute("""
-            INSERT INTO investment_objects 
-            (broker_id, title, city, address, property_type, area, price, yield_percent, 
-             payback_years, description, images, status)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            RETURNING id, broker_id, title, city, address, property_type, area, price, 
-                      yield_percent, payback_years, description, images, status, created_at
-        """, (
-            body.get('broker_id'), body['title'], body['city'], body['address'],
-            body['property_type'], body['area'], body['price'], body['yield_percent'],
-            body['payback_years'], body.get('description', ''), body.get('images', []),
-            body.get('status', 'available')
-        ))
-        
-        row = cur.fetchone()
-        conn.commit()
-        return success_response(format_object(row), 201)
+@_router.route('objects', 'GET')
+def get_objects(cur, conn, event: Dict[str, Any]) -> Dict[str, Any]:
+    params = event.get('queryStringParameters') or {}
+    try:
+        fields = _object_encoder.parse_fields(params.get('fields'))
+    except ValueError:
+        return error_response('fields must be a comma-separated list of object columns', 400)
+    columns = ', '.join(fields)
     
-    elif method == 'PUT':
-        body = json.loads(event.get('body', '{}'))
-        object_id = body.get('id')
-        
-        if not object_id:
-            return error_response('Object ID is required', 400)
-        
-        updates = []
-        params = []
-        
-        for field in ['status', 'price', 'yield_percent', 'description']:
-            if field in body:
-                updates.append(f"{field} = %s")
-                params.append(body[field])
-        
-        if not updates:
-            return error_response('No fields to update', 400)
-        
-        updates.append("updated_at = CURRENT_TIMESTAMP")
-        params.append(int(object_id))
-        
-        query = f"""
-            UPDATE investment_objects SET {', '.join(updates)}
-            WHERE id = %s
-            RETURNING id, broker_id, title, city, address, property_type, area, price, 
-                      yield_percent, payback_years, description, images, status, created_at
-        """
+    object_id = params.get('id')
+    
+    if params.get('ids'):
+        try:
+            ids = parse_id_list(params['ids'], int)
+        except ValueError:
+            return error_response(f'ids must be 1-{MAX_BATCH_IDS} comma-separated integers', 400)
         
-        cur.execute(query, params)
+        cur.execute(f"SELECT {columns}, id FROM investment_objects WHERE id = ANY(%s)", (ids,))
+        batch = order_by_ids(ids, cur.fetchall(), lambda row: row[-1])
+        items = _object_encoder.encode_rows(batch['items'], fields)
+        return json_response(f'{{"items": {items}, "missing": {json.dumps(batch["missing"])}}}')
+    
+    elif object_id:
+        cur.execute(f"SELECT {columns} FROM investment_objects WHERE id = %s", (int(object_id),))
         row = cur.fetchone()
-        conn.commit()
         
         if row:
-            return success_response(format_object(row))
+            return json_response(_object_encoder.encode_row(row, fields))
         return error_response('Object not found', 404)
     
-    return error_response('Method not allowed', 405)
-
-
-def handle_favorites(cur, conn, method: str, event: Dict[str, Any]) -> Dict[str, Any]:
-    if method == 'GET':
-        params = event.get('queryStringParameters') or {}
-        user_id = params.get('user_id')
-        
-        if not user_id:
-            return error_response('user_id is required', 400)
-        
-        cur.execute("""
-            SELECT f.id, f.user_id, f.object_id, f.created_at,
-                   o.title, o.city, o.price, o.yield_percent, o.images
-            FROM favorites f
-            JOIN investment_objects o ON f.object_id = o.id
-            WHERE f.user_id = %s
-            ORDER BY f.created_at DESC
-        """, (int(user_id),))
-        
-        rows = cur.fetchall()
-        favorites = [{
-            'id': r[0], 'user_id': r[1], 'object_id': r[2],
-            'created_at': r[3].isoformat() if r[3] else None,
-            'object': {
-                'title': r[4], 'city': r[5], 'price': float(r[6]) if r[6] else 0,
-                'yield_percent': float(r[7]) if r[7] else 0, 'images': r[8] or []
-            }
-        } for r in rows]
-        
-        return success_response(favorites)
+    elif params.get('facets') == '1':
+        return object_facets(cur, event, params)
     
-    elif method == 'POST':
-        body = json.loads(event.get('body', '{}'))
-        user_id = body.get('user_id')
-        object_id = body.get('object_id')
-        
-        if not user_id or not object_id:
-            return error_response('user_id and object_id are required', 400)
-        
-        cur.execute(
-            "SELECT id FROM favorites WHERE user_id = %s AND object_id = %s",
-            (int(user_id), int(object_id))
-        )
-        existing = cur.fetchone()
-        
-        if existing:
-            return success_response({'message': 'Already in favorites', 'id': existing[0]})
-        
-        cur.execute(
-            "INSERT INTO favorites (user_id, object_id) VALUES (%s, %s) RETURNING id, user_id, object_id, created_at",
-            (int(user_id), int(object_id))
-        )
-        row = cur.fetchone()
-        conn.commit()
-        
-        return success_response({
-            'id': row[0], 'user_id': row[1], 'object_id': row[2],
-            'created_at': row[3].isoformat() if row[3] else None
-        }, 201)
-    
-    elif method == 'DELETE':
-        params = event.get('queryStringParameters') or {}
-        user_id = params.get('user_id')
-        object_id = params.get('object_id')
+    else:
+        search = (params.get('q') or '').strip()
+        sort = params.get('sort', 'created')
+        if sort not in OBJECT_SORTS:
+            return error_response(f"sort must be one of: {', '.join(OBJECT_SORTS)}", 400)
+        sort_type, direction = OBJECT_SORTS[sort][1], params.get('order', OBJECT_SORTS[sort][2])
+        if direction not in SORT_DIRECTIONS:
+            return error_response("order must be 'asc' or 'desc'", 400)
+        try:
+            limit, after = parse_page_params(params, int, float if search else sort_type)
+            filters = build_object_filters(params)
+        except ValueError:
+            return error_response('Invalid pagination or filter parameters', 400)
         
-        if not user_id or not object_id:
-            return error_response('user_id and object_id are required', 400)
+        cache_key = (fields, filters['query'], tuple(filters['params']), search, sort, direction, limit, after)
+        cached = _catalog_cache.get(cache_key)
+        if cached:
+            return conditional_response(event, cached)
         
-        cur.execute(
-            "SELECT id FROM favorites WHERE user_id = %s AND object_id = %s",
-            (int(user_id), int(object_id))
+        if search:
+            keyset = keyset_condition('ts_rank_cd(o.search_vector, q.query)::float8', 'o.id', after)
+            query = f"""
+                SELECT {columns}, search_rank,
+                       ts_headline('russian', coalesce(description, ''), query, '{SEARCH_HEADLINE_OPTIONS}'),
+                       search_rank, id
+                FROM (
+                    SELECT o.*, q.query, ts_rank_cd(o.search_vector, q.query)::float8 AS search_rank
+                    FROM investment_objects o
+                    CROSS JOIN (SELECT catalog_search_query(%s) AS query) q
+                    WHERE o.search_vector @@ q.query {filters['query']} {keyset['query']}
+                    ORDER BY search_rank DESC, o.id DESC LIMIT %s
+                ) ranked
+                ORDER BY search_rank DESC, id DESC
+            """
+            cur.execute(query, [search] + filters['params'] + keyset['params'] + [limit + 1])
+            rows, next_cursor = paginate(cur.fetchall(), limit, lambda r: (r[-2], r[-1]))
+            body = _object_encoder.encode_rows(rows, fields, SEARCH_EXTRA_COLUMNS)
+        else:
+            plan = compile_object_list(columns, filters, sort, direction, after, limit)
+            cur.execute(plan['query'], plan['params'])
+            rows, next_cursor = paginate(cur.fetchall(), limit, lambda r: (r[-2], r[-1]))
+            body = _object_encoder.encode_rows(rows, fields)
+        response = with_etag(json_response(body, headers=cursor_headers(next_cursor)))
+        _catalog_cache.set(cache_key, response)
+        return conditional_response(event, response)
+
+
+@_router.route('objects', 'POST')
+def create_object(cur, conn, event: Dict[str, Any]) -> Dict[str, Any]:
+    params = event.get('queryStringParameters') or {}
+    try:
+        fields = _object_encoder.parse_fields(params.get('fields'))
+    except ValueError:
+        return error_response('fields must be a comma-separated list of object columns', 400)
+    columns = ', '.join(fields)
+    
+    body = json.loads(event.get('body', '{}'))
+    
+    required_fields = ['title', 'city', 'address', 'property_type', 'area', 'price', 'yield_percent', 'payback_years']
+    if not all(body.get(f) for f in required_fields):
+        return error_response('Missing required fields', 400)
+    
+    cur.execute(f"""
+        INSERT INTO investment_objects 
+        (broker_id, title, city, address, property_type, area, price, yield_percent, 
+         payback_years, description, images, status)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        RETURNING {columns}
+    """, (
+        body.get('broker_id'), body['title'], body['city'], body['address'],
+        body['property_type'], body['area'], body['price'], body['yield_percent'],
+        body['payback_years'], body.get('description', ''), body.get('images', []),
+        body.get('status', 'available')
+    ))
+    
+    row = cur.fetchone()
+    conn.commit()
+    _catalog_cache.clear()
+    return json_response(_object_encoder.encode_row(row, fields), 201)
+
+
+@_router.route('objects', 'PUT')
+def update_object(cur, conn, event: Dict[str, Any]) -> Dict[str, Any]:
+    params = event.get('queryStringParameters') or {}
+    try:
+        fields = _object_encoder.parse_fields(params.get('fields'))
+    except ValueError:
+        return error_response('fields must be a comma-separated list of object columns', 400)
+    columns = ', '.join(fields)
+    
+    body = json.loads(event.get('body', '{}'))
+    object_id = body.get('id')
+    
+    if not object_id:
+        return error_response('Object ID is required', 400)
+    
+    updates = []
+    update_params = []
+    
+    for field in ['status', 'price', 'yield_percent', 'description']:
+        if field in body:
+            updates.append(f"{field} = %s")
+            update_params.append(body[field])
+    
+    if not updates:
+        return error_response('No fields to update', 400)
+    
+    updates.append("updated_at = CURRENT_TIMESTAMP")
+    update_params.append(int(object_id))
+    
+    query = f"""
+        UPDATE investment_objects SET {', '.join(updates)}
+        WHERE id = %s
+        RETURNING {columns}
+    """
+    
+    cur.execute(query, update_params)
+    row = cur.fetchone()
+    conn.commit()
+    _catalog_cache.clear()
+    
+    if row:
+        return json_response(_object_encoder.encode_row(row, fields))
+    return error_response('Object not found', 404)
+
+
+def object_facets(cur, event: Dict[str, Any], params: Dict[str, str]) -> Dict[str, Any]:
+    search = (params.get('q') or '').strip()
+    try:
+        filters = build_object_filters(params)
+    except ValueError:
+        return error_response('Invalid filter parameters', 400)
+    cache_key = ('facets', filters['query'], tuple(filters['params']), search)
+    cached = _catalog_cache.get(cache_key)
+    if cached:
+        return conditional_response(event, cached)
+    
+    search_condition = 'AND search_vector @@ catalog_search_query(%s)' if search else ''
+    cur.execute(f"""
+        SELECT GROUPING(city, property_type, status, price_bucket, yield_bucket),
+               city, property_type, status, price_bucket, yield_bucket, COUNT(*)
+        FROM (
+            SELECT city, property_type, status,
+                   width_bucket(price, %s::numeric[]) AS price_bucket,
+                   width_bucket(yield_percent, %s::numeric[]) AS yield_bucket
+            FROM investment_objects WHERE 1=1 {filters['query']} {search_condition}
+        ) o
+        GROUP BY GROUPING SETS ((city), (property_type), (status), (price_bucket), (yield_bucket), ())
+    """, [OBJECT_FACET_BOUNDS['price'], OBJECT_FACET_BOUNDS['yield']] + filters['params'] + ([search] if search else []))
+    
+    total = 0
+    values: Dict[str, Dict[Any, int]] = {facet: {} for facet in OBJECT_FACETS}
+    for mask, *row, count in cur.fetchall():
+        if mask == (1 << len(OBJECT_FACETS)) - 1:
+            total = count
+            continue
+        position = next(i for i in range(len(OBJECT_FACETS)) if not mask & (1 << (len(OBJECT_FACETS) - 1 - i)))
+        values[OBJECT_FACETS[position]][row[position]] = count
+    
+    facets: Dict[str, List[Dict[str, Any]]] = {}
+    for facet in OBJECT_FACETS:
+        bounds = OBJECT_FACET_BOUNDS.get(facet)
+        if bounds:
+            facets[facet] = [{
+                'from': bounds[bucket - 1] if bucket else None,
+                'to': bounds[bucket] if bucket < len(bounds) else None,
+                'count': values[facet].get(bucket, 0)
+            } for bucket in range(len(bounds) + 1)]
+        else:
+            facets[facet] = [
+                {'value': value, 'count': count}
+                for value, count in sorted(values[facet].items(), key=lambda item: (-item[1], str(item[0])))
+            ]
+    
+    response = with_etag(success_response({'total': total, 'facets': facets}))
+    _catalog_cache.set(cache_key, response)
+    return conditional_response(event, response)
+
+
+@_router.route('market', 'GET')
+def get_market(cur, conn, event: Dict[str, Any]) -> Dict[str, Any]:
+    params = event.get('queryStringParameters') or {}
+    city = params.get('city')
+    property_type = params.get('property_type')
+    cache_key = ('market', city, property_type)
+    cached = _catalog_cache.get(cache_key)
+    if cached:
+        return conditional_response(event, cached)
+    
+    cur.execute("""
+        SELECT city, property_type, metric, bucket, count FROM market_sketch_buckets
+        WHERE source = 'objects' AND count > 0
+          AND (%(city)s::text IS NULL OR city = %(city)s)
+          AND (%(type)s::text IS NULL OR property_type = %(type)s)
+        ORDER BY city, property_type, metric, bucket
+    """, {'city': city, 'type': property_type})
+    
+    markets: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    for (market_city, market_type, metric), buckets in itertools.groupby(cur.fetchall(), key=lambda row: row[:3]):
+        market = markets.setdefault((market_city, market_type), {'city': market_city, 'property_type': market_type})
+        market[metric] = sketch_quantiles([(bucket, count) for *_, bucket, count in buckets])
+    
+    response = with_etag(success_response({'markets': list(markets.values())}))
+    _catalog_cache.set(cache_key, response)
+    return conditional_response(event, response)
+
+
+@_router.route('favorites', 'GET')
+def get_favorites(cur, conn, event: Dict[str, Any]) -> Dict[str, Any]:
+    params = event.get('queryStringParameters') or {}
+    user_id = params.get('user_id')
+    
+    if not user_id:
+        return error_response('user_id is required', 400)
+    
+    try:
+        limit, after = parse_page_params(params, int)
+    except ValueError:
+        return error_response('Invalid pagination parameters', 400)
+    
+    keyset = keyset_condition('f.created_at', 'f.id', after)
+    cur.execute(f"""
+        SELECT f.id, f.user_id, f.object_id, f.created_at,
+               o.title, o.city, o.price, o.yield_percent, o.images
+        FROM favorites f
+        JOIN investment_objects o ON f.object_id = o.id
+        WHERE f.user_id = %s {keyset['query']}
+        ORDER BY f.created_at DESC, f.id DESC LIMIT %s
+    """, [int(user_id)] + keyset['params'] + [limit + 1])
+    
+    rows, next_cursor = paginate(cur.fetchall(), limit, lambda r: (r[3], r[0]))
+    favorites = [{
+        'id': r[0], 'user_id': r[1], 'object_id': r[2],
+        'created_at': r[3].isoformat() if r[3] else None,
+        'object': {
+            'title': r[4], 'city': r[5], 'price': float(r[6]) if r[6] else 0,
+            'yield_percent': float(r[7]) if r[7] else 0, 'images': r[8] or []
+        }
+    } for r in rows]
+    
+    return success_response(favorites, headers=cursor_headers(next_cursor))
+
+
+@_router.route('favorites', 'POST')
+def add_favorite(cur, conn, event: Dict[str, Any]) -> Dict[str, Any]:
+    params = event.get('queryStringParameters') or {}
+    body = json.loads(event.get('body', '{}'))
+    
+    if params.get('mode') == 'toggle':
+        return toggle_favorites(cur, conn, body)
+    
+    user_id = body.get('user_id')
+    object_id = body.get('object_id')
+    
+    if not user_id or not object_id:
+        return error_response('user_id and object_id are required', 400)
+    
+    cur.execute("""
+        WITH inserted AS (
+            INSERT INTO favorites (user_id, object_id) VALUES (%(user_id)s, %(object_id)s)
+            ON CONFLICT (user_id, object_id) DO NOTHING
+            RETURNING id, user_id, object_id, created_at
         )
-        row = cur.fetchone()
-        
-        if not row:
-            return error_response('Favorite not found', 404)
-        
-        return success_response({'message': 'Favorite removed', 'id': row[0]})
+        SELECT id, user_id, object_id, created_at, TRUE FROM inserted
+        UNION ALL
+        SELECT id, user_id, object_id, created_at, FALSE FROM favorites
+        WHERE user_id = %(user_id)s AND object_id = %(object_id)s AND NOT EXISTS (SELECT 1 FROM inserted)
+    """, {'user_id': int(user_id), 'object_id': int(object_id)})
+    row = cur.fetchone()
+    conn.commit()
+    
+    if not row or not row[4]:
+        return success_response({'message': 'Already in favorites', 'id': row[0] if row else None})
     
-    return error_response('Method not allowed', 405)
+    _catalog_cache.clear()
+    return success_response({
+        'id': row[0], 'user_id': row[1], 'object_id': row[2],
+        'created_at': row[3].isoformat() if row[3] else None
+    }, 201)
 
 
-def format_object(row) -> Dict[str, Any]:
-    return {
-        'id': row[0], 'broker_id': row[1], 'title': row[2], 'city': row[3],
-        'address': row[4], 'property_type': row[5],
-        'area': float(row[6]) if row[6] else 0,
-        'price': float(row[7]) if row[7] else 0,
-        'yield_percent': float(row[8]) if row[8] else 0,
-        'payback_years': float(row[9]) if row[9] else 0,
-        'description': row[10], 'images': row[11] or [],
-        'status': row[12], 'created_at': row[13].isoformat() if row[13] else None
-    }
+@_router.route('favorites', 'DELETE')
+def remove_favorite(cur, conn, event: Dict[str, Any]) -> Dict[str, Any]:
+    params = event.get('queryStringParameters') or {}
+    user_id = params.get('user_id')
+    object_id = params.get('object_id')
+    
+    if not user_id or not object_id:
+        return error_response('user_id and object_id are required', 400)
+    
+    cur.execute(
+        "DELETE FROM favorites WHERE user_id = %s AND object_id = %s RETURNING id",
+        (int(user_id), int(object_id))
+    )
+    row = cur.fetchone()
+    conn.commit()
+    
+    if not row:
+        return error_response('Favorite not found', 404)
+    
+    _catalog_cache.clear()
+    return success_response({'message': 'Favorite removed', 'id': row[0]})
+
+
+def toggle_favorites(cur, conn, body: Dict[str, Any]) -> Dict[str, Any]:
+    user_id = body.get('user_id')
+    object_ids = body.get('object_ids')
+    
+    try:
+        if not user_id or not isinstance(object_ids, list):
+            raise ValueError('user_id and object_ids are required')
+        ids = list(dict.fromkeys(int(object_id) for object_id in object_ids))
+        if not 1 <= len(ids) <= MAX_BATCH_IDS:
+            raise ValueError('object_ids out of range')
+    except (TypeError, ValueError):
+        return error_response(f'user_id and 1-{MAX_BATCH_IDS} integer object_ids are required', 400)
+    
+    cur.execute("""
+        WITH requested AS (
+            SELECT id AS object_id FROM investment_objects WHERE id = ANY(%(ids)s)
+        ),
+        removed AS (
+            DELETE FROM favorites f USING requested r
+            WHERE f.user_id = %(user_id)s AND f.object_id = r.object_id
+            RETURNING f.object_id
+        ),
+        added AS (
+            INSERT INTO favorites (user_id, object_id)
+            SELECT %(user_id)s, object_id FROM requested
+            WHERE object_id NOT IN (SELECT object_id FROM removed)
+            ON CONFLICT (user_id, object_id) DO NOTHING
+            RETURNING object_id
+        )
+        SELECT COALESCE((SELECT array_agg(object_id) FROM added), '{}'),
+               COALESCE((SELECT array_agg(object_id) FROM removed), '{}')
+    """, {'user_id': int(user_id), 'ids': ids})
+    added, removed = cur.fetchone()
+    conn.commit()
+    
+    if added or removed:
+        _catalog_cache.clear()
+    changed = set(added) | set(removed)
+    return success_response({
+        'added': [i for i in ids if i in added],
+        'removed': [i for i in ids if i in removed],
+        'missing': [i for i in ids if i not in changed]
+    })
 
 
 def build_object_filters(params: Dict[str, str]) -> Dict[str, Any]:
     query = ""
     query_params: List[Any] = []
+    shape: List[str] = []
     
-    filters = {
-        'city': 'city = %s',
-        'property_type': 'property_type = %s',
-        'status': 'status = %s'
-    }
+    for key in OBJECT_EQUALITY_FILTERS:
+        if key not in params:
+            continue
+        if key == 'status' and params[key] == OBJECT_HOT_STATUS:
+            query += f" AND status = '{OBJECT_HOT_STATUS}'"
+            shape.append(OBJECT_HOT_STATUS)
+            continue
+        query += f" AND {key} = %s"
+        query_params.append(params[key])
+        shape.append(key)
     
-    for key, condition in filters.items():
+    for key, condition in OBJECT_RANGE_FILTERS.items():
         if key in params:
             query += f" AND {condition}"
-            query_params.append(params[key])
+            query_params.append(parse_decimal(params[key]))
     
-    if 'min_price' in params:
-        query += " AND price >= %s"
-        query_params.append(float(params['min_price']))
-    
-    if 'max_price' in params:
-        query += " AND price <= %s"
-        query_params.append(float(params['max_price']))
-    
-    if 'min_yield' in params:
-        query += " AND yield_percent >= %s"
-        query_params.append(float(params['min_yield']))
+    return {'query': query, 'params': query_params, 'shape': tuple(shape)}
+
+
+def parse_decimal(raw: str) -> Decimal:
+    try:
+        value = Decimal(raw)
+    except ArithmeticError:
+        raise ValueError(f'Invalid number: {raw}')
+    if not value.is_finite():
+        raise ValueError(f'Invalid number: {raw}')
+    return value
+
+
+def compile_object_list(
+    columns: str, filters: Dict[str, Any], sort: str, direction: str, after: Optional[Tuple[Any, Any]], limit: int
+) -> Dict[str, Any]:
+    sort_column = OBJECT_SORTS[sort][0]
+    keyset = keyset_condition(sort_column, 'id', after, direction)
+    query = f"""
+        SELECT {columns}, {sort_column}, id
+        FROM investment_objects WHERE 1=1 {filters['query']} {keyset['query']}
+        ORDER BY {sort_column} {direction.upper()}, id {direction.upper()} LIMIT %s
+    """
+    return {
+        'query': query,
+        'params': filters['params'] + keyset['params'] + [limit + 1],
+        'index': OBJECT_LIST_INDEXES.get((filters['shape'], sort))
+    }
+
+
+def sketch_quantiles(buckets: List[Tuple[int, int]]) -> Dict[str, Any]:
+    total = sum(count for _, count in buckets)
+    quantiles: Dict[str, Any] = {'count': total}
+    position, seen = 0, 0
+    for name, q in MARKET_QUANTILES:
+        rank = q * (total - 1)
+        while seen + buckets[position][1] <= rank:
+            seen += buckets[position][1]
+            position += 1
+        quantiles[name] = round(2 * MARKET_SKETCH_GAMMA ** buckets[position][0] / (MARKET_SKETCH_GAMMA + 1), 2)
+    return quantiles
+
+
+def parse_id_list(raw: str, id_type: Callable[[str], Any]) -> List[Any]:
+    ids = list(dict.fromkeys(id_type(part.strip()) for part in raw.split(',') if part.strip()))
+    if not 1 <= len(ids) <= MAX_BATCH_IDS:
+        raise ValueError('ids out of range')
+    return ids
+
+
+def order_by_ids(
+    ids: List[Any], items: List[Any], key: Callable[[Any], Any] = lambda item: item['id']
+) -> Dict[str, Any]:
+    by_id = {key(item): item for item in items}
+    return {
+        'items': [by_id[i] for i in ids if i in by_id],
+        'missing': [i for i in ids if i not in by_id]
+    }
+
+
+def parse_page_params(
+    params: Dict[str, str], id_type: Callable[[Any], Any], key_type: Callable[[Any], Any] = datetime.fromisoformat
+) -> Tuple[int, Optional[Tuple[Any, Any]]]:
+    limit = int(params.get('limit', DEFAULT_PAGE_LIMIT))
+    if not 1 <= limit <= MAX_PAGE_LIMIT:
+        raise ValueError('limit out of range')
     
-    if 'max_yield' in params:
-        query += " AND yield_percent <= %s"
-        query_params.append(float(params['max_yield']))
+    cursor = params.get('cursor')
+    if not cursor:
+        return limit, None
+    return limit, decode_cursor(cursor, key_type, id_type)
+
+
+def keyset_condition(
+    sort_column: str, id_column: str, after: Optional[Tuple[Any, Any]], direction: str = 'desc'
+) -> Dict[str, Any]:
+    if not after:
+        return {'query': '', 'params': []}
+    operator = '>' if direction == 'asc' else '<'
+    return {'query': f"AND ({sort_column}, {id_column}) {operator} (%s, %s)", 'params': list(after)}
+
+
+def paginate(rows: List[Any], limit: int, key: Callable[[Any], Tuple[Any, ...]]) -> Tuple[List[Any], Optional[str]]:
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(*key(rows[-1]))
+
+
+def encode_cursor(*values: Any) -> str:
+    raw = json.dumps([
+        v.isoformat() if isinstance(v, datetime) else str(v) if isinstance(v, Decimal) else v for v in values
+    ])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token: str, *types: Callable[[Any], Any]) -> Tuple[Any, ...]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        return tuple(convert(value) for convert, value in zip(types, values, strict=True))
+    except (ValueError, TypeError, ArithmeticError):
+        raise ValueError('Invalid cursor')
+
+
+def cursor_headers(next_cursor: Optional[str]) -> Dict[str, str]:
+    if not next_cursor:
+        return {}
+    return {'X-Next-Cursor': next_cursor, 'Access-Control-Expose-Headers': 'X-Next-Cursor'}
+
+
+# >>> shared/blocks/etag.py (copied by shared/sync.py, edit the block and re-run)
+def with_etag(response: Dict[str, Any]) -> Dict[str, Any]:
+    etag = '"' + hashlib.sha1(response['body'].encode()).hexdigest() + '"'
+    return {**response, 'headers': {**response['headers'], 'ETag': etag}}
+
+
+def conditional_response(event: Dict[str, Any], response: Dict[str, Any]) -> Dict[str, Any]:
+    headers = {k.lower(): v for k, v in (event.get('headers') or {}).items()}
+    if_none_match = headers.get('if-none-match')
+    if not if_none_match:
+        return response
     
-    return {'query': query, 'params': query_params}
+    etag = response['headers']['ETag']
+    candidates = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+    if '*' in candidates or etag in candidates:
+        return {
+            'statusCode': 304,
+            'headers': {'ETag': etag, 'Access-Control-Allow-Origin': '*'},
+            'body': '',
+            'isBase64Encoded': False
+        }
+    return response
+# <<< shared/blocks/etag.py
 
 
-def success_response(data: Any, status: int = 200) -> Dict[str, Any]:
+def success_response(data: Any, status: int = 200, headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    return json_response(json.dumps(data), status, headers)
+
+
+def json_response(body: str, status: int = 200, headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
     return {
         'statusCode': status,
-        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-        'body': json.dumps(data),
+        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*', **(headers or {})},
+        'body': body,
         'isBase64Encoded': False
     }
 
@@ -359,4 +1204,4 @@ def error_response(message: str, status: int = 400) -> Dict[str, Any]:
         'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
         'body': json.dumps({'error': message}),
         'isBase64Encoded': False
-    }
\ No newline at end of file
+    }
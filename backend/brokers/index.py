@@ -1,10 +1,548 @@
+import base64
+import bisect
+import functools
+import gzip
 import json
+import logging
 import os
+import re
+import sys
+import threading
+import time
 import uuid
-from typing import Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from json.encoder import encode_basestring_ascii
+from typing import Dict, Any, List, Optional, Tuple, Callable
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2 import extensions, pool
 
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DASHBOARD_CONCURRENCY = int(os.environ.get('DASHBOARD_CONCURRENCY', '3'))
+DB_POOL_MIN_SIZE = int(os.environ.get('DB_POOL_MIN_SIZE', '1'))
+DB_POOL_MAX_SIZE = max(int(os.environ.get('DB_POOL_MAX_SIZE', '5')), DASHBOARD_CONCURRENCY)
+DB_POOL_HEALTHCHECK_INTERVAL = float(os.environ.get('DB_POOL_HEALTHCHECK_INTERVAL', '30'))
+
+DEFAULT_PAGE_LIMIT = 100
+MAX_PAGE_LIMIT = 500
+MAX_BATCH_IDS = 100
+
+BROKER_COLUMNS = [
+    'id', 'email', 'first_name', 'last_name', 'phone', 'avatar', 'company', 'referral_code',
+    'stats_total_properties', 'stats_active_properties', 'stats_total_investors', 'stats_total_deals',
+    'stats_total_revenue', 'created_at', 'updated_at'
+]
+BROKER_COLUMN_KINDS = {
+    **dict.fromkeys([
+        'stats_total_properties', 'stats_active_properties', 'stats_total_investors', 'stats_total_deals'
+    ], 'int'),
+    'stats_total_revenue': 'numeric',
+    **dict.fromkeys(['created_at', 'updated_at'], 'timestamp')
+}
+
+DASHBOARD_PAGE_LIMIT = int(os.environ.get('DASHBOARD_PAGE_LIMIT', '20'))
+DASHBOARD_INTERACTIONS_LIMIT = int(os.environ.get('DASHBOARD_INTERACTIONS_LIMIT', '20'))
+DASHBOARD_PROPERTY_COLUMNS = [
+    ('id', 'text'), ('title', 'text'), ('property_type', 'text'), ('status', 'text'),
+    ('location_city', 'text'), ('location_address', 'text'), ('pricing_total_price', 'numeric'),
+    ('investment_expected_return', 'numeric'), ('metadata_views', 'int'), ('media_images', 'json'),
+    ('created_at', 'timestamp')
+]
+DASHBOARD_INVESTOR_COLUMNS = [
+    ('id', 'text'), ('first_name', 'text'), ('last_name', 'text'), ('email', 'text'), ('phone', 'text'),
+    ('stage', 'text'), ('stage_entered_at', 'timestamp'), ('profile_budget', 'numeric'),
+    ('interaction_last_contact', 'timestamp'), ('created_at', 'timestamp')
+]
+DASHBOARD_INTERACTION_COLUMNS = [
+    ('id', 'text'), ('investor_id', 'text'), ('property_id', 'text'), ('type', 'text'), ('direction', 'text'),
+    ('subject', 'text'), ('description', 'text'), ('outcome', 'text'), ('next_action_date', 'timestamp'),
+    ('created_at', 'timestamp')
+]
+
+COLUMN_ENCODERS: Dict[str, Callable[[Any], str]] = {
+    'text': encode_basestring_ascii,
+    'int': int.__repr__,
+    'float': float.__repr__,
+    'bool': lambda value: 'true' if value else 'false',
+    'numeric': lambda value: f'"{value}"',
+    'timestamp': lambda value: f'"{value}"',
+    'json': lambda value: json.dumps(value, default=str)
+}
+COLUMN_NULLS: Dict[str, str] = {}
+ENCODER_PLAN_CACHE_SIZE = 64
+
+COMPRESSION_MIN_BYTES = int(os.environ.get('COMPRESSION_MIN_BYTES', '1400'))
+GZIP_LEVEL = int(os.environ.get('GZIP_LEVEL', '5'))
+BROTLI_QUALITY = int(os.environ.get('BROTLI_QUALITY', '5'))
+
+FUNCTION_NAME = 'brokers'
+ROUTE_PARAMS = ('action',)
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', '250'))
+SLOW_QUERY_EXPLAIN_INTERVAL = float(os.environ.get('SLOW_QUERY_EXPLAIN_INTERVAL', '60'))
+QUERY_STATS_LOG_INTERVAL = float(os.environ.get('QUERY_STATS_LOG_INTERVAL', '300'))
+QUERY_STATS_MAX_SHAPES = 200
+QUERY_STATS_LOG_TOP = 20
+QUERY_HISTOGRAM_BOUNDS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+SQL_LITERALS = re.compile(r"'(?:[^']|'')*'|%\(\w+\)s|%s|\b\d+(?:\.\d+)?\b|\bNULL\b(?=::|,|\))")
+SQL_TUPLES = re.compile(r"\(\?(?:::\w+)?(?:, \?(?:::\w+)?)+\)")
+SQL_REPEATED_TUPLES = re.compile(r"\(\?\)(?:, \(\?\))+")
+SQL_WHITESPACE = re.compile(r'\s+')
+
+PREFLIGHT_RESPONSE = {
+    'statusCode': 200,
+    'headers': {
+        'Access-Control-Allow-Origin': '*',
+        'Access-Control-Allow-Methods': 'GET, POST, PUT, OPTIONS',
+        'Access-Control-Allow-Headers': 'Content-Type, X-Broker-Id',
+        'Access-Control-Max-Age': '86400'
+    },
+    'body': '',
+    'isBase64Encoded': False
+}
+NOT_FOUND_RESPONSE = {
+    'statusCode': 404,
+    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+    'body': json.dumps({'error': 'Resource not found'}),
+    'isBase64Encoded': False
+}
+METHOD_NOT_ALLOWED_RESPONSE = {
+    'statusCode': 405,
+    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+    'body': json.dumps({'error': 'Method not allowed'}),
+    'isBase64Encoded': False
+}
+
+
+# >>> shared/blocks/row_encoder.py (copied by shared/sync.py, edit the block and re-run)
+class RowEncoder:
+    def __init__(self, columns: List[Tuple[str, str]]):
+        self.kinds = dict(columns)
+        self.default_fields = tuple(self.kinds)
+        self._plans: Dict[Any, List[Tuple[str, Callable[[Any], str], str]]] = {}
+        self.plan(self.default_fields)
+    
+    def parse_fields(self, raw: Optional[str]) -> Tuple[str, ...]:
+        if not raw:
+            return self.default_fields
+        fields = tuple(dict.fromkeys(field.strip() for field in raw.split(',') if field.strip()))
+        if not fields or any(field not in self.kinds for field in fields):
+            raise ValueError('Unknown field')
+        return fields
+    
+    def plan(
+        self, fields: Tuple[str, ...], extra: Tuple[Tuple[str, str], ...] = ()
+    ) -> List[Tuple[str, Callable[[Any], str], str]]:
+        plan = self._plans.get((fields, extra))
+        if plan is None:
+            columns = [(field, self.kinds[field]) for field in fields] + list(extra)
+            plan = [
+                (
+                    ('{' if position == 0 else ', ') + encode_basestring_ascii(name) + ': ',
+                    COLUMN_ENCODERS[kind], COLUMN_NULLS.get(kind, 'null')
+                )
+                for position, (name, kind) in enumerate(columns)
+            ]
+            if len(self._plans) < ENCODER_PLAN_CACHE_SIZE:
+                self._plans[(fields, extra)] = plan
+        return plan
+    
+    def write(self, out: List[str], row: Tuple[Any, ...], plan: List[Tuple[str, Callable[[Any], str], str]]) -> None:
+        for (prefix, encode, null), value in zip(plan, row):
+            out.append(prefix)
+            out.append(null if value is None else encode(value))
+        out.append('}')
+    
+    def encode_row(self, row: Tuple[Any, ...], fields: Tuple[str, ...], extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+        started = time.perf_counter()
+        out: List[str] = []
+        self.write(out, row, self.plan(fields, extra))
+        record_phase('encode', started)
+        return ''.join(out)
+    
+    def encode_rows(
+        self, rows: List[Tuple[Any, ...]], fields: Tuple[str, ...], extra: Tuple[Tuple[str, str], ...] = ()
+    ) -> str:
+        started = time.perf_counter()
+        plan = self.plan(fields, extra)
+        out = ['[']
+        for position, row in enumerate(rows):
+            if position:
+                out.append(', ')
+            self.write(out, row, plan)
+        out.append(']')
+        record_phase('encode', started)
+        return ''.join(out)
+# <<< shared/blocks/row_encoder.py
+
+
+_broker_encoder = RowEncoder([(column, BROKER_COLUMN_KINDS.get(column, 'text')) for column in BROKER_COLUMNS])
+_dashboard_property_encoder = RowEncoder(DASHBOARD_PROPERTY_COLUMNS)
+_dashboard_investor_encoder = RowEncoder(DASHBOARD_INVESTOR_COLUMNS)
+_dashboard_interaction_encoder = RowEncoder(DASHBOARD_INTERACTION_COLUMNS)
+
+
+# >>> shared/blocks/router.py (copied by shared/sync.py, edit the block and re-run)
+class Router:
+    def __init__(self, resource_param: str, default_resource: str):
+        self.resource_param = resource_param
+        self.default_resource = default_resource
+        self.routes: Dict[Tuple[str, str, Optional[str]], Callable[..., Dict[str, Any]]] = {}
+        self.resources: set = set()
+    
+    def route(self, resource: str, *methods: str, action: Optional[str] = None) -> Callable:
+        def register(handle: Callable[..., Dict[str, Any]]) -> Callable[..., Dict[str, Any]]:
+            for method in methods:
+                self.routes[(method, resource, action)] = handle
+            self.resources.add(resource)
+            return handle
+        return register
+    
+    def resolve(
+        self, method: str, params: Dict[str, str]
+    ) -> Tuple[Optional[Callable[..., Dict[str, Any]]], Optional[Dict[str, Any]]]:
+        if method == 'OPTIONS':
+            return None, PREFLIGHT_RESPONSE
+        resource = params.get(self.resource_param, self.default_resource)
+        handle = self.routes.get((method, resource, params.get('action'))) or self.routes.get((method, resource, None))
+        if handle:
+            return handle, None
+        if resource in self.resources:
+            return None, METHOD_NOT_ALLOWED_RESPONSE
+        return None, NOT_FOUND_RESPONSE
+# <<< shared/blocks/router.py
+
+
+# >>> shared/blocks/timing.py (copied by shared/sync.py, edit the block and re-run)
+class RequestTiming:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self.queries = 0
+        self._lock = threading.Lock()
+    
+    def add(self, phase: str, ms: float, query: bool = False) -> None:
+        with self._lock:
+            self.phases[phase] = self.phases.get(phase, 0.0) + ms
+            self.queries += query
+    
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+    
+    def header(self) -> str:
+        phases = [f'{name};dur={ms:.1f}' for name, ms in self.phases.items()]
+        return ', '.join(phases + [f'total;dur={self.elapsed_ms():.1f}'])
+
+
+class QueryStats:
+    def __init__(self, max_shapes: int):
+        self.max_shapes = max_shapes
+        self._shapes: Dict[str, List[float]] = {}
+        self._explained_at: Dict[str, float] = {}
+        self._logged_at = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def record(self, shape: str, ms: float) -> None:
+        with self._lock:
+            stats = self._shapes.get(shape)
+            if stats is None:
+                if len(self._shapes) >= self.max_shapes:
+                    shape = 'other'
+                stats = self._shapes.setdefault(shape, [0, 0.0, 0.0] + [0] * (len(QUERY_HISTOGRAM_BOUNDS_MS) + 1))
+            stats[0] += 1
+            stats[1] += ms
+            stats[2] = max(stats[2], ms)
+            stats[3 + bisect.bisect_left(QUERY_HISTOGRAM_BOUNDS_MS, ms)] += 1
+    
+    def should_explain(self, shape: str) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            if now - self._explained_at.get(shape, -SLOW_QUERY_EXPLAIN_INTERVAL) < SLOW_QUERY_EXPLAIN_INTERVAL:
+                return False
+            self._explained_at[shape] = now
+            return True
+    
+    def summary(self, limit: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            ranked = sorted(self._shapes.items(), key=lambda item: -item[1][1])[:limit]
+        return [{
+            'sql': shape,
+            'count': stats[0],
+            'total_ms': round(stats[1], 1),
+            'max_ms': round(stats[2], 1),
+            'p50_ms': histogram_quantile(stats, 0.5),
+            'p95_ms': histogram_quantile(stats, 0.95),
+            'p99_ms': histogram_quantile(stats, 0.99)
+        } for shape, stats in ranked]
+    
+    def maybe_log(self) -> None:
+        if time.monotonic() - self._logged_at < QUERY_STATS_LOG_INTERVAL:
+            return
+        self._logged_at = time.monotonic()
+        log_event('query_stats', shapes=self.summary(QUERY_STATS_LOG_TOP))
+
+
+class TimingCursor(extensions.cursor):
+    def execute(self, query, vars=None):
+        started = time.perf_counter()
+        result = super().execute(query, vars)
+        ms = (time.perf_counter() - started) * 1000
+        shape = normalize_sql(query)
+        _query_stats.record(shape, ms)
+        if _timing:
+            _timing.add('db', ms, query=True)
+        if ms >= SLOW_QUERY_MS and _query_stats.should_explain(shape):
+            log_event(
+                'slow_query', logging.WARNING,
+                sql=shape, duration_ms=round(ms, 1), plan=explain(self.connection, query, vars)
+            )
+        return result
+    
+    def fetchone(self):
+        started = time.perf_counter()
+        try:
+            return super().fetchone()
+        finally:
+            record_phase('fetch', started)
+    
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        try:
+            return super().fetchmany(size) if size is not None else super().fetchmany()
+        finally:
+            record_phase('fetch', started)
+    
+    def fetchall(self):
+        started = time.perf_counter()
+        try:
+            return super().fetchall()
+        finally:
+            record_phase('fetch', started)
+    
+    def __iter__(self):
+        while True:
+            rows = self.fetchmany(self.itersize)
+            if not rows:
+                return
+            yield from rows
+
+
+class JsonLogFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps({
+            'event': record.getMessage(),
+            'function': FUNCTION_NAME,
+            'level': record.levelname,
+            **getattr(record, 'fields', {})
+        }, default=str, ensure_ascii=False)
+
+
+def json_logger(name: str) -> logging.Logger:
+    logger = logging.getLogger(name)
+    if not logger.handlers:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(JsonLogFormatter())
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
+
+
+_logger = json_logger(FUNCTION_NAME)
+_timing: Optional[RequestTiming] = None
+_query_stats = QueryStats(QUERY_STATS_MAX_SHAPES)
+_cold_start = True
+
+
+@functools.lru_cache(maxsize=512)
+def normalize_sql(query: Any) -> str:
+    text = query.decode('utf-8', 'replace') if isinstance(query, bytes) else str(query)
+    text = SQL_LITERALS.sub('?', SQL_WHITESPACE.sub(' ', text).strip())
+    return SQL_REPEATED_TUPLES.sub('(?), ...', SQL_TUPLES.sub('(?)', text))
+
+
+def histogram_quantile(stats: List[float], q: float) -> Optional[float]:
+    target = stats[0] * q
+    seen = 0
+    for position, count in enumerate(stats[3:]):
+        seen += count
+        if count and seen >= target:
+            return QUERY_HISTOGRAM_BOUNDS_MS[position] if position < len(QUERY_HISTOGRAM_BOUNDS_MS) else round(stats[2], 1)
+    return None
+
+
+def explain(conn, query: Any, vars: Any) -> Optional[str]:
+    prefix = b'EXPLAIN ' if isinstance(query, bytes) else 'EXPLAIN '
+    in_transaction = conn.get_transaction_status() == extensions.TRANSACTION_STATUS_INTRANS
+    try:
+        with conn.cursor(cursor_factory=extensions.cursor) as cur:
+            if in_transaction:
+                cur.execute('SAVEPOINT slow_query_explain')
+            try:
+                cur.execute(prefix + query, vars)
+                return '\n'.join(row[0] for row in cur.fetchall())
+            finally:
+                if in_transaction:
+                    cur.execute('ROLLBACK TO SAVEPOINT slow_query_explain')
+    except psycopg2.Error as error:
+        return f'EXPLAIN failed: {error}'.strip()
+
+
+def record_phase(phase: str, started: float) -> None:
+    if _timing:
+        _timing.add(phase, (time.perf_counter() - started) * 1000)
+
+
+def log_event(event: str, level: int = logging.INFO, **fields: Any) -> None:
+    _logger.log(level, event, extra={'fields': fields})
+
+
+def instrumented(handle: Callable[[Dict[str, Any], Any], Dict[str, Any]]) -> Callable[[Dict[str, Any], Any], Dict[str, Any]]:
+    @functools.wraps(handle)
+    def wrapper(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+        global _timing, _cold_start
+        timing = _timing = RequestTiming()
+        cold_start, _cold_start = _cold_start, False
+        status = 500
+        try:
+            response = handle(event, context)
+            status = response['statusCode']
+            headers = {**(response.get('headers') or {}), 'Server-Timing': timing.header(), 'Timing-Allow-Origin': '*'}
+            return {**response, 'headers': headers}
+        finally:
+            _timing = None
+            params = event.get('queryStringParameters') or {}
+            log_event(
+                'request',
+                method=event.get('httpMethod', 'GET'),
+                route={key: params[key] for key in ROUTE_PARAMS if key in params},
+                params=sorted(params),
+                status=status,
+                duration_ms=round(timing.elapsed_ms(), 2),
+                phases={name: round(ms, 2) for name, ms in timing.phases.items()},
+                queries=timing.queries,
+                cold_start=cold_start
+            )
+            _query_stats.maybe_log()
+    return wrapper
+# <<< shared/blocks/timing.py
+
+
+# >>> shared/blocks/compression.py (copied by shared/sync.py, edit the block and re-run)
+def compressed(handle: Callable[[Dict[str, Any], Any], Dict[str, Any]]) -> Callable[[Dict[str, Any], Any], Dict[str, Any]]:
+    @functools.wraps(handle)
+    def wrapper(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+        response = handle(event, context)
+        body = response.get('body')
+        if response.get('isBase64Encoded') or not body or len(body) < COMPRESSION_MIN_BYTES:
+            return response
+        
+        headers = {**response['headers'], 'Vary': 'Accept-Encoding'}
+        request_headers = {k.lower(): v for k, v in (event.get('headers') or {}).items()}
+        encoding = negotiate_encoding(request_headers.get('accept-encoding', ''))
+        if not encoding:
+            return {**response, 'headers': headers}
+        
+        started = time.perf_counter()
+        raw = body.encode()
+        if encoding == 'br':
+            data = brotli.compress(raw, quality=BROTLI_QUALITY)
+        else:
+            data = gzip.compress(raw, GZIP_LEVEL, mtime=0)
+        record_phase('compress', started)
+        
+        headers['Content-Encoding'] = encoding
+        if 'ETag' in headers:
+            headers['ETag'] = 'W/' + headers['ETag'].removeprefix('W/')
+        return {**response, 'headers': headers, 'body': base64.b64encode(data).decode(), 'isBase64Encoded': True}
+    return wrapper
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.lower().split(','):
+        name, _, parameters = part.partition(';')
+        weight = 1.0
+        for parameter in parameters.split(';'):
+            key, _, value = parameter.strip().partition('=')
+            if key == 'q':
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        if name.strip():
+            weights[name.strip()] = weight
+    
+    best, best_weight = None, 0.0
+    for encoding in (('br', 'gzip') if brotli else ('gzip',)):
+        weight = weights.get(encoding, weights.get('*', 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+# <<< shared/blocks/compression.py
+
+
+# >>> shared/blocks/pool.py (copied by shared/sync.py, edit the block and re-run)
+_pool: Optional[pool.ThreadedConnectionPool] = None
+_last_used: Dict[int, float] = {}
+
+
+def get_connection():
+    global _pool
+    started = time.perf_counter()
+    try:
+        if _pool is None or _pool.closed:
+            _pool = pool.ThreadedConnectionPool(
+                DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, os.environ.get('DATABASE_URL'), cursor_factory=TimingCursor
+            )
+        for _ in range(DB_POOL_MAX_SIZE):
+            conn = _pool.getconn()
+            if connection_is_healthy(conn):
+                return conn
+            discard_connection(conn)
+        return _pool.getconn()
+    finally:
+        record_phase('connect', started)
+
+
+def release_connection(conn) -> None:
+    if conn.closed:
+        discard_connection(conn)
+        return
+    _last_used[id(conn)] = time.monotonic()
+    _pool.putconn(conn)
+
+
+def discard_connection(conn) -> None:
+    _last_used.pop(id(conn), None)
+    _pool.putconn(conn, close=True)
+
+
+def connection_is_healthy(conn) -> bool:
+    if conn.closed or conn.info.transaction_status == extensions.TRANSACTION_STATUS_UNKNOWN:
+        return False
+    last_used = _last_used.get(id(conn))
+    if last_used is None or time.monotonic() - last_used < DB_POOL_HEALTHCHECK_INTERVAL:
+        return True
+    try:
+        with conn.cursor() as cur:
+            cur.execute('SELECT 1')
+        conn.rollback()
+    except psycopg2.Error:
+        return False
+    return True
+# <<< shared/blocks/pool.py
+
+
+_router = Router('resource', 'brokers')
+_query_executor = ThreadPoolExecutor(max_workers=max(DASHBOARD_CONCURRENCY - 1, 1), thread_name_prefix='query')
+
+
+@instrumented
+@compressed
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     '''
     Business: API для управления брокерами
@@ -12,130 +550,323 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     Returns: HTTP response с данными брокера
     '''
     method: str = event.get('httpMethod', 'GET')
+    params = event.get('queryStringParameters') or {}
+    handle, response = _router.resolve(method, params)
+    if response:
+        return response
     
-    if method == 'OPTIONS':
+    try:
+        fields = _broker_encoder.parse_fields(params.get('fields'))
+    except ValueError:
         return {
-            'statusCode': 200,
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, PUT, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type, X-Broker-Id',
-                'Access-Control-Max-Age': '86400'
-            },
-            'body': '',
+            'statusCode': 400,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': 'fields must be a comma-separated list of broker columns'}),
             'isBase64Encoded': False
         }
     
-    dsn = os.environ.get('DATABASE_URL')
-    conn = psycopg2.connect(dsn)
+    conn = get_connection()
     conn.autocommit = True
     
     try:
-        if method == 'GET':
-            broker_id = event.get('queryStringParameters', {}).get('id')
-            
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                if broker_id:
-                    cur.execute("SELECT * FROM brokers WHERE id = %s", (broker_id,))
-                    broker = cur.fetchone()
-                    if not broker:
-                        return {
-                            'statusCode': 404,
-                            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                            'body': json.dumps({'error': 'Broker not found'}),
-                            'isBase64Encoded': False
-                        }
-                    return {
-                        'statusCode': 200,
-                        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                        'body': json.dumps(dict(broker), default=str),
-                        'isBase64Encoded': False
-                    }
-                else:
-                    cur.execute("SELECT * FROM brokers ORDER BY created_at DESC")
-                    brokers = cur.fetchall()
-                    return {
-                        'statusCode': 200,
-                        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                        'body': json.dumps([dict(b) for b in brokers], default=str),
-                        'isBase64Encoded': False
-                    }
-        
-        elif method == 'POST':
-            body_data = json.loads(event.get('body', '{}'))
-            broker_id = str(uuid.uuid4())
-            referral_code = f"REF-{uuid.uuid4().hex[:8].upper()}"
-            
-            with conn.cursor() as cur:
-                cur.execute("""
-                    INSERT INTO brokers (id, email, first_name, last_name, phone, avatar, company, referral_code)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                    RETURNING id
-                """, (
-                    broker_id,
-                    body_data['email'],
-                    body_data['firstName'],
-                    body_data['lastName'],
-                    body_data.get('phone'),
-                    body_data.get('avatar'),
-                    body_data.get('company'),
-                    referral_code
-                ))
-                
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                cur.execute("SELECT * FROM brokers WHERE id = %s", (broker_id,))
-                broker = cur.fetchone()
+        return handle(conn, event, params, fields)
+    
+    finally:
+        release_connection(conn)
+
+
+@_router.route('brokers', 'GET')
+def get_brokers(conn, event: Dict[str, Any], params: Dict[str, str], fields: Tuple[str, ...]) -> Dict[str, Any]:
+    columns = ', '.join(fields)
+    
+    broker_id = params.get('id')
+    
+    with conn.cursor() as cur:
+        if params.get('ids'):
+            try:
+                ids = parse_id_list(params['ids'])
+            except ValueError:
+                return {
+                    'statusCode': 400,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'body': json.dumps({'error': f'ids must contain 1-{MAX_BATCH_IDS} comma-separated values'}),
+                    'isBase64Encoded': False
+                }
             
+            cur.execute(f"SELECT {columns}, id FROM brokers WHERE id = ANY(%s)", (ids,))
             return {
-                'statusCode': 201,
+                'statusCode': 200,
                 'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                'body': json.dumps(dict(broker), default=str),
+                'body': order_by_ids(ids, cur.fetchall(), fields),
                 'isBase64Encoded': False
             }
-        
-        elif method == 'PUT':
-            body_data = json.loads(event.get('body', '{}'))
-            broker_id = body_data.get('id')
-            
-            if not broker_id:
+        elif broker_id:
+            cur.execute(f"SELECT {columns} FROM brokers WHERE id = %s", (broker_id,))
+            broker = cur.fetchone()
+            if not broker:
+                return {
+                    'statusCode': 404,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'body': json.dumps({'error': 'Broker not found'}),
+                    'isBase64Encoded': False
+                }
+            return {
+                'statusCode': 200,
+                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                'body': _broker_encoder.encode_row(broker, fields),
+                'isBase64Encoded': False
+            }
+        else:
+            try:
+                limit, after = parse_page_params(params)
+            except ValueError:
                 return {
                     'statusCode': 400,
                     'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                    'body': json.dumps({'error': 'Broker ID required'}),
+                    'body': json.dumps({'error': 'Invalid pagination parameters'}),
                     'isBase64Encoded': False
                 }
             
-            with conn.cursor() as cur:
-                cur.execute("""
-                    UPDATE brokers 
-                    SET first_name = %s, last_name = %s, phone = %s, avatar = %s, company = %s, updated_at = CURRENT_TIMESTAMP
-                    WHERE id = %s
-                """, (
-                    body_data.get('firstName'),
-                    body_data.get('lastName'),
-                    body_data.get('phone'),
-                    body_data.get('avatar'),
-                    body_data.get('company'),
-                    broker_id
-                ))
-            
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                cur.execute("SELECT * FROM brokers WHERE id = %s", (broker_id,))
-                broker = cur.fetchone()
-            
+            keyset = keyset_condition(after)
+            cur.execute(f"""
+                SELECT {columns}, created_at, id FROM brokers WHERE 1=1 {keyset['query']}
+                ORDER BY created_at DESC, id DESC LIMIT %s
+            """, keyset['params'] + [limit + 1])
+            brokers, next_cursor = paginate(cur.fetchall(), limit)
             return {
                 'statusCode': 200,
-                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                'body': json.dumps(dict(broker), default=str),
+                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*', **cursor_headers(next_cursor)},
+                'body': _broker_encoder.encode_rows(brokers, fields),
                 'isBase64Encoded': False
             }
-        
+
+
+@_router.route('brokers', 'GET', action='dashboard')
+def dashboard_response(conn, event: Dict[str, Any], params: Dict[str, str], fields: Tuple[str, ...]) -> Dict[str, Any]:
+    broker_id = params.get('id')
+    if not broker_id:
         return {
-            'statusCode': 405,
+            'statusCode': 400,
             'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({'error': 'Method not allowed'}),
+            'body': json.dumps({'error': 'Broker ID required'}),
             'isBase64Encoded': False
         }
     
+    def broker(cur) -> Optional[str]:
+        cur.execute(f"SELECT {', '.join(fields)} FROM brokers WHERE id = %s", (broker_id,))
+        row = cur.fetchone()
+        return _broker_encoder.encode_row(row, fields) if row else None
+    
+    def first_page(table: str, encoder: RowEncoder) -> Callable[[Any], str]:
+        def query(cur) -> str:
+            cur.execute(f"""
+                SELECT {', '.join(encoder.default_fields)}, created_at, id FROM {table} WHERE broker_id = %s
+                ORDER BY created_at DESC, id DESC LIMIT %s
+            """, (broker_id, DASHBOARD_PAGE_LIMIT + 1))
+            rows, next_cursor = paginate(cur.fetchall(), DASHBOARD_PAGE_LIMIT)
+            return f'{{"items": {encoder.encode_rows(rows, encoder.default_fields)}, "nextCursor": {json.dumps(next_cursor)}}}'
+        return query
+    
+    def stage_counts(cur) -> str:
+        cur.execute(
+            "SELECT stage, current_count FROM investor_stage_funnel WHERE broker_id = %s ORDER BY stage", (broker_id,)
+        )
+        return json.dumps(dict(cur.fetchall()))
+    
+    def recent_interactions(cur) -> str:
+        columns = _dashboard_interaction_encoder.default_fields
+        cur.execute(f"""
+            SELECT {', '.join(columns)} FROM interactions WHERE broker_id = %s
+            ORDER BY created_at DESC, id DESC LIMIT %s
+        """, (broker_id, DASHBOARD_INTERACTIONS_LIMIT))
+        return _dashboard_interaction_encoder.encode_rows(cur.fetchall(), columns)
+    
+    results = run_concurrently(conn, {
+        'broker': broker,
+        'properties': first_page('properties', _dashboard_property_encoder),
+        'investors': first_page('investors', _dashboard_investor_encoder),
+        'stageCounts': stage_counts,
+        'recentInteractions': recent_interactions
+    })
+    if results['broker'] is None:
+        return {
+            'statusCode': 404,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': 'Broker not found'}),
+            'isBase64Encoded': False
+        }
+    
+    return {
+        'statusCode': 200,
+        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+        'body': '{' + ', '.join(f'{json.dumps(name)}: {body}' for name, body in results.items()) + '}',
+        'isBase64Encoded': False
+    }
+
+
+def run_concurrently(conn, queries: Dict[str, Callable[[Any], Any]]) -> Dict[str, Any]:
+    names = list(queries)
+    if DASHBOARD_CONCURRENCY < 2:
+        with conn.cursor() as cur:
+            return {name: queries[name](cur) for name in names}
+    
+    if _pool.minconn < DASHBOARD_CONCURRENCY:
+        _pool.minconn = DASHBOARD_CONCURRENCY
+    futures = {name: _query_executor.submit(run_pooled, queries[name]) for name in names[1:]}
+    with conn.cursor() as cur:
+        results = {names[0]: queries[names[0]](cur)}
+    for name, future in futures.items():
+        results[name] = future.result()
+    return results
+
+
+def run_pooled(query: Callable[[Any], Any]) -> Any:
+    conn = get_connection()
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            return query(cur)
     finally:
-        conn.close()
+        release_connection(conn)
+
+
+@_router.route('brokers', 'POST', action='reconcile_stats')
+def reconcile_stats(conn, event: Dict[str, Any], params: Dict[str, str], fields: Tuple[str, ...]) -> Dict[str, Any]:
+    with conn.cursor() as cur:
+        cur.execute("SELECT reconcile_broker_stats()")
+        corrected = cur.fetchone()[0]
+    return {
+        'statusCode': 200,
+        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+        'body': json.dumps({'corrected': corrected}),
+        'isBase64Encoded': False
+    }
+
+
+@_router.route('brokers', 'POST')
+def create_broker(conn, event: Dict[str, Any], params: Dict[str, str], fields: Tuple[str, ...]) -> Dict[str, Any]:
+    columns = ', '.join(fields)
+    
+    body_data = json.loads(event.get('body', '{}'))
+    broker_id = str(uuid.uuid4())
+    referral_code = f"REF-{uuid.uuid4().hex[:8].upper()}"
+    
+    with conn.cursor() as cur:
+        cur.execute(f"""
+            INSERT INTO brokers (id, email, first_name, last_name, phone, avatar, company, referral_code)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+            RETURNING {columns}
+        """, (
+            broker_id,
+            body_data['email'],
+            body_data['firstName'],
+            body_data['lastName'],
+            body_data.get('phone'),
+            body_data.get('avatar'),
+            body_data.get('company'),
+            referral_code
+        ))
+        broker = cur.fetchone()
+    
+    return {
+        'statusCode': 201,
+        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+        'body': _broker_encoder.encode_row(broker, fields),
+        'isBase64Encoded': False
+    }
+
+
+@_router.route('brokers', 'PUT')
+def update_broker(conn, event: Dict[str, Any], params: Dict[str, str], fields: Tuple[str, ...]) -> Dict[str, Any]:
+    columns = ', '.join(fields)
+    
+    body_data = json.loads(event.get('body', '{}'))
+    broker_id = body_data.get('id')
+    
+    if not broker_id:
+        return {
+            'statusCode': 400,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': 'Broker ID required'}),
+            'isBase64Encoded': False
+        }
+    
+    with conn.cursor() as cur:
+        cur.execute(f"""
+            UPDATE brokers 
+            SET first_name = %s, last_name = %s, phone = %s, avatar = %s, company = %s, updated_at = CURRENT_TIMESTAMP
+            WHERE id = %s
+            RETURNING {columns}
+        """, (
+            body_data.get('firstName'),
+            body_data.get('lastName'),
+            body_data.get('phone'),
+            body_data.get('avatar'),
+            body_data.get('company'),
+            broker_id
+        ))
+        broker = cur.fetchone()
+    
+    if not broker:
+        return {
+            'statusCode': 404,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': 'Broker not found'}),
+            'isBase64Encoded': False
+        }
+    
+    return {
+        'statusCode': 200,
+        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+        'body': _broker_encoder.encode_row(broker, fields),
+        'isBase64Encoded': False
+    }
+
+
+def parse_page_params(params: Dict[str, str]) -> Tuple[int, Optional[Tuple[datetime, str]]]:
+    limit = int(params.get('limit', DEFAULT_PAGE_LIMIT))
+    if not 1 <= limit <= MAX_PAGE_LIMIT:
+        raise ValueError('limit out of range')
+    
+    cursor = params.get('cursor')
+    if not cursor:
+        return limit, None
+    try:
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        return limit, (datetime.fromisoformat(created_at), str(row_id))
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+
+
+def keyset_condition(after: Optional[Tuple[datetime, str]]) -> Dict[str, Any]:
+    if not after:
+        return {'query': '', 'params': []}
+    return {'query': 'AND (created_at, id) < (%s, %s)', 'params': list(after)}
+
+
+def paginate(rows: List[Tuple[Any, ...]], limit: int) -> Tuple[List[Tuple[Any, ...]], Optional[str]]:
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    raw = json.dumps([rows[-1][-2].isoformat(), rows[-1][-1]])
+    return rows, base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def cursor_headers(next_cursor: Optional[str]) -> Dict[str, str]:
+    if not next_cursor:
+        return {}
+    return {'X-Next-Cursor': next_cursor, 'Access-Control-Expose-Headers': 'X-Next-Cursor'}
+
+
+def parse_id_list(raw: str) -> List[str]:
+    ids = list(dict.fromkeys(part.strip() for part in raw.split(',') if part.strip()))
+    if not 1 <= len(ids) <= MAX_BATCH_IDS:
+        raise ValueError('ids out of range')
+    return ids
+
+
+def order_by_ids(ids: List[str], rows: List[Tuple[Any, ...]], fields: Tuple[str, ...]) -> str:
+    by_id = {row[-1]: row for row in rows}
+    items = _broker_encoder.encode_rows([by_id[i] for i in ids if i in by_id], fields)
+    missing = json.dumps([i for i in ids if i not in by_id])
+    return f'{{"items": {items}, "missing": {missing}}}'
@@ -1,10 +1,683 @@
+import base64
+import bisect
+import csv
+import functools
+import gzip
+import importlib
+import io
 import json
+import logging
+import math
 import os
+import re
+import sys
+import threading
+import time
 import uuid
-from typing import Dict, Any
+from datetime import datetime, timedelta
+from json.encoder import encode_basestring_ascii
+from typing import Dict, Any, List, Optional, Tuple, Callable
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2 import extensions, pool
 
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DB_POOL_MIN_SIZE = int(os.environ.get('DB_POOL_MIN_SIZE', '1'))
+DB_POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', '5'))
+DB_POOL_HEALTHCHECK_INTERVAL = float(os.environ.get('DB_POOL_HEALTHCHECK_INTERVAL', '30'))
+
+DEFAULT_PAGE_LIMIT = 100
+MAX_PAGE_LIMIT = 500
+MAX_BATCH_IDS = 100
+
+INVESTOR_COLUMNS = [
+    'id', 'broker_id', 'first_name', 'last_name', 'email', 'phone', 'avatar', 'stage', 'stage_entered_at',
+    'profile_budget', 'profile_strategies', 'profile_risk_tolerance',
+    'profile_preferred_property_types', 'profile_preferred_locations',
+    'portfolio_total_invested', 'portfolio_active_investments', 'portfolio_total_return', 'portfolio_properties',
+    'interaction_source', 'interaction_utm_source', 'interaction_utm_medium', 'interaction_utm_campaign',
+    'interaction_utm_content', 'interaction_referral_code', 'interaction_last_contact', 'interaction_notes',
+    'created_at', 'updated_at'
+]
+INVESTOR_SELECT = ', '.join(INVESTOR_COLUMNS)
+INVESTOR_COLUMN_KINDS = {
+    **dict.fromkeys(['profile_budget', 'portfolio_total_invested', 'portfolio_total_return'], 'numeric'),
+    'portfolio_active_investments': 'int',
+    **dict.fromkeys([
+        'profile_strategies', 'profile_preferred_property_types', 'profile_preferred_locations',
+        'portfolio_properties'
+    ], 'json'),
+    **dict.fromkeys(['stage_entered_at', 'interaction_last_contact', 'created_at', 'updated_at'], 'timestamp')
+}
+FUNNEL_STAGES = ['lead', 'consultation', 'analysis', 'offer_sent', 'negotiation', 'deal_preparation', 'active']
+INVESTOR_STAGES = FUNNEL_STAGES + ['inactive']
+
+INTERACTION_COLUMNS = [
+    'id', 'broker_id', 'investor_id', 'property_id', 'type', 'direction', 'subject', 'description',
+    'outcome', 'next_action', 'next_action_date', 'metadata', 'created_at', 'updated_at'
+]
+INTERACTION_COLUMN_KINDS = {
+    'metadata': 'json',
+    **dict.fromkeys(['next_action_date', 'created_at', 'updated_at'], 'timestamp')
+}
+INTERACTION_TYPES = {
+    'call', 'email', 'meeting', 'property_view', 'offer_sent', 'contract_signed', 'payment_received', 'note'
+}
+INTERACTION_DIRECTIONS = {'inbound', 'outbound'}
+INTERACTION_OUTCOMES = {'positive', 'neutral', 'negative'}
+INTERACTION_SCOPES = [('investorId', 'investor_id'), ('propertyId', 'property_id'), ('brokerId', 'broker_id')]
+INTERACTION_BATCH_MAX_ROWS = int(os.environ.get('INTERACTION_BATCH_MAX_ROWS', '500'))
+
+COLUMN_ENCODERS: Dict[str, Callable[[Any], str]] = {
+    'text': encode_basestring_ascii,
+    'int': int.__repr__,
+    'float': float.__repr__,
+    'bool': lambda value: 'true' if value else 'false',
+    'numeric': lambda value: f'"{value}"',
+    'timestamp': lambda value: f'"{value}"',
+    'json': lambda value: json.dumps(value, default=str)
+}
+COLUMN_NULLS: Dict[str, str] = {}
+ENCODER_PLAN_CACHE_SIZE = 64
+
+EXPORT_PAGE_ROWS = int(os.environ.get('EXPORT_PAGE_ROWS', '1000'))
+EXPORT_FETCH_SIZE = 200
+EXPORT_FILENAME_UNSAFE = re.compile(r'[^A-Za-z0-9_-]')
+EXPORT_CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8'
+}
+
+MATCH_SNAPSHOT_MAX_AGE = float(os.environ.get('MATCH_SNAPSHOT_MAX_AGE', '600'))
+MATCH_REFRESH_INTERVAL = float(os.environ.get('MATCH_REFRESH_INTERVAL', '5'))
+MATCH_REFRESH_OVERLAP = timedelta(seconds=60)
+MATCH_BLOCK_CELLS = 4_000_000
+DEFAULT_MATCH_LIMIT = 10
+MAX_MATCH_LIMIT = 50
+MATCH_INVESTOR_PAGE_LIMIT = 100
+MATCH_WEIGHTS = {'budget': 0.35, 'risk': 0.2, 'type': 0.15, 'location': 0.15, 'return': 0.15}
+RISK_CODES = {'low': 0, 'medium': 1, 'high': 2}
+
+SNAPSHOT_SQL = """
+    SELECT id, status, pricing_min_investment, investment_expected_return,
+           investment_risk_level, property_type, location_city, updated_at
+    FROM properties
+"""
+
+MATCH_INVESTOR_SQL = """
+    SELECT id, profile_budget, profile_risk_tolerance,
+           profile_preferred_property_types, profile_preferred_locations, created_at, id
+    FROM investors
+"""
+
+PORTFOLIO_SQL = """
+    SELECT id, pricing_total_price, pricing_min_investment, financing_method, financing_mortgage_rate,
+           financing_down_payment, rental_monthly_income, rental_occupancy_rate, resale_expected_price,
+           investment_term
+    FROM properties WHERE id = ANY(%s)
+"""
+PORTFOLIO_MORTGAGE_TERM_MONTHS = int(os.environ.get('PORTFOLIO_MORTGAGE_TERM_MONTHS', '240'))
+PORTFOLIO_MAX_HOLDINGS = 500
+PORTFOLIO_MAX_TERM_MONTHS = 600
+PORTFOLIO_SHOCKS = ('rateShock', 'occupancyDrop', 'priceChange')
+PORTFOLIO_SCENARIOS = {
+    'base': (0.0, 0.0, 0.0),
+    'rate_shock': (3.0, 0.0, 0.0),
+    'occupancy_drop': (0.0, 20.0, 0.0),
+    'price_drop': (0.0, 0.0, -15.0),
+    'stress': (3.0, 20.0, -15.0)
+}
+MORTGAGE_FINANCING = {'mortgage', 'mixed'}
+
+COMPRESSION_MIN_BYTES = int(os.environ.get('COMPRESSION_MIN_BYTES', '1400'))
+GZIP_LEVEL = int(os.environ.get('GZIP_LEVEL', '5'))
+BROTLI_QUALITY = int(os.environ.get('BROTLI_QUALITY', '5'))
+
+FUNCTION_NAME = 'investors'
+ROUTE_PARAMS = ('resource', 'action')
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', '250'))
+SLOW_QUERY_EXPLAIN_INTERVAL = float(os.environ.get('SLOW_QUERY_EXPLAIN_INTERVAL', '60'))
+QUERY_STATS_LOG_INTERVAL = float(os.environ.get('QUERY_STATS_LOG_INTERVAL', '300'))
+QUERY_STATS_MAX_SHAPES = 200
+QUERY_STATS_LOG_TOP = 20
+QUERY_HISTOGRAM_BOUNDS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+SQL_LITERALS = re.compile(r"'(?:[^']|'')*'|%\(\w+\)s|%s|\b\d+(?:\.\d+)?\b|\bNULL\b(?=::|,|\))")
+SQL_TUPLES = re.compile(r"\(\?(?:::\w+)?(?:, \?(?:::\w+)?)+\)")
+SQL_REPEATED_TUPLES = re.compile(r"\(\?\)(?:, \(\?\))+")
+SQL_WHITESPACE = re.compile(r'\s+')
+
+PREFLIGHT_RESPONSE = {
+    'statusCode': 200,
+    'headers': {
+        'Access-Control-Allow-Origin': '*',
+        'Access-Control-Allow-Methods': 'GET, POST, PUT, OPTIONS',
+        'Access-Control-Allow-Headers': 'Content-Type, X-Broker-Id',
+        'Access-Control-Max-Age': '86400'
+    },
+    'body': '',
+    'isBase64Encoded': False
+}
+NOT_FOUND_RESPONSE = {
+    'statusCode': 404,
+    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+    'body': json.dumps({'error': 'Resource not found'}),
+    'isBase64Encoded': False
+}
+METHOD_NOT_ALLOWED_RESPONSE = {
+    'statusCode': 405,
+    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+    'body': json.dumps({'error': 'Method not allowed'}),
+    'isBase64Encoded': False
+}
+
+
+# >>> shared/blocks/row_encoder.py (copied by shared/sync.py, edit the block and re-run)
+class RowEncoder:
+    def __init__(self, columns: List[Tuple[str, str]]):
+        self.kinds = dict(columns)
+        self.default_fields = tuple(self.kinds)
+        self._plans: Dict[Any, List[Tuple[str, Callable[[Any], str], str]]] = {}
+        self.plan(self.default_fields)
+    
+    def parse_fields(self, raw: Optional[str]) -> Tuple[str, ...]:
+        if not raw:
+            return self.default_fields
+        fields = tuple(dict.fromkeys(field.strip() for field in raw.split(',') if field.strip()))
+        if not fields or any(field not in self.kinds for field in fields):
+            raise ValueError('Unknown field')
+        return fields
+    
+    def plan(
+        self, fields: Tuple[str, ...], extra: Tuple[Tuple[str, str], ...] = ()
+    ) -> List[Tuple[str, Callable[[Any], str], str]]:
+        plan = self._plans.get((fields, extra))
+        if plan is None:
+            columns = [(field, self.kinds[field]) for field in fields] + list(extra)
+            plan = [
+                (
+                    ('{' if position == 0 else ', ') + encode_basestring_ascii(name) + ': ',
+                    COLUMN_ENCODERS[kind], COLUMN_NULLS.get(kind, 'null')
+                )
+                for position, (name, kind) in enumerate(columns)
+            ]
+            if len(self._plans) < ENCODER_PLAN_CACHE_SIZE:
+                self._plans[(fields, extra)] = plan
+        return plan
+    
+    def write(self, out: List[str], row: Tuple[Any, ...], plan: List[Tuple[str, Callable[[Any], str], str]]) -> None:
+        for (prefix, encode, null), value in zip(plan, row):
+            out.append(prefix)
+            out.append(null if value is None else encode(value))
+        out.append('}')
+    
+    def encode_row(self, row: Tuple[Any, ...], fields: Tuple[str, ...], extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+        started = time.perf_counter()
+        out: List[str] = []
+        self.write(out, row, self.plan(fields, extra))
+        record_phase('encode', started)
+        return ''.join(out)
+    
+    def encode_rows(
+        self, rows: List[Tuple[Any, ...]], fields: Tuple[str, ...], extra: Tuple[Tuple[str, str], ...] = ()
+    ) -> str:
+        started = time.perf_counter()
+        plan = self.plan(fields, extra)
+        out = ['[']
+        for position, row in enumerate(rows):
+            if position:
+                out.append(', ')
+            self.write(out, row, plan)
+        out.append(']')
+        record_phase('encode', started)
+        return ''.join(out)
+# <<< shared/blocks/row_encoder.py
+
+
+_investor_encoder = RowEncoder([(column, INVESTOR_COLUMN_KINDS.get(column, 'text')) for column in INVESTOR_COLUMNS])
+_interaction_encoder = RowEncoder([
+    (column, INTERACTION_COLUMN_KINDS.get(column, 'text')) for column in INTERACTION_COLUMNS
+])
+
+
+class PropertySnapshot:
+    def __init__(self):
+        self.built_at = float('-inf')
+    
+    def reset(self) -> None:
+        self.ids: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.features = np.empty((0, 5))
+        self.alive = np.empty(0, dtype=bool)
+        self.types: Dict[str, int] = {}
+        self.cities: Dict[str, int] = {}
+        self.watermark: Optional[datetime] = None
+        self.built_at = time.monotonic()
+        self.checked_at = 0.0
+    
+    def refresh(self, conn) -> None:
+        now = time.monotonic()
+        if now - self.built_at > MATCH_SNAPSHOT_MAX_AGE:
+            self.reset()
+        elif now - self.checked_at < MATCH_REFRESH_INTERVAL:
+            return
+        self.checked_at = now
+        
+        with conn.cursor() as cur:
+            if self.watermark is None:
+                cur.execute(SNAPSHOT_SQL + " WHERE status = 'active'")
+            else:
+                cur.execute(SNAPSHOT_SQL + " WHERE updated_at > %s", (self.watermark - MATCH_REFRESH_OVERLAP,))
+            self.apply(cur.fetchall())
+    
+    def apply(self, rows: List[Tuple[Any, ...]]) -> None:
+        appended_ids: List[str] = []
+        appended: List[Tuple[float, ...]] = []
+        for row_id, status, min_investment, expected_return, risk_level, property_type, city, updated_at in rows:
+            if updated_at and (self.watermark is None or updated_at > self.watermark):
+                self.watermark = updated_at
+            
+            features = (
+                float(min_investment or 0),
+                float(expected_return or 0),
+                RISK_CODES.get(risk_level, 1),
+                vocabulary_code(self.types, property_type),
+                vocabulary_code(self.cities, city)
+            )
+            i = self.index.get(row_id)
+            if i is not None:
+                self.features[i] = features
+                self.alive[i] = status == 'active'
+            elif status == 'active':
+                self.index[row_id] = len(self.ids) + len(appended_ids)
+                appended_ids.append(row_id)
+                appended.append(features)
+        
+        if appended:
+            self.ids.extend(appended_ids)
+            self.features = np.vstack([self.features, np.array(appended)])
+            self.alive = np.concatenate([self.alive, np.ones(len(appended), dtype=bool)])
+
+
+_snapshot = PropertySnapshot()
+
+
+# >>> shared/blocks/router.py (copied by shared/sync.py, edit the block and re-run)
+class Router:
+    def __init__(self, resource_param: str, default_resource: str):
+        self.resource_param = resource_param
+        self.default_resource = default_resource
+        self.routes: Dict[Tuple[str, str, Optional[str]], Callable[..., Dict[str, Any]]] = {}
+        self.resources: set = set()
+    
+    def route(self, resource: str, *methods: str, action: Optional[str] = None) -> Callable:
+        def register(handle: Callable[..., Dict[str, Any]]) -> Callable[..., Dict[str, Any]]:
+            for method in methods:
+                self.routes[(method, resource, action)] = handle
+            self.resources.add(resource)
+            return handle
+        return register
+    
+    def resolve(
+        self, method: str, params: Dict[str, str]
+    ) -> Tuple[Optional[Callable[..., Dict[str, Any]]], Optional[Dict[str, Any]]]:
+        if method == 'OPTIONS':
+            return None, PREFLIGHT_RESPONSE
+        resource = params.get(self.resource_param, self.default_resource)
+        handle = self.routes.get((method, resource, params.get('action'))) or self.routes.get((method, resource, None))
+        if handle:
+            return handle, None
+        if resource in self.resources:
+            return None, METHOD_NOT_ALLOWED_RESPONSE
+        return None, NOT_FOUND_RESPONSE
+# <<< shared/blocks/router.py
+
+
+# >>> shared/blocks/lazy_module.py (copied by shared/sync.py, edit the block and re-run)
+class LazyModule:
+    def __init__(self, name: str):
+        self.name = name
+        self.module = None
+    
+    def __getattr__(self, attr: str) -> Any:
+        if self.module is None:
+            started = time.perf_counter()
+            self.module = importlib.import_module(self.name)
+            record_phase('import', started)
+        return getattr(self.module, attr)
+# <<< shared/blocks/lazy_module.py
+
+
+# >>> shared/blocks/timing.py (copied by shared/sync.py, edit the block and re-run)
+class RequestTiming:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self.queries = 0
+        self._lock = threading.Lock()
+    
+    def add(self, phase: str, ms: float, query: bool = False) -> None:
+        with self._lock:
+            self.phases[phase] = self.phases.get(phase, 0.0) + ms
+            self.queries += query
+    
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+    
+    def header(self) -> str:
+        phases = [f'{name};dur={ms:.1f}' for name, ms in self.phases.items()]
+        return ', '.join(phases + [f'total;dur={self.elapsed_ms():.1f}'])
+
+
+class QueryStats:
+    def __init__(self, max_shapes: int):
+        self.max_shapes = max_shapes
+        self._shapes: Dict[str, List[float]] = {}
+        self._explained_at: Dict[str, float] = {}
+        self._logged_at = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def record(self, shape: str, ms: float) -> None:
+        with self._lock:
+            stats = self._shapes.get(shape)
+            if stats is None:
+                if len(self._shapes) >= self.max_shapes:
+                    shape = 'other'
+                stats = self._shapes.setdefault(shape, [0, 0.0, 0.0] + [0] * (len(QUERY_HISTOGRAM_BOUNDS_MS) + 1))
+            stats[0] += 1
+            stats[1] += ms
+            stats[2] = max(stats[2], ms)
+            stats[3 + bisect.bisect_left(QUERY_HISTOGRAM_BOUNDS_MS, ms)] += 1
+    
+    def should_explain(self, shape: str) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            if now - self._explained_at.get(shape, -SLOW_QUERY_EXPLAIN_INTERVAL) < SLOW_QUERY_EXPLAIN_INTERVAL:
+                return False
+            self._explained_at[shape] = now
+            return True
+    
+    def summary(self, limit: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            ranked = sorted(self._shapes.items(), key=lambda item: -item[1][1])[:limit]
+        return [{
+            'sql': shape,
+            'count': stats[0],
+            'total_ms': round(stats[1], 1),
+            'max_ms': round(stats[2], 1),
+            'p50_ms': histogram_quantile(stats, 0.5),
+            'p95_ms': histogram_quantile(stats, 0.95),
+            'p99_ms': histogram_quantile(stats, 0.99)
+        } for shape, stats in ranked]
+    
+    def maybe_log(self) -> None:
+        if time.monotonic() - self._logged_at < QUERY_STATS_LOG_INTERVAL:
+            return
+        self._logged_at = time.monotonic()
+        log_event('query_stats', shapes=self.summary(QUERY_STATS_LOG_TOP))
+
+
+class TimingCursor(extensions.cursor):
+    def execute(self, query, vars=None):
+        started = time.perf_counter()
+        result = super().execute(query, vars)
+        ms = (time.perf_counter() - started) * 1000
+        shape = normalize_sql(query)
+        _query_stats.record(shape, ms)
+        if _timing:
+            _timing.add('db', ms, query=True)
+        if ms >= SLOW_QUERY_MS and _query_stats.should_explain(shape):
+            log_event(
+                'slow_query', logging.WARNING,
+                sql=shape, duration_ms=round(ms, 1), plan=explain(self.connection, query, vars)
+            )
+        return result
+    
+    def fetchone(self):
+        started = time.perf_counter()
+        try:
+            return super().fetchone()
+        finally:
+            record_phase('fetch', started)
+    
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        try:
+            return super().fetchmany(size) if size is not None else super().fetchmany()
+        finally:
+            record_phase('fetch', started)
+    
+    def fetchall(self):
+        started = time.perf_counter()
+        try:
+            return super().fetchall()
+        finally:
+            record_phase('fetch', started)
+    
+    def __iter__(self):
+        while True:
+            rows = self.fetchmany(self.itersize)
+            if not rows:
+                return
+            yield from rows
+
+
+class JsonLogFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps({
+            'event': record.getMessage(),
+            'function': FUNCTION_NAME,
+            'level': record.levelname,
+            **getattr(record, 'fields', {})
+        }, default=str, ensure_ascii=False)
+
+
+def json_logger(name: str) -> logging.Logger:
+    logger = logging.getLogger(name)
+    if not logger.handlers:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(JsonLogFormatter())
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
+
+
+_logger = json_logger(FUNCTION_NAME)
+_timing: Optional[RequestTiming] = None
+_query_stats = QueryStats(QUERY_STATS_MAX_SHAPES)
+_cold_start = True
+
+
+@functools.lru_cache(maxsize=512)
+def normalize_sql(query: Any) -> str:
+    text = query.decode('utf-8', 'replace') if isinstance(query, bytes) else str(query)
+    text = SQL_LITERALS.sub('?', SQL_WHITESPACE.sub(' ', text).strip())
+    return SQL_REPEATED_TUPLES.sub('(?), ...', SQL_TUPLES.sub('(?)', text))
+
+
+def histogram_quantile(stats: List[float], q: float) -> Optional[float]:
+    target = stats[0] * q
+    seen = 0
+    for position, count in enumerate(stats[3:]):
+        seen += count
+        if count and seen >= target:
+            return QUERY_HISTOGRAM_BOUNDS_MS[position] if position < len(QUERY_HISTOGRAM_BOUNDS_MS) else round(stats[2], 1)
+    return None
+
+
+def explain(conn, query: Any, vars: Any) -> Optional[str]:
+    prefix = b'EXPLAIN ' if isinstance(query, bytes) else 'EXPLAIN '
+    in_transaction = conn.get_transaction_status() == extensions.TRANSACTION_STATUS_INTRANS
+    try:
+        with conn.cursor(cursor_factory=extensions.cursor) as cur:
+            if in_transaction:
+                cur.execute('SAVEPOINT slow_query_explain')
+            try:
+                cur.execute(prefix + query, vars)
+                return '\n'.join(row[0] for row in cur.fetchall())
+            finally:
+                if in_transaction:
+                    cur.execute('ROLLBACK TO SAVEPOINT slow_query_explain')
+    except psycopg2.Error as error:
+        return f'EXPLAIN failed: {error}'.strip()
+
+
+def record_phase(phase: str, started: float) -> None:
+    if _timing:
+        _timing.add(phase, (time.perf_counter() - started) * 1000)
+
+
+def log_event(event: str, level: int = logging.INFO, **fields: Any) -> None:
+    _logger.log(level, event, extra={'fields': fields})
+
+
+def instrumented(handle: Callable[[Dict[str, Any], Any], Dict[str, Any]]) -> Callable[[Dict[str, Any], Any], Dict[str, Any]]:
+    @functools.wraps(handle)
+    def wrapper(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+        global _timing, _cold_start
+        timing = _timing = RequestTiming()
+        cold_start, _cold_start = _cold_start, False
+        status = 500
+        try:
+            response = handle(event, context)
+            status = response['statusCode']
+            headers = {**(response.get('headers') or {}), 'Server-Timing': timing.header(), 'Timing-Allow-Origin': '*'}
+            return {**response, 'headers': headers}
+        finally:
+            _timing = None
+            params = event.get('queryStringParameters') or {}
+            log_event(
+                'request',
+                method=event.get('httpMethod', 'GET'),
+                route={key: params[key] for key in ROUTE_PARAMS if key in params},
+                params=sorted(params),
+                status=status,
+                duration_ms=round(timing.elapsed_ms(), 2),
+                phases={name: round(ms, 2) for name, ms in timing.phases.items()},
+                queries=timing.queries,
+                cold_start=cold_start
+            )
+            _query_stats.maybe_log()
+    return wrapper
+# <<< shared/blocks/timing.py
+
+
+# >>> shared/blocks/compression.py (copied by shared/sync.py, edit the block and re-run)
+def compressed(handle: Callable[[Dict[str, Any], Any], Dict[str, Any]]) -> Callable[[Dict[str, Any], Any], Dict[str, Any]]:
+    @functools.wraps(handle)
+    def wrapper(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+        response = handle(event, context)
+        body = response.get('body')
+        if response.get('isBase64Encoded') or not body or len(body) < COMPRESSION_MIN_BYTES:
+            return response
+        
+        headers = {**response['headers'], 'Vary': 'Accept-Encoding'}
+        request_headers = {k.lower(): v for k, v in (event.get('headers') or {}).items()}
+        encoding = negotiate_encoding(request_headers.get('accept-encoding', ''))
+        if not encoding:
+            return {**response, 'headers': headers}
+        
+        started = time.perf_counter()
+        raw = body.encode()
+        if encoding == 'br':
+            data = brotli.compress(raw, quality=BROTLI_QUALITY)
+        else:
+            data = gzip.compress(raw, GZIP_LEVEL, mtime=0)
+        record_phase('compress', started)
+        
+        headers['Content-Encoding'] = encoding
+        if 'ETag' in headers:
+            headers['ETag'] = 'W/' + headers['ETag'].removeprefix('W/')
+        return {**response, 'headers': headers, 'body': base64.b64encode(data).decode(), 'isBase64Encoded': True}
+    return wrapper
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.lower().split(','):
+        name, _, parameters = part.partition(';')
+        weight = 1.0
+        for parameter in parameters.split(';'):
+            key, _, value = parameter.strip().partition('=')
+            if key == 'q':
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        if name.strip():
+            weights[name.strip()] = weight
+    
+    best, best_weight = None, 0.0
+    for encoding in (('br', 'gzip') if brotli else ('gzip',)):
+        weight = weights.get(encoding, weights.get('*', 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+# <<< shared/blocks/compression.py
+
+
+# >>> shared/blocks/pool.py (copied by shared/sync.py, edit the block and re-run)
+_pool: Optional[pool.ThreadedConnectionPool] = None
+_last_used: Dict[int, float] = {}
+
+
+def get_connection():
+    global _pool
+    started = time.perf_counter()
+    try:
+        if _pool is None or _pool.closed:
+            _pool = pool.ThreadedConnectionPool(
+                DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, os.environ.get('DATABASE_URL'), cursor_factory=TimingCursor
+            )
+        for _ in range(DB_POOL_MAX_SIZE):
+            conn = _pool.getconn()
+            if connection_is_healthy(conn):
+                return conn
+            discard_connection(conn)
+        return _pool.getconn()
+    finally:
+        record_phase('connect', started)
+
+
+def release_connection(conn) -> None:
+    if conn.closed:
+        discard_connection(conn)
+        return
+    _last_used[id(conn)] = time.monotonic()
+    _pool.putconn(conn)
+
+
+def discard_connection(conn) -> None:
+    _last_used.pop(id(conn), None)
+    _pool.putconn(conn, close=True)
+
+
+def connection_is_healthy(conn) -> bool:
+    if conn.closed or conn.info.transaction_status == extensions.TRANSACTION_STATUS_UNKNOWN:
+        return False
+    last_used = _last_used.get(id(conn))
+    if last_used is None or time.monotonic() - last_used < DB_POOL_HEALTHCHECK_INTERVAL:
+        return True
+    try:
+        with conn.cursor() as cur:
+            cur.execute('SELECT 1')
+        conn.rollback()
+    except psycopg2.Error:
+        return False
+    return True
+# <<< shared/blocks/pool.py
+
+
+_router = Router('resource', 'investors')
+np = LazyModule('numpy')
+extras = LazyModule('psycopg2.extras')
+
+
+@instrumented
+@compressed
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     '''
     Business: API для управления инвесторами и воронкой продаж
@@ -12,154 +685,856 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     Returns: HTTP response с данными инвесторов
     '''
     method: str = event.get('httpMethod', 'GET')
+    params = event.get('queryStringParameters') or {}
+    handle, response = _router.resolve(method, params)
+    if response:
+        return response
     
-    if method == 'OPTIONS':
+    resource = params.get('resource', 'investors')
+    encoder = _interaction_encoder if resource == 'interactions' else _investor_encoder
+    try:
+        fields = encoder.parse_fields(params.get('fields'))
+    except ValueError:
         return {
-            'statusCode': 200,
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, PUT, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type, X-Broker-Id',
-                'Access-Control-Max-Age': '86400'
-            },
-            'body': '',
+            'statusCode': 400,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': f'fields must be a comma-separated list of {resource} columns'}),
             'isBase64Encoded': False
         }
     
-    dsn = os.environ.get('DATABASE_URL')
-    conn = psycopg2.connect(dsn)
+    conn = get_connection()
     conn.autocommit = True
     
     try:
-        if method == 'GET':
-            investor_id = event.get('queryStringParameters', {}).get('id')
-            broker_id = event.get('queryStringParameters', {}).get('brokerId')
-            
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                if investor_id:
-                    cur.execute("SELECT * FROM investors WHERE id = %s", (investor_id,))
-                    investor = cur.fetchone()
-                    if not investor:
-                        return {
-                            'statusCode': 404,
-                            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                            'body': json.dumps({'error': 'Investor not found'}),
-                            'isBase64Encoded': False
-                        }
-                    return {
-                        'statusCode': 200,
-                        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                        'body': json.dumps(dict(investor), default=str),
-                        'isBase64Encoded': False
-                    }
-                elif broker_id:
-                    cur.execute("SELECT * FROM investors WHERE broker_id = %s ORDER BY created_at DESC", (broker_id,))
-                    investors = cur.fetchall()
-                    return {
-                        'statusCode': 200,
-                        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                        'body': json.dumps([dict(i) for i in investors], default=str),
-                        'isBase64Encoded': False
-                    }
-                else:
-                    return {
-                        'statusCode': 400,
-                        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                        'body': json.dumps({'error': 'Broker ID required'}),
-                        'isBase64Encoded': False
-                    }
-        
-        elif method == 'POST':
-            body_data = json.loads(event.get('body', '{}'))
-            investor_id = str(uuid.uuid4())
-            
-            with conn.cursor() as cur:
-                cur.execute("""
-                    INSERT INTO investors (
-                        id, broker_id, first_name, last_name, email, phone,
-                        stage, profile_budget, profile_strategies, profile_risk_tolerance,
-                        profile_preferred_property_types, profile_preferred_locations,
-                        interaction_source, interaction_notes, timeline
-                    ) VALUES (
-                        %s, %s, %s, %s, %s, %s,
-                        %s, %s, %s, %s,
-                        %s, %s,
-                        %s, %s, %s
-                    )
-                """, (
-                    investor_id,
-                    body_data['brokerId'],
-                    body_data['personalInfo']['firstName'],
-                    body_data['personalInfo']['lastName'],
-                    body_data['personalInfo']['email'],
-                    body_data['personalInfo']['phone'],
-                    body_data.get('stage', 'lead'),
-                    body_data['investmentProfile']['budget'],
-                    json.dumps(body_data['investmentProfile']['strategies']),
-                    body_data['investmentProfile']['riskTolerance'],
-                    json.dumps(body_data['investmentProfile']['preferredPropertyTypes']),
-                    json.dumps(body_data['investmentProfile']['preferredLocations']),
-                    body_data['interaction']['source'],
-                    body_data['interaction'].get('notes', ''),
-                    json.dumps([{
-                        'date': str(body_data.get('metadata', {}).get('createdAt', '')),
-                        'action': 'Создан лид',
-                        'details': f"Источник: {body_data['interaction']['source']}"
-                    }])
-                ))
-            
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                cur.execute("SELECT * FROM investors WHERE id = %s", (investor_id,))
-                investor = cur.fetchone()
+        return handle(conn, event, params, fields)
+    
+    finally:
+        release_connection(conn)
+
+
+@_router.route('investors', 'GET')
+def get_investors(conn, event: Dict[str, Any], params: Dict[str, str], fields: Tuple[str, ...]) -> Dict[str, Any]:
+    columns = ', '.join(fields)
+    
+    investor_id = params.get('id')
+    broker_id = params.get('brokerId')
+    
+    with conn.cursor() as cur:
+        if params.get('ids'):
+            try:
+                ids = parse_id_list(params['ids'])
+            except ValueError:
+                return {
+                    'statusCode': 400,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'body': json.dumps({'error': f'ids must contain 1-{MAX_BATCH_IDS} comma-separated values'}),
+                    'isBase64Encoded': False
+                }
             
+            cur.execute(f"SELECT {columns}, id FROM investors WHERE id = ANY(%s)", (ids,))
             return {
-                'statusCode': 201,
+                'statusCode': 200,
                 'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                'body': json.dumps(dict(investor), default=str),
+                'body': order_by_ids(ids, cur.fetchall(), fields),
                 'isBase64Encoded': False
             }
-        
-        elif method == 'PUT':
-            body_data = json.loads(event.get('body', '{}'))
-            investor_id = body_data.get('id')
+        elif investor_id:
+            cur.execute(f"SELECT {columns} FROM investors WHERE id = %s", (investor_id,))
+            investor = cur.fetchone()
+            if not investor:
+                return {
+                    'statusCode': 404,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'body': json.dumps({'error': 'Investor not found'}),
+                    'isBase64Encoded': False
+                }
+            return {
+                'statusCode': 200,
+                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                'body': _investor_encoder.encode_row(investor, fields),
+                'isBase64Encoded': False
+            }
+        elif broker_id:
+            if params.get('export'):
+                return export_rows(conn, 'investors', INVESTOR_SELECT, _investor_encoder, broker_id, params)
             
-            if not investor_id:
+            try:
+                limit, after = parse_page_params(params)
+            except ValueError:
                 return {
                     'statusCode': 400,
                     'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                    'body': json.dumps({'error': 'Investor ID required'}),
+                    'body': json.dumps({'error': 'Invalid pagination parameters'}),
                     'isBase64Encoded': False
                 }
             
-            with conn.cursor() as cur:
-                cur.execute("""
-                    UPDATE investors 
-                    SET stage = %s, interaction_notes = %s, interaction_last_contact = CURRENT_TIMESTAMP,
-                        updated_at = CURRENT_TIMESTAMP
-                    WHERE id = %s
-                """, (
-                    body_data.get('stage'),
-                    body_data.get('interaction', {}).get('notes', ''),
-                    investor_id
-                ))
-            
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                cur.execute("SELECT * FROM investors WHERE id = %s", (investor_id,))
-                investor = cur.fetchone()
-            
+            keyset = keyset_condition(after)
+            cur.execute(f"""
+                SELECT {columns}, created_at, id FROM investors WHERE broker_id = %s {keyset['query']}
+                ORDER BY created_at DESC, id DESC LIMIT %s
+            """, [broker_id] + keyset['params'] + [limit + 1])
+            investors, next_cursor = paginate(cur.fetchall(), limit)
             return {
                 'statusCode': 200,
+                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*', **cursor_headers(next_cursor)},
+                'body': _investor_encoder.encode_rows(investors, fields),
+                'isBase64Encoded': False
+            }
+        else:
+            return {
+                'statusCode': 400,
                 'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                'body': json.dumps(dict(investor), default=str),
+                'body': json.dumps({'error': 'Broker ID required'}),
                 'isBase64Encoded': False
             }
+
+
+@_router.route('investors', 'POST')
+def create_investor(conn, event: Dict[str, Any], params: Dict[str, str], fields: Tuple[str, ...]) -> Dict[str, Any]:
+    columns = ', '.join(fields)
+    
+    body_data = json.loads(event.get('body', '{}'))
+    investor_id = str(uuid.uuid4())
+    
+    with conn.cursor() as cur:
+        cur.execute(f"""
+            WITH created AS (
+                INSERT INTO investors (
+                    id, broker_id, first_name, last_name, email, phone,
+                    stage, profile_budget, profile_strategies, profile_risk_tolerance,
+                    profile_preferred_property_types, profile_preferred_locations,
+                    interaction_source, interaction_notes
+                ) VALUES (
+                    %s, %s, %s, %s, %s, %s,
+                    %s, %s, %s, %s,
+                    %s, %s,
+                    %s, %s
+                )
+                RETURNING *
+            ),
+            lead AS (
+                INSERT INTO interactions (id, broker_id, investor_id, type, subject, description, metadata)
+                SELECT %s, broker_id, id, 'note', 'Создан лид', %s, %s FROM created
+            )
+            SELECT {columns} FROM created
+        """, (
+            investor_id,
+            body_data['brokerId'],
+            body_data['personalInfo']['firstName'],
+            body_data['personalInfo']['lastName'],
+            body_data['personalInfo']['email'],
+            body_data['personalInfo']['phone'],
+            body_data.get('stage', 'lead'),
+            body_data['investmentProfile']['budget'],
+            json.dumps(body_data['investmentProfile']['strategies']),
+            body_data['investmentProfile']['riskTolerance'],
+            json.dumps(body_data['investmentProfile']['preferredPropertyTypes']),
+            json.dumps(body_data['investmentProfile']['preferredLocations']),
+            body_data['interaction']['source'],
+            body_data['interaction'].get('notes', ''),
+            str(uuid.uuid4()),
+            f"Источник: {body_data['interaction']['source']}",
+            json.dumps({'createdAt': str(body_data.get('metadata', {}).get('createdAt', ''))})
+        ))
+        investor = cur.fetchone()
+    
+    return {
+        'statusCode': 201,
+        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+        'body': _investor_encoder.encode_row(investor, fields),
+        'isBase64Encoded': False
+    }
+
+
+@_router.route('investors', 'PUT')
+def update_investor(conn, event: Dict[str, Any], params: Dict[str, str], fields: Tuple[str, ...]) -> Dict[str, Any]:
+    columns = ', '.join(fields)
+    
+    body_data = json.loads(event.get('body', '{}'))
+    investor_id = body_data.get('id')
+    
+    if not investor_id:
+        return {
+            'statusCode': 400,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': 'Investor ID required'}),
+            'isBase64Encoded': False
+        }
+    
+    with conn.cursor() as cur:
+        cur.execute(f"""
+            UPDATE investors 
+            SET stage = %s,
+                stage_entered_at = CASE WHEN stage = %s THEN stage_entered_at ELSE CURRENT_TIMESTAMP END,
+                interaction_notes = %s, interaction_last_contact = CURRENT_TIMESTAMP,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE id = %s
+            RETURNING {columns}
+        """, (
+            body_data.get('stage'),
+            body_data.get('stage'),
+            body_data.get('interaction', {}).get('notes', ''),
+            investor_id
+        ))
+        investor = cur.fetchone()
+    
+    if not investor:
+        return {
+            'statusCode': 404,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': 'Investor not found'}),
+            'isBase64Encoded': False
+        }
+    
+    return {
+        'statusCode': 200,
+        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+        'body': _investor_encoder.encode_row(investor, fields),
+        'isBase64Encoded': False
+    }
+
+
+@_router.route('interactions', 'GET')
+def list_interactions(conn, event: Dict[str, Any], params: Dict[str, str], fields: Tuple[str, ...]) -> Dict[str, Any]:
+    scope = next(((column, params[key]) for key, column in INTERACTION_SCOPES if params.get(key)), None)
+    if not scope:
+        return {
+            'statusCode': 400,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': 'investorId, propertyId or brokerId required'}),
+            'isBase64Encoded': False
+        }
+    try:
+        limit, after = parse_page_params(params)
+    except ValueError:
+        return {
+            'statusCode': 400,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': 'Invalid pagination parameters'}),
+            'isBase64Encoded': False
+        }
+    
+    column, value = scope
+    keyset = keyset_condition(after)
+    type_filter = 'AND type = %s' if params.get('type') else ''
+    with conn.cursor() as cur:
+        cur.execute(f"""
+            SELECT {', '.join(fields)}, created_at, id FROM interactions
+            WHERE {column} = %s {type_filter} {keyset['query']}
+            ORDER BY created_at DESC, id DESC LIMIT %s
+        """, [value] + ([params['type']] if type_filter else []) + keyset['params'] + [limit + 1])
+        interactions, next_cursor = paginate(cur.fetchall(), limit)
+    
+    return {
+        'statusCode': 200,
+        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*', **cursor_headers(next_cursor)},
+        'body': _interaction_encoder.encode_rows(interactions, fields),
+        'isBase64Encoded': False
+    }
+
+
+@_router.route('interactions', 'POST')
+def create_interactions(conn, event: Dict[str, Any], params: Dict[str, str], fields: Tuple[str, ...]) -> Dict[str, Any]:
+    try:
+        body_data = json.loads(event.get('body') or '[]')
+    except ValueError:
+        body_data = None
+    rows = body_data if isinstance(body_data, list) else [body_data]
+    if not 1 <= len(rows) <= INTERACTION_BATCH_MAX_ROWS:
+        return {
+            'statusCode': 413 if rows else 400,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': f'Send 1-{INTERACTION_BATCH_MAX_ROWS} interactions per request'}),
+            'isBase64Encoded': False
+        }
+    
+    candidates: List[Tuple[int, Dict[str, Any]]] = []
+    errors = []
+    for index, row in enumerate(rows):
+        error = validate_interaction(row)
+        if error:
+            errors.append({'index': index, 'error': error})
+            continue
+        candidates.append((index, row))
+    
+    investor_brokers: Dict[str, str] = {}
+    if candidates:
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT id, broker_id FROM investors WHERE id = ANY(%s)",
+                (list({row['investorId'] for _, row in candidates}),)
+            )
+            investor_brokers = dict(cur.fetchall())
+    
+    values = []
+    for index, row in candidates:
+        if row['investorId'] not in investor_brokers:
+            errors.append({'index': index, 'error': f"Unknown investorId: {row['investorId']}"})
+            continue
+        if row.get('brokerId') is not None and row['brokerId'] != investor_brokers[row['investorId']]:
+            errors.append({'index': index, 'error': f"brokerId {row['brokerId']} does not own investor {row['investorId']}"})
+            continue
+        values.append((
+            str(uuid.uuid4()), index, row.get('brokerId'), row['investorId'], row.get('propertyId'),
+            row['type'], row.get('direction'), row.get('subject'), row['description'],
+            row.get('outcome'), row.get('nextAction'), row.get('nextActionDate'),
+            json.dumps(row['metadata']) if row.get('metadata') is not None else None,
+            row.get('createdAt')
+        ))
+    
+    inserted: List[Tuple[Any, ...]] = []
+    if values:
+        with conn.cursor() as cur:
+            inserted = extras.execute_values(cur, f"""
+                INSERT INTO interactions (
+                    id, broker_id, investor_id, property_id, type, direction, subject, description,
+                    outcome, next_action, next_action_date, metadata, created_at
+                )
+                SELECT v.id, i.broker_id, v.investor_id, v.property_id, v.type,
+                       v.direction, v.subject, v.description, v.outcome, v.next_action, v.next_action_date,
+                       v.metadata, COALESCE(v.created_at, CURRENT_TIMESTAMP)
+                FROM (VALUES %s) AS v (
+                    id, position, broker_id, investor_id, property_id, type, direction, subject, description,
+                    outcome, next_action, next_action_date, metadata, created_at
+                )
+                JOIN investors i ON i.id = v.investor_id
+                LEFT JOIN properties p ON p.id = v.property_id
+                WHERE (v.property_id IS NULL OR p.id IS NOT NULL)
+                  AND (v.broker_id IS NULL OR v.broker_id = i.broker_id)
+                RETURNING {', '.join(fields)}, id
+            """, values, template=(
+                '(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s::timestamp, %s::jsonb, %s::timestamp)'
+            ), page_size=len(values), fetch=True)
+    
+    positions = {value[0]: value[1] for value in values}
+    inserted.sort(key=lambda row: positions[row[-1]])
+    inserted_ids = {row[-1] for row in inserted}
+    errors.extend(
+        {'index': value[1], 'error': 'Investor or property not found'}
+        for value in values if value[0] not in inserted_ids
+    )
+    items = _interaction_encoder.encode_rows(inserted, fields)
+    errors_json = json.dumps(sorted(errors, key=lambda error: error['index']))
+    return {
+        'statusCode': 201 if inserted else 400,
+        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+        'body': f'{{"items": {items}, "errors": {errors_json}}}',
+        'isBase64Encoded': False
+    }
+
+
+def validate_interaction(row: Any) -> Optional[str]:
+    if not isinstance(row, dict):
+        return 'Row must be a JSON object'
+    for key in ('investorId', 'type', 'description'):
+        if not row.get(key):
+            return f'Missing field: {key}'
+    if row['type'] not in INTERACTION_TYPES:
+        return f"Unknown type: {row['type']}"
+    if row.get('direction') is not None and row['direction'] not in INTERACTION_DIRECTIONS:
+        return f"Unknown direction: {row['direction']}"
+    if row.get('outcome') is not None and row['outcome'] not in INTERACTION_OUTCOMES:
+        return f"Unknown outcome: {row['outcome']}"
+    for key in ('nextActionDate', 'createdAt'):
+        if row.get(key) is not None:
+            try:
+                datetime.fromisoformat(str(row[key]).replace('Z', '+00:00'))
+            except ValueError:
+                return f'Field {key} must be an ISO 8601 timestamp'
+    return None
+
+
+def parse_page_params(
+    params: Dict[str, str], default_limit: int = DEFAULT_PAGE_LIMIT, max_limit: int = MAX_PAGE_LIMIT
+) -> Tuple[int, Optional[Tuple[datetime, str]]]:
+    limit = int(params.get('limit', default_limit))
+    if not 1 <= limit <= max_limit:
+        raise ValueError('limit out of range')
+    
+    return limit, decode_page_cursor(params.get('cursor'))
+
+
+def decode_page_cursor(cursor: Optional[str]) -> Optional[Tuple[datetime, str]]:
+    if not cursor:
+        return None
+    try:
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        return datetime.fromisoformat(created_at), str(row_id)
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+
+
+def keyset_condition(after: Optional[Tuple[datetime, str]]) -> Dict[str, Any]:
+    if not after:
+        return {'query': '', 'params': []}
+    return {'query': 'AND (created_at, id) < (%s, %s)', 'params': list(after)}
+
+
+def paginate(rows: List[Tuple[Any, ...]], limit: int) -> Tuple[List[Tuple[Any, ...]], Optional[str]]:
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_page_cursor(rows[-1][-2], rows[-1][-1])
+
+
+def encode_page_cursor(created_at: datetime, row_id: str) -> str:
+    raw = json.dumps([created_at.isoformat(), row_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def cursor_headers(next_cursor: Optional[str]) -> Dict[str, str]:
+    if not next_cursor:
+        return {}
+    return {'X-Next-Cursor': next_cursor, 'Access-Control-Expose-Headers': 'X-Next-Cursor'}
+
+
+def parse_id_list(raw: str) -> List[str]:
+    ids = list(dict.fromkeys(part.strip() for part in raw.split(',') if part.strip()))
+    if not 1 <= len(ids) <= MAX_BATCH_IDS:
+        raise ValueError('ids out of range')
+    return ids
+
+
+def order_by_ids(ids: List[str], rows: List[Tuple[Any, ...]], fields: Tuple[str, ...]) -> str:
+    by_id = {row[-1]: row for row in rows}
+    items = _investor_encoder.encode_rows([by_id[i] for i in ids if i in by_id], fields)
+    missing = json.dumps([i for i in ids if i not in by_id])
+    return f'{{"items": {items}, "missing": {missing}}}'
+
+
+# >>> shared/blocks/export.py (copied by shared/sync.py, edit the block and re-run)
+def export_rows(
+    conn, table: str, select: str, encoder: RowEncoder, broker_id: str, params: Dict[str, str]
+) -> Dict[str, Any]:
+    export_format = params.get('export')
+    if export_format not in EXPORT_CONTENT_TYPES:
+        return {
+            'statusCode': 400,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': 'export must be ndjson or csv'}),
+            'isBase64Encoded': False
+        }
+    try:
+        limit, after = parse_page_params(params, EXPORT_PAGE_ROWS, EXPORT_PAGE_ROWS)
+    except ValueError:
+        return {
+            'statusCode': 400,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': 'Invalid pagination parameters'}),
+            'isBase64Encoded': False
+        }
+    
+    keyset = keyset_condition(after)
+    output = io.StringIO()
+    writer = csv.writer(output) if export_format == 'csv' else None
+    columns: List[str] = []
+    last_key = None
+    next_cursor = None
+    
+    conn.autocommit = False
+    with conn, conn.cursor(name=f'export_{table}') as cur:
+        cur.itersize = EXPORT_FETCH_SIZE
+        cur.execute(f"""
+            SELECT {select} FROM {table} WHERE broker_id = %s {keyset['query']}
+            ORDER BY created_at DESC, id DESC LIMIT %s
+        """, [broker_id] + keyset['params'] + [limit + 1])
         
+        for count, row in enumerate(cur):
+            if not columns:
+                columns = [column[0] for column in cur.description]
+                created_at_index, id_index = columns.index('created_at'), columns.index('id')
+                if writer and not after:
+                    writer.writerow(columns)
+            if count == limit:
+                next_cursor = encode_page_cursor(*last_key)
+                break
+            
+            if writer:
+                writer.writerow([
+                    '' if value is None else json.dumps(value) if isinstance(value, (dict, list)) else value
+                    for value in row
+                ])
+            else:
+                output.write(encoder.encode_row(row, encoder.default_fields))
+                output.write('\n')
+            last_key = (row[created_at_index], row[id_index])
+    
+    filename = EXPORT_FILENAME_UNSAFE.sub('_', f'{table}-{broker_id}')
+    return {
+        'statusCode': 200,
+        'headers': {
+            'Content-Type': EXPORT_CONTENT_TYPES[export_format],
+            'Content-Disposition': f'attachment; filename="{filename}.{export_format}"',
+            'Access-Control-Allow-Origin': '*',
+            **cursor_headers(next_cursor)
+        },
+        'body': output.getvalue(),
+        'isBase64Encoded': False
+    }
+# <<< shared/blocks/export.py
+
+
+def vocabulary_code(vocabulary: Dict[str, int], value: Optional[str]) -> int:
+    key = (value or '').strip().lower()
+    if key not in vocabulary:
+        vocabulary[key] = len(vocabulary)
+    return vocabulary[key]
+
+
+def preference_matrix(preferences: List[Any], vocabulary: Dict[str, int]) -> 'np.ndarray':
+    matrix = np.zeros((len(preferences), max(len(vocabulary), 1)), dtype=bool)
+    for row, values in enumerate(preferences):
+        codes = [vocabulary[v.strip().lower()] for v in values or [] if isinstance(v, str) and v.strip().lower() in vocabulary]
+        if values:
+            matrix[row, codes] = True
+        else:
+            matrix[row, :] = True
+    return matrix
+
+
+def score_matrix(investors: List[Tuple[Any, ...]], columns: 'np.ndarray') -> 'np.ndarray':
+    features = _snapshot.features[columns]
+    min_investment, expected_return, risk = features[:, 0], features[:, 1], features[:, 2]
+    type_codes, city_codes = features[:, 3].astype(np.intp), features[:, 4].astype(np.intp)
+    
+    budget = np.array([float(inv[1] or 0) for inv in investors])[:, None]
+    risk_tolerance = np.array([RISK_CODES.get(inv[2], 1) for inv in investors])[:, None]
+    
+    alive_returns = _snapshot.features[_snapshot.alive, 1]
+    low, high = (alive_returns.min(), alive_returns.max()) if alive_returns.size else (0.0, 0.0)
+    return_fit = (expected_return - low) / (high - low) if high > low else np.ones_like(expected_return)
+    
+    scores = (
+        MATCH_WEIGHTS['budget'] * np.minimum(1.0, budget / np.maximum(min_investment, 1.0))
+        + MATCH_WEIGHTS['risk'] * (1.0 - np.abs(risk_tolerance - risk) / 2.0)
+        + MATCH_WEIGHTS['type'] * preference_matrix([inv[3] for inv in investors], _snapshot.types)[:, type_codes]
+        + MATCH_WEIGHTS['location'] * preference_matrix([inv[4] for inv in investors], _snapshot.cities)[:, city_codes]
+        + MATCH_WEIGHTS['return'] * return_fit
+    )
+    scores[:, ~_snapshot.alive[columns]] = -np.inf
+    return scores
+
+
+def top_matches(scores: 'np.ndarray', limit: int) -> List[List[Tuple[int, float]]]:
+    limit = min(limit, scores.shape[1])
+    if limit == 0:
+        return [[] for _ in range(scores.shape[0])]
+    
+    candidates = np.argpartition(-scores, limit - 1, axis=1)[:, :limit]
+    candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+    order = np.argsort(-candidate_scores, axis=1)
+    ranked = np.take_along_axis(candidates, order, axis=1)
+    ranked_scores = np.take_along_axis(candidate_scores, order, axis=1)
+    return [
+        [(int(i), round(float(score), 4)) for i, score in zip(row, row_scores) if np.isfinite(score)]
+        for row, row_scores in zip(ranked, ranked_scores)
+    ]
+
+
+def match_investors_to_properties(investors: List[Tuple[Any, ...]], limit: int) -> List[Dict[str, Any]]:
+    columns = np.arange(len(_snapshot.ids))
+    block = max(1, MATCH_BLOCK_CELLS // max(len(columns), 1))
+    results = []
+    for start in range(0, len(investors), block):
+        chunk = investors[start:start + block]
+        for investor, matches in zip(chunk, top_matches(score_matrix(chunk, columns), limit)):
+            results.append({
+                'investorId': investor[0],
+                'matches': [{'propertyId': _snapshot.ids[i], 'score': score} for i, score in matches]
+            })
+    return results
+
+
+@_router.route('investors', 'GET', action='funnel')
+def funnel_response(conn, event: Dict[str, Any], params: Dict[str, str], fields: Tuple[str, ...]) -> Dict[str, Any]:
+    broker_id = params.get('brokerId')
+    if not broker_id:
         return {
-            'statusCode': 405,
+            'statusCode': 400,
             'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({'error': 'Method not allowed'}),
+            'body': json.dumps({'error': 'Broker ID required'}),
             'isBase64Encoded': False
         }
     
-    finally:
-        conn.close()
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT stage, current_count, entered_count FROM investor_stage_funnel WHERE broker_id = %s",
+            (broker_id,)
+        )
+        counts = {stage: (current, entered) for stage, current, entered in cur.fetchall()}
+        cur.execute("""
+            SELECT from_stage, to_stage, transitions, seconds_total
+            FROM investor_stage_transitions WHERE broker_id = %s
+        """, (broker_id,))
+        transitions = cur.fetchall()
+    
+    exits: Dict[str, List[float]] = {stage: [0, 0, 0.0] for stage in INVESTOR_STAGES}
+    for from_stage, to_stage, total, seconds in transitions:
+        stage_exits = exits[from_stage]
+        stage_exits[1] += total
+        stage_exits[2] += seconds
+        if to_stage in FUNNEL_STAGES and from_stage in FUNNEL_STAGES \
+                and FUNNEL_STAGES.index(to_stage) > FUNNEL_STAGES.index(from_stage):
+            stage_exits[0] += total
+    
+    stages = []
+    for stage in INVESTOR_STAGES:
+        current, entered = counts.get(stage, (0, 0))
+        converted, exited, seconds = exits[stage]
+        stages.append({
+            'stage': stage,
+            'current': current,
+            'entered': entered,
+            'converted': converted,
+            'conversionRate': round(converted / entered, 4) if entered and stage in FUNNEL_STAGES[:-1] else None,
+            'avgDaysInStage': round(seconds / exited / 86400, 2) if exited else None
+        })
+    
+    return {
+        'statusCode': 200,
+        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+        'body': json.dumps({
+            'brokerId': broker_id,
+            'stages': stages,
+            'transitions': [
+                {'from': from_stage, 'to': to_stage, 'count': total}
+                for from_stage, to_stage, total, _ in sorted(transitions, key=lambda row: -row[2])
+            ]
+        }),
+        'isBase64Encoded': False
+    }
+
+
+@_router.route('investors', 'GET', action='match')
+def match_response(conn, event: Dict[str, Any], params: Dict[str, str], fields: Tuple[str, ...]) -> Dict[str, Any]:
+    try:
+        limit = int(params.get('limit', DEFAULT_MATCH_LIMIT))
+        if not 1 <= limit <= MAX_MATCH_LIMIT:
+            raise ValueError('limit out of range')
+        after = decode_page_cursor(params.get('cursor'))
+    except ValueError:
+        return {
+            'statusCode': 400,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': f'limit must be 1-{MAX_MATCH_LIMIT}, cursor must be valid'}),
+            'isBase64Encoded': False
+        }
+    
+    _snapshot.refresh(conn)
+    
+    next_cursor = None
+    with conn.cursor() as cur:
+        if params.get('investorId'):
+            cur.execute(MATCH_INVESTOR_SQL + " WHERE id = %s", (params['investorId'],))
+            investors = cur.fetchall()
+            if not investors:
+                return {
+                    'statusCode': 404,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'body': json.dumps({'error': 'Investor not found'}),
+                    'isBase64Encoded': False
+                }
+            result = match_investors_to_properties(investors, limit)[0]
+        
+        elif params.get('propertyId'):
+            property_index = _snapshot.index.get(params['propertyId'])
+            if property_index is None or not _snapshot.alive[property_index]:
+                return {
+                    'statusCode': 404,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'body': json.dumps({'error': 'Active property not found'}),
+                    'isBase64Encoded': False
+                }
+            broker_id = params.get('brokerId')
+            if not broker_id:
+                cur.execute("SELECT broker_id FROM properties WHERE id = %s", (params['propertyId'],))
+                row = cur.fetchone()
+                if not row:
+                    return {
+                        'statusCode': 404,
+                        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                        'body': json.dumps({'error': 'Active property not found'}),
+                        'isBase64Encoded': False
+                    }
+                broker_id = row[0]
+            cur.execute(MATCH_INVESTOR_SQL + " WHERE broker_id = %s", (broker_id,))
+            investors = cur.fetchall()
+            scores = score_matrix(investors, np.array([property_index]))[:, 0] if investors else np.empty(0)
+            ranked = top_matches(scores[None, :], limit)[0]
+            result = {
+                'propertyId': params['propertyId'],
+                'matches': [{'investorId': investors[i][0], 'score': score} for i, score in ranked]
+            }
+        
+        elif params.get('brokerId'):
+            keyset = keyset_condition(after)
+            cur.execute(
+                MATCH_INVESTOR_SQL + f" WHERE broker_id = %s {keyset['query']} ORDER BY created_at DESC, id DESC LIMIT %s",
+                [params['brokerId']] + keyset['params'] + [MATCH_INVESTOR_PAGE_LIMIT + 1]
+            )
+            investors, next_cursor = paginate(cur.fetchall(), MATCH_INVESTOR_PAGE_LIMIT)
+            result = match_investors_to_properties(investors, limit)
+        
+        else:
+            return {
+                'statusCode': 400,
+                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                'body': json.dumps({'error': 'investorId, propertyId or brokerId required'}),
+                'isBase64Encoded': False
+            }
+    
+    return {
+        'statusCode': 200,
+        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*', **cursor_headers(next_cursor)},
+        'body': json.dumps(result),
+        'isBase64Encoded': False
+    }
+
+
+@_router.route('investors', 'GET', 'POST', action='portfolio')
+def portfolio_response(conn, event: Dict[str, Any], params: Dict[str, str], fields: Tuple[str, ...]) -> Dict[str, Any]:
+    investor_id = params.get('investorId')
+    try:
+        if not investor_id:
+            raise ValueError('investorId required')
+        scenarios = dict(PORTFOLIO_SCENARIOS)
+        if any(params.get(name) for name in PORTFOLIO_SHOCKS):
+            shocks = tuple(float(params.get(name) or 0) for name in PORTFOLIO_SHOCKS)
+            if not all(math.isfinite(value) for value in shocks) or not 0 <= shocks[1] <= 100 or shocks[2] <= -100:
+                raise ValueError('shock out of range')
+            scenarios['custom'] = shocks
+    except ValueError:
+        return {
+            'statusCode': 400,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': 'investorId required; rateShock, occupancyDrop (0-100), priceChange (> -100) must be numbers'}),
+            'isBase64Encoded': False
+        }
+    
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT portfolio_properties, portfolio_total_invested FROM investors WHERE id = %s",
+            (investor_id,)
+        )
+        investor = cur.fetchone()
+        if not investor:
+            return {
+                'statusCode': 404,
+                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                'body': json.dumps({'error': 'Investor not found'}),
+                'isBase64Encoded': False
+            }
+        
+        property_ids = list(dict.fromkeys(str(i) for i in investor[0] or []))[:PORTFOLIO_MAX_HOLDINGS]
+        cur.execute(PORTFOLIO_SQL, (property_ids,))
+        found = {row[0]: row for row in cur.fetchall()}
+        holdings = [found[i] for i in property_ids if i in found]
+        valuation = value_portfolio(holdings, float(investor[1] or 0), scenarios)
+        
+        if event.get('httpMethod') == 'POST':
+            cur.execute("""
+                UPDATE investors
+                SET portfolio_total_invested = %s, portfolio_active_investments = %s,
+                    portfolio_total_return = %s, updated_at = CURRENT_TIMESTAMP
+                WHERE id = %s
+            """, (valuation['invested'], len(holdings), valuation['scenarios'][0]['profit'], investor_id))
+    
+    return {
+        'statusCode': 200,
+        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+        'body': json.dumps({
+            'investorId': investor_id,
+            **valuation,
+            'missing': [i for i in property_ids if i not in found]
+        }),
+        'isBase64Encoded': False
+    }
+
+
+def value_portfolio(
+    holdings: List[Tuple[Any, ...]], total_invested: float, scenarios: Dict[str, Tuple[float, float, float]]
+) -> Dict[str, Any]:
+    names = list(scenarios)
+    
+    def column(index: int, default: float) -> 'np.ndarray':
+        return np.array([default if row[index] is None else float(row[index]) for row in holdings])
+    
+    price = column(1, 0.0)
+    min_investment = column(2, 0.0)
+    mortgage = np.array([row[3] in MORTGAGE_FINANCING and row[4] is not None for row in holdings], dtype=bool)
+    rate = column(4, 0.0)
+    down_payment = np.clip(column(5, 100.0), 0.0, 100.0)
+    rent = column(6, 0.0)
+    occupancy = np.clip(column(7, 100.0), 0.0, 100.0)
+    resale = column(8, math.nan)
+    resale = np.where(np.isnan(resale), price, resale)
+    term = np.clip(column(9, 12.0), 1.0, PORTFOLIO_MAX_TERM_MONTHS).astype(np.intp)
+    paid = np.minimum(term, PORTFOLIO_MORTGAGE_TERM_MONTHS)
+    shocks = np.array([scenarios[name] for name in names])
+    rate_shock, occupancy_drop, price_change = shocks[:, 0:1], shocks[:, 1:2], shocks[:, 2:3]
+    
+    loan = np.where(mortgage, price * (1.0 - down_payment / 100.0), 0.0)
+    equity = price - loan
+    if total_invested > 0 and price.sum() > 0:
+        invested = total_invested * price / price.sum()
+    else:
+        invested = min_investment
+    share = np.divide(invested, equity, out=np.zeros_like(invested), where=equity > 0)
+    
+    monthly_rate = np.maximum(rate[None, :] + rate_shock, 0.0) / 1200.0
+    growth = (1.0 + monthly_rate) ** PORTFOLIO_MORTGAGE_TERM_MONTHS
+    payment = np.where(
+        monthly_rate > 0,
+        loan * monthly_rate * growth / np.where(growth > 1.0, growth - 1.0, 1.0),
+        loan / PORTFOLIO_MORTGAGE_TERM_MONTHS
+    )
+    months = np.arange(1, term.max(initial=0) + 1)
+    held = months[None, :] <= term[:, None]
+    paying = months[None, :] <= paid[:, None]
+    monthly_rent = rent[None, :] * np.clip(occupancy[None, :] - occupancy_drop, 0.0, 100.0) / 100.0
+    
+    elapsed = (1.0 + monthly_rate) ** paid[None, :]
+    balance = np.maximum(np.where(
+        monthly_rate > 0,
+        loan * elapsed - payment * (elapsed - 1.0) / np.where(monthly_rate > 0, monthly_rate, 1.0),
+        loan - payment * paid[None, :]
+    ), 0.0)
+    sale = resale[None, :] * (1.0 + price_change / 100.0) - balance
+    
+    cash_flows = share[None, :, None] * (
+        monthly_rent[:, :, None] * held[None, :, :]
+        - payment[:, :, None] * paying[None, :, :]
+        + sale[:, :, None] * (months[None, None, :] == term[None, :, None])
+    )
+    income = (share * term)[None, :] * monthly_rent
+    debt_service = (share * paid)[None, :] * payment
+    proceeds = share[None, :] * sale
+    profit = cash_flows.sum(axis=2) - invested[None, :]
+    
+    total = float(invested.sum())
+    portfolio_profit = profit.sum(axis=1)
+    horizon = float(term.max(initial=12)) / 12.0
+    return {
+        'invested': round(total, 2),
+        'holdings': [{
+            'propertyId': row[0],
+            'invested': round(float(invested[i]), 2),
+            'share': round(float(share[i]), 6),
+            'termMonths': int(term[i]),
+            'leveraged': bool(loan[i] > 0),
+            'profit': {name: round(float(profit[s, i]), 2) for s, name in enumerate(names)}
+        } for i, row in enumerate(holdings)],
+        'scenarios': [{
+            'name': name,
+            **dict(zip(PORTFOLIO_SHOCKS, scenarios[name])),
+            'invested': round(total, 2),
+            'rentalIncome': round(float(income[s].sum()), 2),
+            'debtService': round(float(debt_service[s].sum()), 2),
+            'saleProceeds': round(float(proceeds[s].sum()), 2),
+            'profit': round(float(portfolio_profit[s]), 2),
+            'roi': round(float(portfolio_profit[s]) / total, 4) if total > 0 else None,
+            'annualizedReturn': round((1.0 + float(portfolio_profit[s]) / total) ** (1.0 / horizon) - 1.0, 4)
+            if total > 0 and portfolio_profit[s] > -total else None,
+            'cashFlows': [round(value, 2) for value in cash_flows[s].sum(axis=0).tolist()]
+        } for s, name in enumerate(names)]
+    }
@@ -1,10 +1,792 @@
+import base64
+import bisect
+import csv
+import functools
+import gzip
+import importlib
+import hashlib
+import io
+import itertools
 import json
+import logging
+import math
 import os
+import re
+import sys
+import threading
+import time
 import uuid
-from typing import Dict, Any
+from collections import Counter, OrderedDict
+from datetime import datetime
+from json.encoder import encode_basestring_ascii
+from typing import Dict, Any, List, Optional, Tuple, Callable
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2 import extensions, pool
 
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DB_POOL_MIN_SIZE = int(os.environ.get('DB_POOL_MIN_SIZE', '1'))
+DB_POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', '5'))
+DB_POOL_HEALTHCHECK_INTERVAL = float(os.environ.get('DB_POOL_HEALTHCHECK_INTERVAL', '30'))
+
+DEFAULT_PAGE_LIMIT = 100
+MAX_PAGE_LIMIT = 500
+MAX_BATCH_IDS = 100
+
+EXPORT_PAGE_ROWS = int(os.environ.get('EXPORT_PAGE_ROWS', '1000'))
+EXPORT_FETCH_SIZE = 200
+EXPORT_FILENAME_UNSAFE = re.compile(r'[^A-Za-z0-9_-]')
+EXPORT_CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8'
+}
+
+CATALOG_CACHE_SIZE = int(os.environ.get('CATALOG_CACHE_SIZE', '256'))
+CATALOG_CACHE_TTL = float(os.environ.get('CATALOG_CACHE_TTL', '30'))
+
+BULK_IMPORT_MAX_ROWS = int(os.environ.get('BULK_IMPORT_MAX_ROWS', '5000'))
+BULK_IMPORT_PAGE_SIZE = 500
+
+PROPERTY_TYPES = {'apartment', 'house', 'commercial', 'land', 'hotel', 'garage', 'parking', 'storage'}
+PROPERTY_STATUSES = {'draft', 'moderation', 'active', 'reserved', 'sold', 'archived'}
+FINANCING_METHODS = {'cash', 'mortgage', 'installment', 'developer_installment', 'mixed'}
+RISK_LEVELS = {'low', 'medium', 'high'}
+
+PROPERTY_COLUMNS = [
+    'id', 'broker_id', 'title', 'description', 'property_type', 'status',
+    'location_city', 'location_district', 'location_address', 'location_metro', 'location_metro_distance',
+    'location_lat', 'location_lng',
+    'pricing_total_price', 'pricing_price_per_meter', 'pricing_min_investment', 'pricing_currency',
+    'financing_method', 'financing_mortgage_rate', 'financing_installment_months', 'financing_down_payment',
+    'financing_developer_installment_months', 'financing_developer_installment_rate',
+    'investment_strategies', 'investment_expected_return', 'investment_term', 'investment_risk_level',
+    'investment_current_investment', 'investment_target_investment', 'investment_investors_count',
+    'rental_monthly_income', 'rental_occupancy_rate', 'rental_yield',
+    'resale_expected_price', 'resale_expected_profit', 'resale_market_growth',
+    'details_area', 'details_rooms', 'details_floor', 'details_total_floors', 'details_build_year',
+    'details_condition', 'details_parking', 'details_furnishing',
+    'media_images', 'media_videos', 'media_virtual_tour', 'media_floor_plan',
+    'documents',
+    'metadata_views', 'metadata_favorites', 'metadata_source', 'metadata_external_id',
+    'sharing_telegram_published', 'sharing_telegram_url', 'sharing_vk_published', 'sharing_vk_url',
+    'created_at', 'updated_at'
+]
+PROPERTY_SELECT = ', '.join(PROPERTY_COLUMNS)
+
+PROPERTY_COLUMN_KINDS = {
+    **dict.fromkeys([
+        'location_metro_distance', 'financing_installment_months', 'financing_developer_installment_months',
+        'investment_term', 'investment_investors_count',
+        'details_rooms', 'details_floor', 'details_total_floors', 'details_build_year',
+        'metadata_views', 'metadata_favorites'
+    ], 'int'),
+    **dict.fromkeys([
+        'location_lat', 'location_lng',
+        'pricing_total_price', 'pricing_price_per_meter', 'pricing_min_investment',
+        'financing_mortgage_rate', 'financing_down_payment', 'financing_developer_installment_rate',
+        'investment_expected_return', 'investment_current_investment', 'investment_target_investment',
+        'rental_monthly_income', 'rental_occupancy_rate', 'rental_yield',
+        'resale_expected_price', 'resale_expected_profit', 'resale_market_growth',
+        'details_area'
+    ], 'numeric'),
+    **dict.fromkeys(['investment_strategies', 'media_images', 'media_videos', 'documents'], 'json'),
+    **dict.fromkeys(['details_parking', 'sharing_telegram_published', 'sharing_vk_published'], 'bool'),
+    **dict.fromkeys(['created_at', 'updated_at'], 'timestamp')
+}
+
+COLUMN_ENCODERS: Dict[str, Callable[[Any], str]] = {
+    'text': encode_basestring_ascii,
+    'int': int.__repr__,
+    'float': float.__repr__,
+    'bool': lambda value: 'true' if value else 'false',
+    'numeric': lambda value: f'"{value}"',
+    'timestamp': lambda value: f'"{value}"',
+    'json': lambda value: json.dumps(value, default=str)
+}
+COLUMN_NULLS: Dict[str, str] = {}
+ENCODER_PLAN_CACHE_SIZE = 64
+
+SEARCH_HEADLINE_OPTIONS = 'MaxFragments=2, MaxWords=20, MinWords=5, StartSel=<mark>, StopSel=</mark>'
+SEARCH_EXTRA_COLUMNS = (('search_rank', 'float'), ('search_snippet', 'text'))
+
+EARTH_RADIUS_M = 6371008.8
+METERS_PER_DEGREE = 111320.0
+MAX_SEARCH_RADIUS_M = 50000
+CLUSTER_CELLS_PER_TILE = 4
+MAX_CLUSTER_ZOOM = 20
+GEO_EXTRA_COLUMNS = (('distance_m', 'float'),)
+
+VIEW_FLUSH_INTERVAL = float(os.environ.get('VIEW_FLUSH_INTERVAL', '10'))
+VIEW_FLUSH_MAX_PENDING = int(os.environ.get('VIEW_FLUSH_MAX_PENDING', '500'))
+VIEW_SYNC_INTERVAL = float(os.environ.get('VIEW_SYNC_INTERVAL', '300'))
+DEFAULT_TRENDING_HOURS = 24
+MAX_TRENDING_HOURS = 24 * 30
+DEFAULT_TRENDING_LIMIT = 10
+MAX_TRENDING_LIMIT = 50
+TRENDING_EXTRA_COLUMNS = (('views', 'int'),)
+
+MARKET_SKETCH_GAMMA = 1.01 / 0.99
+MARKET_QUANTILES = (('p10', 0.1), ('p50', 0.5), ('p90', 0.9))
+MARKET_METRICS = {'price_per_meter': 'pricePerMeter', 'yield': 'yield'}
+
+VIEW_FLUSH_SQL = """
+    WITH pending (id, views) AS (VALUES %s),
+    counted AS (
+        SELECT pending.id, pending.views, COALESCE(p.metadata_views, 0) AS stored
+        FROM pending JOIN properties p ON p.id = pending.id
+    ),
+    totals AS (
+        INSERT INTO property_view_totals (property_id, views)
+        SELECT id, stored + views FROM counted
+        ON CONFLICT (property_id) DO UPDATE
+        SET views = property_view_totals.views + (SELECT views FROM counted WHERE id = EXCLUDED.property_id)
+    )
+    INSERT INTO property_view_buckets (property_id, bucket, views)
+    SELECT id, date_trunc('hour', CURRENT_TIMESTAMP), views FROM counted
+    ON CONFLICT (property_id, bucket) DO UPDATE SET views = property_view_buckets.views + EXCLUDED.views
+"""
+
+VIEW_SYNC_SQL = """
+    UPDATE properties p SET metadata_views = t.views
+    FROM property_view_totals t
+    WHERE t.property_id = ANY(%s) AND p.id = t.property_id AND p.metadata_views IS DISTINCT FROM t.views
+"""
+
+VIEW_RETENTION_SQL = """
+    DELETE FROM property_view_buckets
+    WHERE bucket < date_trunc('hour', CURRENT_TIMESTAMP) - make_interval(hours => %s)
+"""
+
+GEO_CONDITION = """
+    status = 'active' AND location_lat IS NOT NULL AND location_lng IS NOT NULL
+    AND point(location_lng::float8, location_lat::float8) <@ box(point(%s, %s), point(%s, %s))
+"""
+
+PROPERTY_INSERT_COLUMNS = [
+    'id', 'broker_id', 'title', 'description', 'property_type', 'status',
+    'location_city', 'location_district', 'location_address', 'location_metro', 'location_metro_distance',
+    'location_lat', 'location_lng',
+    'pricing_total_price', 'pricing_price_per_meter', 'pricing_min_investment', 'pricing_currency',
+    'financing_method', 'financing_mortgage_rate', 'financing_down_payment',
+    'investment_strategies', 'investment_expected_return', 'investment_term',
+    'investment_risk_level', 'investment_target_investment',
+    'details_area', 'details_rooms', 'details_floor', 'details_total_floors',
+    'media_images', 'metadata_source', 'metadata_external_id'
+]
+
+PROPERTY_REQUIRED_FIELDS = [
+    ('brokerId',), ('title',), ('description',), ('propertyType',),
+    ('location', 'city'), ('location', 'address'),
+    ('pricing', 'totalPrice'), ('pricing', 'minInvestment'),
+    ('financing', 'method'),
+    ('investment', 'strategy'), ('investment', 'expectedReturn'), ('investment', 'term'),
+    ('investment', 'riskLevel'), ('investment', 'targetInvestment')
+]
+
+PROPERTY_SECTIONS = [
+    ('location',), ('location', 'coordinates'), ('pricing',), ('financing',), ('investment',),
+    ('details',), ('media',), ('metadata',)
+]
+
+PROPERTY_TEXT_FIELDS = [
+    ('brokerId',), ('title',), ('description',),
+    ('location', 'city'), ('location', 'district'), ('location', 'address'), ('location', 'metro'),
+    ('pricing', 'currency')
+]
+
+PROPERTY_NUMERIC_FIELDS = [
+    (('location', 'metroDistance'), 'int'), (('location', 'coordinates', 'lat'), 'number'),
+    (('location', 'coordinates', 'lng'), 'number'),
+    (('pricing', 'totalPrice'), 'number'), (('pricing', 'pricePerMeter'), 'number'),
+    (('pricing', 'minInvestment'), 'number'),
+    (('financing', 'mortgageRate'), 'number'), (('financing', 'downPayment'), 'number'),
+    (('investment', 'expectedReturn'), 'number'), (('investment', 'term'), 'int'),
+    (('investment', 'targetInvestment'), 'number'),
+    (('details', 'area'), 'number'), (('details', 'rooms'), 'int'), (('details', 'floor'), 'int'),
+    (('details', 'totalFloors'), 'int')
+]
+
+PROPERTY_ENUM_FIELDS = [
+    (('propertyType',), PROPERTY_TYPES), (('status',), PROPERTY_STATUSES),
+    (('financing', 'method'), FINANCING_METHODS), (('investment', 'riskLevel'), RISK_LEVELS)
+]
+
+PG_INTEGER_MIN, PG_INTEGER_MAX = -2 ** 31, 2 ** 31 - 1
+
+PROPERTY_UPSERT_SQL = f"""
+    INSERT INTO properties ({', '.join(PROPERTY_INSERT_COLUMNS)}) VALUES %s
+    ON CONFLICT (metadata_source, metadata_external_id) DO UPDATE SET
+        {', '.join(f"{c} = EXCLUDED.{c}" for c in PROPERTY_INSERT_COLUMNS if c != 'id')},
+        updated_at = CURRENT_TIMESTAMP
+    WHERE properties.broker_id = EXCLUDED.broker_id
+    RETURNING metadata_source, metadata_external_id, (xmax = 0) AS inserted
+"""
+
+COMPRESSION_MIN_BYTES = int(os.environ.get('COMPRESSION_MIN_BYTES', '1400'))
+GZIP_LEVEL = int(os.environ.get('GZIP_LEVEL', '5'))
+BROTLI_QUALITY = int(os.environ.get('BROTLI_QUALITY', '5'))
+
+FUNCTION_NAME = 'properties'
+ROUTE_PARAMS = ('action', 'mode')
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', '250'))
+SLOW_QUERY_EXPLAIN_INTERVAL = float(os.environ.get('SLOW_QUERY_EXPLAIN_INTERVAL', '60'))
+QUERY_STATS_LOG_INTERVAL = float(os.environ.get('QUERY_STATS_LOG_INTERVAL', '300'))
+QUERY_STATS_MAX_SHAPES = 200
+QUERY_STATS_LOG_TOP = 20
+QUERY_HISTOGRAM_BOUNDS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+SQL_LITERALS = re.compile(r"'(?:[^']|'')*'|%\(\w+\)s|%s|\b\d+(?:\.\d+)?\b|\bNULL\b(?=::|,|\))")
+SQL_TUPLES = re.compile(r"\(\?(?:::\w+)?(?:, \?(?:::\w+)?)+\)")
+SQL_REPEATED_TUPLES = re.compile(r"\(\?\)(?:, \(\?\))+")
+SQL_WHITESPACE = re.compile(r'\s+')
+
+PREFLIGHT_RESPONSE = {
+    'statusCode': 200,
+    'headers': {
+        'Access-Control-Allow-Origin': '*',
+        'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
+        'Access-Control-Allow-Headers': 'Content-Type, X-Broker-Id, If-None-Match',
+        'Access-Control-Max-Age': '86400'
+    },
+    'body': '',
+    'isBase64Encoded': False
+}
+NOT_FOUND_RESPONSE = {
+    'statusCode': 404,
+    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+    'body': json.dumps({'error': 'Resource not found'}),
+    'isBase64Encoded': False
+}
+METHOD_NOT_ALLOWED_RESPONSE = {
+    'statusCode': 405,
+    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+    'body': json.dumps({'error': 'Method not allowed'}),
+    'isBase64Encoded': False
+}
+
+
+# >>> shared/blocks/response_cache.py (copied by shared/sync.py, edit the block and re-run)
+class ResponseCache:
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+    
+    def get(self, key: Any) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, response = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return response
+    
+    def set(self, key: Any, response: Dict[str, Any]) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        self._entries.clear()
+# <<< shared/blocks/response_cache.py
+
+
+_catalog_cache = ResponseCache(CATALOG_CACHE_SIZE, CATALOG_CACHE_TTL)
+
+
+class ViewCounter:
+    def __init__(self, flush_interval: float, max_pending: int, sync_interval: float):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.sync_interval = sync_interval
+        self._pending: Counter = Counter()
+        self._unsynced: set = set()
+        self._flushed_at = time.monotonic()
+        self._synced_at = time.monotonic()
+    
+    def record(self, property_id: str) -> None:
+        self._pending[property_id] += 1
+    
+    def pending(self, property_id: str) -> int:
+        return self._pending.get(property_id, 0)
+    
+    def due(self) -> bool:
+        if not self._pending:
+            return False
+        return (
+            len(self._pending) >= self.max_pending
+            or time.monotonic() - self._flushed_at >= self.flush_interval
+        )
+    
+    def drain(self) -> List[Tuple[str, int]]:
+        views = list(self._pending.items())
+        self._pending.clear()
+        self._unsynced.update(property_id for property_id, _ in views)
+        self._flushed_at = time.monotonic()
+        return views
+    
+    def restore(self, views: List[Tuple[str, int]]) -> None:
+        self._pending.update(dict(views))
+    
+    def sync_due(self) -> bool:
+        return bool(self._unsynced) and time.monotonic() - self._synced_at >= self.sync_interval
+    
+    def drain_unsynced(self) -> List[str]:
+        ids = list(self._unsynced)
+        self._unsynced.clear()
+        self._synced_at = time.monotonic()
+        return ids
+    
+    def restore_unsynced(self, ids: List[str]) -> None:
+        self._unsynced.update(ids)
+
+
+_view_counter = ViewCounter(VIEW_FLUSH_INTERVAL, VIEW_FLUSH_MAX_PENDING, VIEW_SYNC_INTERVAL)
+
+
+# >>> shared/blocks/row_encoder.py (copied by shared/sync.py, edit the block and re-run)
+class RowEncoder:
+    def __init__(self, columns: List[Tuple[str, str]]):
+        self.kinds = dict(columns)
+        self.default_fields = tuple(self.kinds)
+        self._plans: Dict[Any, List[Tuple[str, Callable[[Any], str], str]]] = {}
+        self.plan(self.default_fields)
+    
+    def parse_fields(self, raw: Optional[str]) -> Tuple[str, ...]:
+        if not raw:
+            return self.default_fields
+        fields = tuple(dict.fromkeys(field.strip() for field in raw.split(',') if field.strip()))
+        if not fields or any(field not in self.kinds for field in fields):
+            raise ValueError('Unknown field')
+        return fields
+    
+    def plan(
+        self, fields: Tuple[str, ...], extra: Tuple[Tuple[str, str], ...] = ()
+    ) -> List[Tuple[str, Callable[[Any], str], str]]:
+        plan = self._plans.get((fields, extra))
+        if plan is None:
+            columns = [(field, self.kinds[field]) for field in fields] + list(extra)
+            plan = [
+                (
+                    ('{' if position == 0 else ', ') + encode_basestring_ascii(name) + ': ',
+                    COLUMN_ENCODERS[kind], COLUMN_NULLS.get(kind, 'null')
+                )
+                for position, (name, kind) in enumerate(columns)
+            ]
+            if len(self._plans) < ENCODER_PLAN_CACHE_SIZE:
+                self._plans[(fields, extra)] = plan
+        return plan
+    
+    def write(self, out: List[str], row: Tuple[Any, ...], plan: List[Tuple[str, Callable[[Any], str], str]]) -> None:
+        for (prefix, encode, null), value in zip(plan, row):
+            out.append(prefix)
+            out.append(null if value is None else encode(value))
+        out.append('}')
+    
+    def encode_row(self, row: Tuple[Any, ...], fields: Tuple[str, ...], extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+        started = time.perf_counter()
+        out: List[str] = []
+        self.write(out, row, self.plan(fields, extra))
+        record_phase('encode', started)
+        return ''.join(out)
+    
+    def encode_rows(
+        self, rows: List[Tuple[Any, ...]], fields: Tuple[str, ...], extra: Tuple[Tuple[str, str], ...] = ()
+    ) -> str:
+        started = time.perf_counter()
+        plan = self.plan(fields, extra)
+        out = ['[']
+        for position, row in enumerate(rows):
+            if position:
+                out.append(', ')
+            self.write(out, row, plan)
+        out.append(']')
+        record_phase('encode', started)
+        return ''.join(out)
+# <<< shared/blocks/row_encoder.py
+
+
+_property_encoder = RowEncoder([(column, PROPERTY_COLUMN_KINDS.get(column, 'text')) for column in PROPERTY_COLUMNS])
+
+
+# >>> shared/blocks/router.py (copied by shared/sync.py, edit the block and re-run)
+class Router:
+    def __init__(self, resource_param: str, default_resource: str):
+        self.resource_param = resource_param
+        self.default_resource = default_resource
+        self.routes: Dict[Tuple[str, str, Optional[str]], Callable[..., Dict[str, Any]]] = {}
+        self.resources: set = set()
+    
+    def route(self, resource: str, *methods: str, action: Optional[str] = None) -> Callable:
+        def register(handle: Callable[..., Dict[str, Any]]) -> Callable[..., Dict[str, Any]]:
+            for method in methods:
+                self.routes[(method, resource, action)] = handle
+            self.resources.add(resource)
+            return handle
+        return register
+    
+    def resolve(
+        self, method: str, params: Dict[str, str]
+    ) -> Tuple[Optional[Callable[..., Dict[str, Any]]], Optional[Dict[str, Any]]]:
+        if method == 'OPTIONS':
+            return None, PREFLIGHT_RESPONSE
+        resource = params.get(self.resource_param, self.default_resource)
+        handle = self.routes.get((method, resource, params.get('action'))) or self.routes.get((method, resource, None))
+        if handle:
+            return handle, None
+        if resource in self.resources:
+            return None, METHOD_NOT_ALLOWED_RESPONSE
+        return None, NOT_FOUND_RESPONSE
+# <<< shared/blocks/router.py
+
+
+# >>> shared/blocks/lazy_module.py (copied by shared/sync.py, edit the block and re-run)
+class LazyModule:
+    def __init__(self, name: str):
+        self.name = name
+        self.module = None
+    
+    def __getattr__(self, attr: str) -> Any:
+        if self.module is None:
+            started = time.perf_counter()
+            self.module = importlib.import_module(self.name)
+            record_phase('import', started)
+        return getattr(self.module, attr)
+# <<< shared/blocks/lazy_module.py
+
+
+# >>> shared/blocks/timing.py (copied by shared/sync.py, edit the block and re-run)
+class RequestTiming:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self.queries = 0
+        self._lock = threading.Lock()
+    
+    def add(self, phase: str, ms: float, query: bool = False) -> None:
+        with self._lock:
+            self.phases[phase] = self.phases.get(phase, 0.0) + ms
+            self.queries += query
+    
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+    
+    def header(self) -> str:
+        phases = [f'{name};dur={ms:.1f}' for name, ms in self.phases.items()]
+        return ', '.join(phases + [f'total;dur={self.elapsed_ms():.1f}'])
+
+
+class QueryStats:
+    def __init__(self, max_shapes: int):
+        self.max_shapes = max_shapes
+        self._shapes: Dict[str, List[float]] = {}
+        self._explained_at: Dict[str, float] = {}
+        self._logged_at = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def record(self, shape: str, ms: float) -> None:
+        with self._lock:
+            stats = self._shapes.get(shape)
+            if stats is None:
+                if len(self._shapes) >= self.max_shapes:
+                    shape = 'other'
+                stats = self._shapes.setdefault(shape, [0, 0.0, 0.0] + [0] * (len(QUERY_HISTOGRAM_BOUNDS_MS) + 1))
+            stats[0] += 1
+            stats[1] += ms
+            stats[2] = max(stats[2], ms)
+            stats[3 + bisect.bisect_left(QUERY_HISTOGRAM_BOUNDS_MS, ms)] += 1
+    
+    def should_explain(self, shape: str) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            if now - self._explained_at.get(shape, -SLOW_QUERY_EXPLAIN_INTERVAL) < SLOW_QUERY_EXPLAIN_INTERVAL:
+                return False
+            self._explained_at[shape] = now
+            return True
+    
+    def summary(self, limit: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            ranked = sorted(self._shapes.items(), key=lambda item: -item[1][1])[:limit]
+        return [{
+            'sql': shape,
+            'count': stats[0],
+            'total_ms': round(stats[1], 1),
+            'max_ms': round(stats[2], 1),
+            'p50_ms': histogram_quantile(stats, 0.5),
+            'p95_ms': histogram_quantile(stats, 0.95),
+            'p99_ms': histogram_quantile(stats, 0.99)
+        } for shape, stats in ranked]
+    
+    def maybe_log(self) -> None:
+        if time.monotonic() - self._logged_at < QUERY_STATS_LOG_INTERVAL:
+            return
+        self._logged_at = time.monotonic()
+        log_event('query_stats', shapes=self.summary(QUERY_STATS_LOG_TOP))
+
+
+class TimingCursor(extensions.cursor):
+    def execute(self, query, vars=None):
+        started = time.perf_counter()
+        result = super().execute(query, vars)
+        ms = (time.perf_counter() - started) * 1000
+        shape = normalize_sql(query)
+        _query_stats.record(shape, ms)
+        if _timing:
+            _timing.add('db', ms, query=True)
+        if ms >= SLOW_QUERY_MS and _query_stats.should_explain(shape):
+            log_event(
+                'slow_query', logging.WARNING,
+                sql=shape, duration_ms=round(ms, 1), plan=explain(self.connection, query, vars)
+            )
+        return result
+    
+    def fetchone(self):
+        started = time.perf_counter()
+        try:
+            return super().fetchone()
+        finally:
+            record_phase('fetch', started)
+    
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        try:
+            return super().fetchmany(size) if size is not None else super().fetchmany()
+        finally:
+            record_phase('fetch', started)
+    
+    def fetchall(self):
+        started = time.perf_counter()
+        try:
+            return super().fetchall()
+        finally:
+            record_phase('fetch', started)
+    
+    def __iter__(self):
+        while True:
+            rows = self.fetchmany(self.itersize)
+            if not rows:
+                return
+            yield from rows
+
+
+class JsonLogFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps({
+            'event': record.getMessage(),
+            'function': FUNCTION_NAME,
+            'level': record.levelname,
+            **getattr(record, 'fields', {})
+        }, default=str, ensure_ascii=False)
+
+
+def json_logger(name: str) -> logging.Logger:
+    logger = logging.getLogger(name)
+    if not logger.handlers:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(JsonLogFormatter())
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
+
+
+_logger = json_logger(FUNCTION_NAME)
+_timing: Optional[RequestTiming] = None
+_query_stats = QueryStats(QUERY_STATS_MAX_SHAPES)
+_cold_start = True
+
+
+@functools.lru_cache(maxsize=512)
+def normalize_sql(query: Any) -> str:
+    text = query.decode('utf-8', 'replace') if isinstance(query, bytes) else str(query)
+    text = SQL_LITERALS.sub('?', SQL_WHITESPACE.sub(' ', text).strip())
+    return SQL_REPEATED_TUPLES.sub('(?), ...', SQL_TUPLES.sub('(?)', text))
+
+
+def histogram_quantile(stats: List[float], q: float) -> Optional[float]:
+    target = stats[0] * q
+    seen = 0
+    for position, count in enumerate(stats[3:]):
+        seen += count
+        if count and seen >= target:
+            return QUERY_HISTOGRAM_BOUNDS_MS[position] if position < len(QUERY_HISTOGRAM_BOUNDS_MS) else round(stats[2], 1)
+    return None
+
+
+def explain(conn, query: Any, vars: Any) -> Optional[str]:
+    prefix = b'EXPLAIN ' if isinstance(query, bytes) else 'EXPLAIN '
+    in_transaction = conn.get_transaction_status() == extensions.TRANSACTION_STATUS_INTRANS
+    try:
+        with conn.cursor(cursor_factory=extensions.cursor) as cur:
+            if in_transaction:
+                cur.execute('SAVEPOINT slow_query_explain')
+            try:
+                cur.execute(prefix + query, vars)
+                return '\n'.join(row[0] for row in cur.fetchall())
+            finally:
+                if in_transaction:
+                    cur.execute('ROLLBACK TO SAVEPOINT slow_query_explain')
+    except psycopg2.Error as error:
+        return f'EXPLAIN failed: {error}'.strip()
+
+
+def record_phase(phase: str, started: float) -> None:
+    if _timing:
+        _timing.add(phase, (time.perf_counter() - started) * 1000)
+
+
+def log_event(event: str, level: int = logging.INFO, **fields: Any) -> None:
+    _logger.log(level, event, extra={'fields': fields})
+
+
+def instrumented(handle: Callable[[Dict[str, Any], Any], Dict[str, Any]]) -> Callable[[Dict[str, Any], Any], Dict[str, Any]]:
+    @functools.wraps(handle)
+    def wrapper(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+        global _timing, _cold_start
+        timing = _timing = RequestTiming()
+        cold_start, _cold_start = _cold_start, False
+        status = 500
+        try:
+            response = handle(event, context)
+            status = response['statusCode']
+            headers = {**(response.get('headers') or {}), 'Server-Timing': timing.header(), 'Timing-Allow-Origin': '*'}
+            return {**response, 'headers': headers}
+        finally:
+            _timing = None
+            params = event.get('queryStringParameters') or {}
+            log_event(
+                'request',
+                method=event.get('httpMethod', 'GET'),
+                route={key: params[key] for key in ROUTE_PARAMS if key in params},
+                params=sorted(params),
+                status=status,
+                duration_ms=round(timing.elapsed_ms(), 2),
+                phases={name: round(ms, 2) for name, ms in timing.phases.items()},
+                queries=timing.queries,
+                cold_start=cold_start
+            )
+            _query_stats.maybe_log()
+    return wrapper
+# <<< shared/blocks/timing.py
+
+
+# >>> shared/blocks/compression.py (copied by shared/sync.py, edit the block and re-run)
+def compressed(handle: Callable[[Dict[str, Any], Any], Dict[str, Any]]) -> Callable[[Dict[str, Any], Any], Dict[str, Any]]:
+    @functools.wraps(handle)
+    def wrapper(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+        response = handle(event, context)
+        body = response.get('body')
+        if response.get('isBase64Encoded') or not body or len(body) < COMPRESSION_MIN_BYTES:
+            return response
+        
+        headers = {**response['headers'], 'Vary': 'Accept-Encoding'}
+        request_headers = {k.lower(): v for k, v in (event.get('headers') or {}).items()}
+        encoding = negotiate_encoding(request_headers.get('accept-encoding', ''))
+        if not encoding:
+            return {**response, 'headers': headers}
+        
+        started = time.perf_counter()
+        raw = body.encode()
+        if encoding == 'br':
+            data = brotli.compress(raw, quality=BROTLI_QUALITY)
+        else:
+            data = gzip.compress(raw, GZIP_LEVEL, mtime=0)
+        record_phase('compress', started)
+        
+        headers['Content-Encoding'] = encoding
+        if 'ETag' in headers:
+            headers['ETag'] = 'W/' + headers['ETag'].removeprefix('W/')
+        return {**response, 'headers': headers, 'body': base64.b64encode(data).decode(), 'isBase64Encoded': True}
+    return wrapper
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.lower().split(','):
+        name, _, parameters = part.partition(';')
+        weight = 1.0
+        for parameter in parameters.split(';'):
+            key, _, value = parameter.strip().partition('=')
+            if key == 'q':
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        if name.strip():
+            weights[name.strip()] = weight
+    
+    best, best_weight = None, 0.0
+    for encoding in (('br', 'gzip') if brotli else ('gzip',)):
+        weight = weights.get(encoding, weights.get('*', 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+# <<< shared/blocks/compression.py
+
+
+# >>> shared/blocks/pool.py (copied by shared/sync.py, edit the block and re-run)
+_pool: Optional[pool.ThreadedConnectionPool] = None
+_last_used: Dict[int, float] = {}
+
+
+def get_connection():
+    global _pool
+    started = time.perf_counter()
+    try:
+        if _pool is None or _pool.closed:
+            _pool = pool.ThreadedConnectionPool(
+                DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, os.environ.get('DATABASE_URL'), cursor_factory=TimingCursor
+            )
+        for _ in range(DB_POOL_MAX_SIZE):
+            conn = _pool.getconn()
+            if connection_is_healthy(conn):
+                return conn
+            discard_connection(conn)
+        return _pool.getconn()
+    finally:
+        record_phase('connect', started)
+
+
+def release_connection(conn) -> None:
+    if conn.closed:
+        discard_connection(conn)
+        return
+    _last_used[id(conn)] = time.monotonic()
+    _pool.putconn(conn)
+
+
+def discard_connection(conn) -> None:
+    _last_used.pop(id(conn), None)
+    _pool.putconn(conn, close=True)
+
+
+def connection_is_healthy(conn) -> bool:
+    if conn.closed or conn.info.transaction_status == extensions.TRANSACTION_STATUS_UNKNOWN:
+        return False
+    last_used = _last_used.get(id(conn))
+    if last_used is None or time.monotonic() - last_used < DB_POOL_HEALTHCHECK_INTERVAL:
+        return True
+    try:
+        with conn.cursor() as cur:
+            cur.execute('SELECT 1')
+        conn.rollback()
+    except psycopg2.Error:
+        return False
+    return True
+# <<< shared/blocks/pool.py
+
+
+_router = Router('resource', 'properties')
+extras = LazyModule('psycopg2.extras')
+
+
+@instrumented
+@compressed
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     '''
     Business: API для управления объектами недвижимости
@@ -12,176 +794,845 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     Returns: HTTP response с данными объектов
     '''
     method: str = event.get('httpMethod', 'GET')
+    params = event.get('queryStringParameters') or {}
+    handle, response = _router.resolve(method, params)
+    if response:
+        return response
     
-    if method == 'OPTIONS':
+    try:
+        fields = _property_encoder.parse_fields(params.get('fields'))
+    except ValueError:
         return {
-            'statusCode': 200,
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type, X-Broker-Id',
-                'Access-Control-Max-Age': '86400'
-            },
-            'body': '',
+            'statusCode': 400,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': 'fields must be a comma-separated list of property columns'}),
             'isBase64Encoded': False
         }
     
-    dsn = os.environ.get('DATABASE_URL')
-    conn = psycopg2.connect(dsn)
+    conn = get_connection()
     conn.autocommit = True
     
     try:
-        if method == 'GET':
-            property_id = event.get('queryStringParameters', {}).get('id')
-            broker_id = event.get('queryStringParameters', {}).get('brokerId')
-            
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                if property_id:
-                    cur.execute("SELECT * FROM properties WHERE id = %s", (property_id,))
-                    prop = cur.fetchone()
-                    if not prop:
-                        return {
-                            'statusCode': 404,
-                            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                            'body': json.dumps({'error': 'Property not found'}),
-                            'isBase64Encoded': False
-                        }
-                    return {
-                        'statusCode': 200,
-                        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                        'body': json.dumps(dict(prop), default=str),
-                        'isBase64Encoded': False
-                    }
-                elif broker_id:
-                    cur.execute("SELECT * FROM properties WHERE broker_id = %s ORDER BY created_at DESC", (broker_id,))
-                    props = cur.fetchall()
-                    return {
-                        'statusCode': 200,
-                        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                        'body': json.dumps([dict(p) for p in props], default=str),
-                        'isBase64Encoded': False
-                    }
-                else:
-                    cur.execute("SELECT * FROM properties WHERE status = 'active' ORDER BY created_at DESC LIMIT 100")
-                    props = cur.fetchall()
-                    return {
-                        'statusCode': 200,
-                        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                        'body': json.dumps([dict(p) for p in props], default=str),
-                        'isBase64Encoded': False
-                    }
-        
-        elif method == 'POST':
-            body_data = json.loads(event.get('body', '{}'))
-            property_id = str(uuid.uuid4())
-            
-            with conn.cursor() as cur:
-                cur.execute("""
-                    INSERT INTO properties (
-                        id, broker_id, title, description, property_type, status,
-                        location_city, location_district, location_address, location_metro, location_metro_distance,
-                        pricing_total_price, pricing_price_per_meter, pricing_min_investment, pricing_currency,
-                        financing_method, financing_mortgage_rate, financing_down_payment,
-                        investment_strategies, investment_expected_return, investment_term, 
-                        investment_risk_level, investment_target_investment,
-                        details_area, details_rooms, details_floor, details_total_floors,
-                        media_images
-                    ) VALUES (
-                        %s, %s, %s, %s, %s, %s,
-                        %s, %s, %s, %s, %s,
-                        %s, %s, %s, %s,
-                        %s, %s, %s,
-                        %s, %s, %s, %s, %s,
-                        %s, %s, %s, %s,
-                        %s
-                    )
-                """, (
-                    property_id,
-                    body_data['brokerId'],
-                    body_data['title'],
-                    body_data['description'],
-                    body_data['propertyType'],
-                    body_data.get('status', 'draft'),
-                    body_data['location']['city'],
-                    body_data['location'].get('district'),
-                    body_data['location']['address'],
-                    body_data['location'].get('metro'),
-                    body_data['location'].get('metroDistance'),
-                    body_data['pricing']['totalPrice'],
-                    body_data['pricing'].get('pricePerMeter'),
-                    body_data['pricing']['minInvestment'],
-                    body_data['pricing'].get('currency', 'RUB'),
-                    body_data['financing']['method'],
-                    body_data['financing'].get('mortgageRate'),
-                    body_data['financing'].get('downPayment'),
-                    json.dumps(body_data['investment']['strategy']),
-                    body_data['investment']['expectedReturn'],
-                    body_data['investment']['term'],
-                    body_data['investment']['riskLevel'],
-                    body_data['investment']['targetInvestment'],
-                    body_data['details'].get('area'),
-                    body_data['details'].get('rooms'),
-                    body_data['details'].get('floor'),
-                    body_data['details'].get('totalFloors'),
-                    json.dumps(body_data.get('media', {}).get('images', []))
-                ))
-            
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                cur.execute("SELECT * FROM properties WHERE id = %s", (property_id,))
-                prop = cur.fetchone()
+        return handle(conn, event, params, fields)
+    
+    finally:
+        flush_views(conn)
+        release_connection(conn)
+
+
+@_router.route('properties', 'GET')
+def get_properties(conn, event: Dict[str, Any], params: Dict[str, str], fields: Tuple[str, ...]) -> Dict[str, Any]:
+    columns = ', '.join(fields)
+    
+    property_id = params.get('id')
+    broker_id = params.get('brokerId')
+    
+    with conn.cursor() as cur:
+        if params.get('ids'):
+            try:
+                ids = parse_id_list(params['ids'])
+            except ValueError:
+                return {
+                    'statusCode': 400,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'body': json.dumps({'error': f'ids must contain 1-{MAX_BATCH_IDS} comma-separated values'}),
+                    'isBase64Encoded': False
+                }
             
+            cur.execute(f"SELECT {columns}, id FROM properties WHERE id = ANY(%s)", (ids,))
             return {
-                'statusCode': 201,
+                'statusCode': 200,
                 'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                'body': json.dumps(dict(prop), default=str),
+                'body': order_by_ids(ids, cur.fetchall(), fields),
                 'isBase64Encoded': False
             }
-        
-        elif method == 'PUT':
-            body_data = json.loads(event.get('body', '{}'))
-            property_id = body_data.get('id')
+        elif params.get('bbox') or params.get('near'):
+            return geo_response(event, cur, params, fields)
+        elif property_id:
+            cur.execute(f"SELECT {columns} FROM properties WHERE id = %s", (property_id,))
+            prop = cur.fetchone()
+            if not prop:
+                return {
+                    'statusCode': 404,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'body': json.dumps({'error': 'Property not found'}),
+                    'isBase64Encoded': False
+                }
+            _view_counter.record(property_id)
+            return {
+                'statusCode': 200,
+                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                'body': _property_encoder.encode_row(prop, fields),
+                'isBase64Encoded': False
+            }
+        else:
+            if broker_id and params.get('export'):
+                return export_rows(conn, 'properties', PROPERTY_SELECT, _property_encoder, broker_id, params)
             
-            if not property_id:
+            search = (params.get('q') or '').strip() if not broker_id else ''
+            try:
+                limit, after = parse_page_params(params, key_type=float if search else datetime.fromisoformat)
+            except ValueError:
                 return {
                     'statusCode': 400,
                     'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                    'body': json.dumps({'error': 'Property ID required'}),
+                    'body': json.dumps({'error': 'Invalid pagination parameters'}),
                     'isBase64Encoded': False
                 }
             
-            with conn.cursor() as cur:
-                cur.execute("""
-                    UPDATE properties 
-                    SET title = %s, description = %s, status = %s,
-                        pricing_total_price = %s, pricing_min_investment = %s,
-                        updated_at = CURRENT_TIMESTAMP
-                    WHERE id = %s
-                """, (
-                    body_data['title'],
-                    body_data['description'],
-                    body_data['status'],
-                    body_data['pricing']['totalPrice'],
-                    body_data['pricing']['minInvestment'],
-                    property_id
-                ))
+            if broker_id:
+                keyset = keyset_condition(after)
+                cur.execute(f"""
+                    SELECT {columns}, created_at, id FROM properties WHERE broker_id = %s {keyset['query']}
+                    ORDER BY created_at DESC, id DESC LIMIT %s
+                """, [broker_id] + keyset['params'] + [limit + 1])
+                props, next_cursor = paginate(cur.fetchall(), limit)
+                return {
+                    'statusCode': 200,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*', **cursor_headers(next_cursor)},
+                    'body': _property_encoder.encode_rows(props, fields),
+                    'isBase64Encoded': False
+                }
             
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                cur.execute("SELECT * FROM properties WHERE id = %s", (property_id,))
-                prop = cur.fetchone()
+            cache_key = (fields, search, limit, after)
+            cached = _catalog_cache.get(cache_key)
+            if cached:
+                return conditional_response(event, cached)
             
-            return {
+            if search:
+                keyset = keyset_condition(after, 'ts_rank_cd(p.search_vector, q.query)::float8', 'p.id')
+                cur.execute(f"""
+                    SELECT {columns}, search_rank,
+                           ts_headline('russian', description, query, '{SEARCH_HEADLINE_OPTIONS}') AS search_snippet,
+                           search_rank, id
+                    FROM (
+                        SELECT p.*, q.query, ts_rank_cd(p.search_vector, q.query)::float8 AS search_rank
+                        FROM properties p
+                        CROSS JOIN (SELECT catalog_search_query(%s) AS query) q
+                        WHERE p.status = 'active' AND p.search_vector @@ q.query {keyset['query']}
+                        ORDER BY search_rank DESC, p.id DESC LIMIT %s
+                    ) ranked
+                    ORDER BY search_rank DESC, id DESC
+                """, [search] + keyset['params'] + [limit + 1])
+                props, next_cursor = paginate(cur.fetchall(), limit)
+                body = _property_encoder.encode_rows(props, fields, SEARCH_EXTRA_COLUMNS)
+            else:
+                keyset = keyset_condition(after)
+                cur.execute(f"""
+                    SELECT {columns}, created_at, id FROM properties WHERE status = 'active' {keyset['query']}
+                    ORDER BY created_at DESC, id DESC LIMIT %s
+                """, keyset['params'] + [limit + 1])
+                props, next_cursor = paginate(cur.fetchall(), limit)
+                body = _property_encoder.encode_rows(props, fields)
+            response = with_etag({
                 'statusCode': 200,
-                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                'body': json.dumps(dict(prop), default=str),
+                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*', **cursor_headers(next_cursor)},
+                'body': body,
                 'isBase64Encoded': False
-            }
+            })
+            _catalog_cache.set(cache_key, response)
+            return conditional_response(event, response)
+
+
+@_router.route('properties', 'POST')
+def create_property(conn, event: Dict[str, Any], params: Dict[str, str], fields: Tuple[str, ...]) -> Dict[str, Any]:
+    columns = ', '.join(fields)
+    
+    if params.get('mode') == 'bulk':
+        return import_properties(conn, event, params)
+    
+    body_data = json.loads(event.get('body', '{}'))
+    property_id = str(uuid.uuid4())
+    
+    with conn.cursor() as cur:
+        cur.execute(f"""
+            INSERT INTO properties ({', '.join(PROPERTY_INSERT_COLUMNS)})
+            VALUES ({', '.join(['%s'] * len(PROPERTY_INSERT_COLUMNS))})
+            RETURNING {columns}
+        """, property_values(body_data, property_id))
+        prop = cur.fetchone()
+    _catalog_cache.clear()
+    
+    return {
+        'statusCode': 201,
+        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+        'body': _property_encoder.encode_row(prop, fields),
+        'isBase64Encoded': False
+    }
+
+
+@_router.route('properties', 'PUT')
+def update_property(conn, event: Dict[str, Any], params: Dict[str, str], fields: Tuple[str, ...]) -> Dict[str, Any]:
+    columns = ', '.join(fields)
+    
+    body_data = json.loads(event.get('body', '{}'))
+    property_id = body_data.get('id')
+    
+    if not property_id:
+        return {
+            'statusCode': 400,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': 'Property ID required'}),
+            'isBase64Encoded': False
+        }
+    
+    with conn.cursor() as cur:
+        cur.execute(f"""
+            UPDATE properties 
+            SET title = %s, description = %s, status = %s,
+                pricing_total_price = %s, pricing_min_investment = %s,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE id = %s
+            RETURNING {columns}
+        """, (
+            body_data['title'],
+            body_data['description'],
+            body_data['status'],
+            body_data['pricing']['totalPrice'],
+            body_data['pricing']['minInvestment'],
+            property_id
+        ))
+        prop = cur.fetchone()
+    
+    if not prop:
+        return {
+            'statusCode': 404,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': 'Property not found'}),
+            'isBase64Encoded': False
+        }
+    _catalog_cache.clear()
+    
+    return {
+        'statusCode': 200,
+        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+        'body': _property_encoder.encode_row(prop, fields),
+        'isBase64Encoded': False
+    }
+
+
+def parse_page_params(
+    params: Dict[str, str], default_limit: int = DEFAULT_PAGE_LIMIT, max_limit: int = MAX_PAGE_LIMIT,
+    key_type: Callable[[Any], Any] = datetime.fromisoformat
+) -> Tuple[int, Optional[Tuple[Any, str]]]:
+    limit = int(params.get('limit', default_limit))
+    if not 1 <= limit <= max_limit:
+        raise ValueError('limit out of range')
+    
+    cursor = params.get('cursor')
+    if not cursor:
+        return limit, None
+    try:
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        return limit, (key_type(sort_value), str(row_id))
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+
+
+def keyset_condition(
+    after: Optional[Tuple[Any, str]], sort_column: str = 'created_at', id_column: str = 'id'
+) -> Dict[str, Any]:
+    if not after:
+        return {'query': '', 'params': []}
+    return {'query': f"AND ({sort_column}, {id_column}) < (%s, %s)", 'params': list(after)}
+
+
+def paginate(rows: List[Tuple[Any, ...]], limit: int) -> Tuple[List[Tuple[Any, ...]], Optional[str]]:
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_page_cursor(rows[-1][-2], rows[-1][-1])
+
+
+def encode_page_cursor(sort_value: Any, row_id: str) -> str:
+    raw = json.dumps([sort_value.isoformat() if isinstance(sort_value, datetime) else sort_value, row_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def cursor_headers(next_cursor: Optional[str]) -> Dict[str, str]:
+    if not next_cursor:
+        return {}
+    return {'X-Next-Cursor': next_cursor, 'Access-Control-Expose-Headers': 'X-Next-Cursor'}
+
+
+# >>> shared/blocks/etag.py (copied by shared/sync.py, edit the block and re-run)
+def with_etag(response: Dict[str, Any]) -> Dict[str, Any]:
+    etag = '"' + hashlib.sha1(response['body'].encode()).hexdigest() + '"'
+    return {**response, 'headers': {**response['headers'], 'ETag': etag}}
+
+
+def conditional_response(event: Dict[str, Any], response: Dict[str, Any]) -> Dict[str, Any]:
+    headers = {k.lower(): v for k, v in (event.get('headers') or {}).items()}
+    if_none_match = headers.get('if-none-match')
+    if not if_none_match:
+        return response
+    
+    etag = response['headers']['ETag']
+    candidates = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+    if '*' in candidates or etag in candidates:
+        return {
+            'statusCode': 304,
+            'headers': {'ETag': etag, 'Access-Control-Allow-Origin': '*'},
+            'body': '',
+            'isBase64Encoded': False
+        }
+    return response
+# <<< shared/blocks/etag.py
+
+
+def property_values(body_data: Dict[str, Any], property_id: str) -> Tuple[Any, ...]:
+    location = body_data['location']
+    pricing = body_data['pricing']
+    financing = body_data['financing']
+    investment = body_data['investment']
+    details = body_data.get('details') or {}
+    coordinates = location.get('coordinates') or {}
+    metadata = body_data.get('metadata') or {}
+    external_id = metadata.get('externalId')
+    return (
+        property_id,
+        body_data['brokerId'],
+        body_data['title'],
+        body_data['description'],
+        body_data['propertyType'],
+        body_data.get('status') or 'draft',
+        location['city'],
+        location.get('district'),
+        location['address'],
+        location.get('metro'),
+        location.get('metroDistance'),
+        coordinates.get('lat'),
+        coordinates.get('lng'),
+        pricing['totalPrice'],
+        pricing.get('pricePerMeter'),
+        pricing['minInvestment'],
+        pricing.get('currency', 'RUB'),
+        financing['method'],
+        financing.get('mortgageRate'),
+        financing.get('downPayment'),
+        json.dumps(investment['strategy']),
+        investment['expectedReturn'],
+        investment['term'],
+        investment['riskLevel'],
+        investment['targetInvestment'],
+        details.get('area'),
+        details.get('rooms'),
+        details.get('floor'),
+        details.get('totalFloors'),
+        json.dumps((body_data.get('media') or {}).get('images') or []),
+        metadata.get('source'),
+        str(external_id) if external_id is not None else None
+    )
+
+
+def validate_property(body_data: Any) -> Optional[str]:
+    if not isinstance(body_data, dict):
+        return 'Row must be a JSON object'
+    
+    for path in PROPERTY_SECTIONS:
+        value = field_value(body_data, path)
+        if value is not None and not isinstance(value, dict):
+            return f"Field {'.'.join(path)} must be an object"
+    
+    for path in PROPERTY_REQUIRED_FIELDS:
+        value = field_value(body_data, path)
+        if value is None or value == '':
+            return f"Missing field: {'.'.join(path)}"
+    
+    for path in PROPERTY_TEXT_FIELDS:
+        value = field_value(body_data, path)
+        if value is not None and not isinstance(value, str):
+            return f"Field {'.'.join(path)} must be a string"
+    
+    for path, kind in PROPERTY_NUMERIC_FIELDS:
+        error = numeric_field_error('.'.join(path), field_value(body_data, path), kind)
+        if error:
+            return error
+    
+    for path, allowed in PROPERTY_ENUM_FIELDS:
+        value = field_value(body_data, path)
+        if value is not None and (not isinstance(value, str) or value not in allowed):
+            return f"Unknown {'.'.join(path)}: {value}"
+    
+    images = field_value(body_data, ('media', 'images'))
+    if images is not None and not isinstance(images, list):
+        return 'Field media.images must be a list'
+    
+    metadata = body_data.get('metadata')
+    if not isinstance(metadata, dict) or not metadata.get('source') or metadata.get('externalId') in (None, ''):
+        return 'Missing field: metadata.source or metadata.externalId'
+    if not isinstance(metadata['source'], str) or not isinstance(metadata['externalId'], (str, int)):
+        return 'Field metadata.source must be a string and metadata.externalId a string or integer'
+    return None
+
+
+def field_value(body_data: Dict[str, Any], path: Tuple[str, ...]) -> Any:
+    value = body_data
+    for key in path:
+        value = value.get(key) if isinstance(value, dict) else None
+    return value
+
+
+def numeric_field_error(name: str, value: Any, kind: str) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return f'Field {name} must be a number'
+    if isinstance(value, float) and not math.isfinite(value):
+        return f'Field {name} must be a finite number'
+    if kind == 'int' and (value != int(value) or not PG_INTEGER_MIN <= value <= PG_INTEGER_MAX):
+        return f'Field {name} must be an integer'
+    return None
+
+
+def parse_bulk_rows(body: str) -> List[Any]:
+    if body.lstrip().startswith('['):
+        return json.loads(body)
+    
+    rows = []
+    for line in body.splitlines():
+        if not line.strip():
+            continue
+        try:
+            rows.append(json.loads(line))
+        except ValueError:
+            rows.append(None)
+    return rows
+
+
+def flush_views(conn) -> None:
+    if conn.closed or conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+        return
+    
+    if _view_counter.due():
+        views = _view_counter.drain()
+        try:
+            with conn.cursor() as cur:
+                extras.execute_values(cur, VIEW_FLUSH_SQL, views, template='(%s, %s::integer)', page_size=len(views))
+            if not conn.autocommit:
+                conn.commit()
+        except psycopg2.Error:
+            conn.rollback()
+            _view_counter.restore(views)
+            return
+    
+    if _view_counter.sync_due():
+        ids = _view_counter.drain_unsynced()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(VIEW_SYNC_SQL, (ids,))
+                cur.execute(VIEW_RETENTION_SQL, (MAX_TRENDING_HOURS,))
+            if not conn.autocommit:
+                conn.commit()
+        except psycopg2.Error:
+            conn.rollback()
+            _view_counter.restore_unsynced(ids)
+
+
+@_router.route('properties', 'GET', action='views')
+def views_response(conn, event: Dict[str, Any], params: Dict[str, str], fields: Tuple[str, ...]) -> Dict[str, Any]:
+    try:
+        ids = parse_id_list(params.get('ids') or '')
+        hours = int(params.get('hours', DEFAULT_TRENDING_HOURS))
+        if not 1 <= hours <= MAX_TRENDING_HOURS:
+            raise ValueError('hours out of range')
+    except ValueError:
+        return {
+            'statusCode': 400,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': f'ids (1-{MAX_BATCH_IDS}) and hours (1-{MAX_TRENDING_HOURS}) are required'}),
+            'isBase64Encoded': False
+        }
+    
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT p.id, COALESCE(t.views, 0), COALESCE(SUM(b.views), 0)
+            FROM properties p
+            LEFT JOIN property_view_totals t ON t.property_id = p.id
+            LEFT JOIN property_view_buckets b
+                ON b.property_id = p.id AND b.bucket >= date_trunc('hour', CURRENT_TIMESTAMP) - make_interval(hours => %s)
+            WHERE p.id = ANY(%s)
+            GROUP BY p.id, t.views
+        """, (hours, ids))
+        counts = {row[0]: row for row in cur.fetchall()}
+    
+    items = [{
+        'id': property_id,
+        'views': counts[property_id][1] + _view_counter.pending(property_id),
+        'recentViews': counts[property_id][2] + _view_counter.pending(property_id)
+    } for property_id in ids if property_id in counts]
+    
+    return {
+        'statusCode': 200,
+        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+        'body': json.dumps({'hours': hours, 'items': items, 'missing': [i for i in ids if i not in counts]}),
+        'isBase64Encoded': False
+    }
+
+
+@_router.route('properties', 'GET', action='trending')
+def trending_response(conn, event: Dict[str, Any], params: Dict[str, str], fields: Tuple[str, ...]) -> Dict[str, Any]:
+    try:
+        hours = int(params.get('hours', DEFAULT_TRENDING_HOURS))
+        limit = int(params.get('limit', DEFAULT_TRENDING_LIMIT))
+        if not 1 <= hours <= MAX_TRENDING_HOURS or not 1 <= limit <= MAX_TRENDING_LIMIT:
+            raise ValueError('trending parameters out of range')
+    except ValueError:
+        return {
+            'statusCode': 400,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': f'hours must be 1-{MAX_TRENDING_HOURS}, limit 1-{MAX_TRENDING_LIMIT}'}),
+            'isBase64Encoded': False
+        }
+    
+    cache_key = ('trending', fields, hours, limit)
+    cached = _catalog_cache.get(cache_key)
+    if cached:
+        return conditional_response(event, cached)
+    
+    with conn.cursor() as cur:
+        cur.execute(f"""
+            SELECT {', '.join(fields)}, recent.views
+            FROM properties
+            JOIN (
+                SELECT property_id, SUM(views) AS views FROM property_view_buckets
+                WHERE bucket >= date_trunc('hour', CURRENT_TIMESTAMP) - make_interval(hours => %s)
+                GROUP BY property_id
+            ) recent ON recent.property_id = properties.id
+            WHERE status = 'active'
+            ORDER BY recent.views DESC, properties.id DESC LIMIT %s
+        """, (hours, limit))
+        rows = cur.fetchall()
+    
+    response = with_etag({
+        'statusCode': 200,
+        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+        'body': _property_encoder.encode_rows(rows, fields, TRENDING_EXTRA_COLUMNS),
+        'isBase64Encoded': False
+    })
+    _catalog_cache.set(cache_key, response)
+    return conditional_response(event, response)
+
+
+@_router.route('properties', 'GET', action='market')
+def market_response(conn, event: Dict[str, Any], params: Dict[str, str], fields: Tuple[str, ...]) -> Dict[str, Any]:
+    city = params.get('city')
+    property_type = params.get('propertyType')
+    if property_type and property_type not in PROPERTY_TYPES:
+        return {
+            'statusCode': 400,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': f'propertyType must be one of {", ".join(sorted(PROPERTY_TYPES))}'}),
+            'isBase64Encoded': False
+        }
+    
+    cache_key = ('market', city, property_type)
+    cached = _catalog_cache.get(cache_key)
+    if cached:
+        return conditional_response(event, cached)
+    
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT city, property_type, metric, bucket, count FROM market_sketch_buckets
+            WHERE source = 'properties' AND count > 0
+              AND (%(city)s::text IS NULL OR city = %(city)s)
+              AND (%(type)s::text IS NULL OR property_type = %(type)s)
+            ORDER BY city, property_type, metric, bucket
+        """, {'city': city, 'type': property_type})
+        rows = cur.fetchall()
+    
+    markets: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    for (market_city, market_type, metric), buckets in itertools.groupby(rows, key=lambda row: row[:3]):
+        market = markets.setdefault((market_city, market_type), {'city': market_city, 'propertyType': market_type})
+        market[MARKET_METRICS[metric]] = sketch_quantiles([(bucket, count) for *_, bucket, count in buckets])
+    
+    response = with_etag({
+        'statusCode': 200,
+        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+        'body': json.dumps({'markets': list(markets.values())}),
+        'isBase64Encoded': False
+    })
+    _catalog_cache.set(cache_key, response)
+    return conditional_response(event, response)
+
+
+def sketch_quantiles(buckets: List[Tuple[int, int]]) -> Dict[str, Any]:
+    total = sum(count for _, count in buckets)
+    quantiles: Dict[str, Any] = {'count': total}
+    position, seen = 0, 0
+    for name, q in MARKET_QUANTILES:
+        rank = q * (total - 1)
+        while seen + buckets[position][1] <= rank:
+            seen += buckets[position][1]
+            position += 1
+        quantiles[name] = round(2 * MARKET_SKETCH_GAMMA ** buckets[position][0] / (MARKET_SKETCH_GAMMA + 1), 2)
+    return quantiles
+
+
+def import_properties(conn, event: Dict[str, Any], params: Dict[str, str]) -> Dict[str, Any]:
+    body = event.get('body') or ''
+    if event.get('isBase64Encoded'):
+        body = base64.b64decode(body).decode('utf-8')
+    
+    try:
+        rows = parse_bulk_rows(body)
+    except ValueError:
+        rows = None
+    if not isinstance(rows, list):
+        return {
+            'statusCode': 400,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': 'Body must be a JSON array or NDJSON'}),
+            'isBase64Encoded': False
+        }
+    if len(rows) > BULK_IMPORT_MAX_ROWS:
+        return {
+            'statusCode': 413,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': f'Too many rows, maximum is {BULK_IMPORT_MAX_ROWS}'}),
+            'isBase64Encoded': False
+        }
+    
+    errors: List[Dict[str, Any]] = []
+    values: List[Tuple[Any, ...]] = []
+    row_index: Dict[Tuple[str, str], int] = {}
+    candidates: List[Tuple[int, Dict[str, Any]]] = []
+    for index, row in enumerate(rows):
+        if isinstance(row, dict):
+            if params.get('brokerId'):
+                row.setdefault('brokerId', params['brokerId'])
+            if params.get('source') and isinstance(row.setdefault('metadata', {}), dict):
+                row['metadata'].setdefault('source', params['source'])
         
+        error = validate_property(row) if row is not None else 'Invalid JSON'
+        if not error:
+            key = (row['metadata']['source'], str(row['metadata']['externalId']))
+            if key in row_index:
+                error = f'Duplicate externalId, first seen in row {row_index[key]}'
+        if error:
+            errors.append({'index': index, 'error': error})
+            continue
+        
+        row_index[key] = index
+        candidates.append((index, row))
+    
+    with conn.cursor() as cur:
+        cur.execute("SELECT id FROM brokers WHERE id = ANY(%s)", (list({str(row['brokerId']) for _, row in candidates}),))
+        known_brokers = {broker_id for broker_id, in cur.fetchall()}
+    for index, row in candidates:
+        if str(row['brokerId']) not in known_brokers:
+            errors.append({'index': index, 'error': f"Unknown brokerId: {row['brokerId']}"})
+        else:
+            values.append(property_values(row, str(uuid.uuid4())))
+    
+    imported = []
+    if values:
+        conn.autocommit = False
+        with conn, conn.cursor() as cur:
+            imported = extras.execute_values(cur, PROPERTY_UPSERT_SQL, values, page_size=BULK_IMPORT_PAGE_SIZE, fetch=True)
+        _catalog_cache.clear()
+    
+    imported_keys = {(source, external_id) for source, external_id, _ in imported}
+    for row in values:
+        key = (row[-2], row[-1])
+        if key not in imported_keys:
+            errors.append({
+                'index': row_index[key],
+                'error': 'Listing with this externalId belongs to another broker'
+            })
+    
+    return {
+        'statusCode': 200,
+        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+        'body': json.dumps({
+            'inserted': sum(1 for _, _, inserted in imported if inserted),
+            'updated': sum(1 for _, _, inserted in imported if not inserted),
+            'errors': sorted(errors, key=lambda e: e['index'])
+        }),
+        'isBase64Encoded': False
+    }
+
+
+def parse_id_list(raw: str) -> List[str]:
+    ids = list(dict.fromkeys(part.strip() for part in raw.split(',') if part.strip()))
+    if not 1 <= len(ids) <= MAX_BATCH_IDS:
+        raise ValueError('ids out of range')
+    return ids
+
+
+def order_by_ids(ids: List[str], rows: List[Tuple[Any, ...]], fields: Tuple[str, ...]) -> str:
+    by_id = {row[-1]: row for row in rows}
+    items = _property_encoder.encode_rows([by_id[i] for i in ids if i in by_id], fields)
+    missing = json.dumps([i for i in ids if i not in by_id])
+    return f'{{"items": {items}, "missing": {missing}}}'
+
+
+# >>> shared/blocks/export.py (copied by shared/sync.py, edit the block and re-run)
+def export_rows(
+    conn, table: str, select: str, encoder: RowEncoder, broker_id: str, params: Dict[str, str]
+) -> Dict[str, Any]:
+    export_format = params.get('export')
+    if export_format not in EXPORT_CONTENT_TYPES:
+        return {
+            'statusCode': 400,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': 'export must be ndjson or csv'}),
+            'isBase64Encoded': False
+        }
+    try:
+        limit, after = parse_page_params(params, EXPORT_PAGE_ROWS, EXPORT_PAGE_ROWS)
+    except ValueError:
         return {
-            'statusCode': 405,
+            'statusCode': 400,
             'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({'error': 'Method not allowed'}),
+            'body': json.dumps({'error': 'Invalid pagination parameters'}),
             'isBase64Encoded': False
         }
     
-    finally:
-        conn.close()
+    keyset = keyset_condition(after)
+    output = io.StringIO()
+    writer = csv.writer(output) if export_format == 'csv' else None
+    columns: List[str] = []
+    last_key = None
+    next_cursor = None
+    
+    conn.autocommit = False
+    with conn, conn.cursor(name=f'export_{table}') as cur:
+        cur.itersize = EXPORT_FETCH_SIZE
+        cur.execute(f"""
+            SELECT {select} FROM {table} WHERE broker_id = %s {keyset['query']}
+            ORDER BY created_at DESC, id DESC LIMIT %s
+        """, [broker_id] + keyset['params'] + [limit + 1])
+        
+        for count, row in enumerate(cur):
+            if not columns:
+                columns = [column[0] for column in cur.description]
+                created_at_index, id_index = columns.index('created_at'), columns.index('id')
+                if writer and not after:
+                    writer.writerow(columns)
+            if count == limit:
+                next_cursor = encode_page_cursor(*last_key)
+                break
+            
+            if writer:
+                writer.writerow([
+                    '' if value is None else json.dumps(value) if isinstance(value, (dict, list)) else value
+                    for value in row
+                ])
+            else:
+                output.write(encoder.encode_row(row, encoder.default_fields))
+                output.write('\n')
+            last_key = (row[created_at_index], row[id_index])
+    
+    filename = EXPORT_FILENAME_UNSAFE.sub('_', f'{table}-{broker_id}')
+    return {
+        'statusCode': 200,
+        'headers': {
+            'Content-Type': EXPORT_CONTENT_TYPES[export_format],
+            'Content-Disposition': f'attachment; filename="{filename}.{export_format}"',
+            'Access-Control-Allow-Origin': '*',
+            **cursor_headers(next_cursor)
+        },
+        'body': output.getvalue(),
+        'isBase64Encoded': False
+    }
+# <<< shared/blocks/export.py
+
+
+def parse_coordinates(raw: str, count: int) -> List[float]:
+    values = [float(v) for v in raw.split(',')]
+    if len(values) != count or not all(math.isfinite(v) for v in values):
+        raise ValueError('Invalid coordinates')
+    return values
+
+
+def valid_point(lat: float, lng: float) -> bool:
+    return -90 <= lat <= 90 and -180 <= lng <= 180
+
+
+def geo_response(event: Dict[str, Any], cur, params: Dict[str, str], fields: Tuple[str, ...]) -> Dict[str, Any]:
+    try:
+        if params.get('near'):
+            lat, lng = parse_coordinates(params['near'], 2)
+            radius = float(params.get('radius', 1000))
+            limit = int(params.get('limit', DEFAULT_PAGE_LIMIT))
+            if not valid_point(lat, lng) or not 0 < radius <= MAX_SEARCH_RADIUS_M or not 1 <= limit <= MAX_PAGE_LIMIT:
+                raise ValueError('Invalid near parameters')
+        else:
+            min_lng, min_lat, max_lng, max_lat = parse_coordinates(params['bbox'], 4)
+            if not valid_point(min_lat, min_lng) or not valid_point(max_lat, max_lng) or min_lng > max_lng or min_lat > max_lat:
+                raise ValueError('Invalid bbox')
+            zoom = int(params['zoom']) if params.get('zoom') else None
+            if zoom is not None and not 0 <= zoom <= MAX_CLUSTER_ZOOM:
+                raise ValueError('Invalid zoom')
+            limit, after = parse_page_params(params)
+    except ValueError:
+        return {
+            'statusCode': 400,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': 'Invalid geo parameters: use near=lat,lng&radius=meters or bbox=minLng,minLat,maxLng,maxLat'}),
+            'isBase64Encoded': False
+        }
+    
+    if params.get('near'):
+        lat_delta = radius / METERS_PER_DEGREE
+        lng_delta = radius / (METERS_PER_DEGREE * max(math.cos(math.radians(lat)), 0.01))
+        cur.execute(f"""
+            SELECT * FROM (
+                SELECT {', '.join(fields)},
+                       2 * {EARTH_RADIUS_M} * asin(least(1, sqrt(
+                           power(sin(radians(location_lat::float8 - %s) / 2), 2)
+                           + cos(radians(%s)) * cos(radians(location_lat::float8))
+                           * power(sin(radians(location_lng::float8 - %s) / 2), 2)
+                       ))) AS distance_m,
+                       id AS row_id
+                FROM properties WHERE {GEO_CONDITION}
+            ) nearby
+            WHERE distance_m <= %s
+            ORDER BY distance_m, row_id LIMIT %s
+        """, [lat, lat, lng, lng - lng_delta, lat - lat_delta, lng + lng_delta, lat + lat_delta, radius, limit])
+        return {
+            'statusCode': 200,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': _property_encoder.encode_rows(cur.fetchall(), fields, GEO_EXTRA_COLUMNS),
+            'isBase64Encoded': False
+        }
+    
+    if zoom is None:
+        keyset = keyset_condition(after)
+        cur.execute(f"""
+            SELECT {', '.join(fields)}, created_at, id FROM properties WHERE {GEO_CONDITION} {keyset['query']}
+            ORDER BY created_at DESC, id DESC LIMIT %s
+        """, [min_lng, min_lat, max_lng, max_lat] + keyset['params'] + [limit + 1])
+        props, next_cursor = paginate(cur.fetchall(), limit)
+        return {
+            'statusCode': 200,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*', **cursor_headers(next_cursor)},
+            'body': _property_encoder.encode_rows(props, fields),
+            'isBase64Encoded': False
+        }
+    
+    cache_key = ('clusters', zoom, min_lng, min_lat, max_lng, max_lat)
+    cached = _catalog_cache.get(cache_key)
+    if cached:
+        return conditional_response(event, cached)
+    
+    cell_size = 360.0 / (2 ** zoom) / CLUSTER_CELLS_PER_TILE
+    cur.execute(f"""
+        SELECT COUNT(*) AS count, AVG(location_lat::float8) AS lat, AVG(location_lng::float8) AS lng,
+               CASE WHEN COUNT(*) = 1 THEN MIN(id) END AS property_id
+        FROM properties WHERE {GEO_CONDITION}
+        GROUP BY floor(location_lng::float8 / %s), floor(location_lat::float8 / %s)
+    """, [min_lng, min_lat, max_lng, max_lat, cell_size, cell_size])
+    clusters = [{
+        'lat': lat, 'lng': lng, 'count': count, 'propertyId': property_id
+    } for count, lat, lng, property_id in cur.fetchall()]
+    
+    response = with_etag({
+        'statusCode': 200,
+        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+        'body': json.dumps({'zoom': zoom, 'cellSize': cell_size, 'clusters': clusters}),
+        'isBase64Encoded': False
+    })
+    _catalog_cache.set(cache_key, response)
+    return conditional_response(event, response)
@@ -0,0 +1,308 @@
+import argparse
+import importlib.util
+import json
+import logging
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List
+
+BENCH_DIR = Path(__file__).resolve().parent
+REPO_ROOT = BENCH_DIR.parent
+RESULTS_DIR = BENCH_DIR / 'results'
+COLD_START_BUDGET_MS = 250.0
+COMPRESSED_FUNCTIONS = ('brokers', 'investors', 'properties')
+
+sys.path.insert(0, str(BENCH_DIR))
+
+from compression import measure, recommend  # noqa: E402
+from datagen import DEFAULT_SIZES, generate  # noqa: E402
+from plans import PLANNER_OVERRIDES, check_plans  # noqa: E402
+from scenarios import SCENARIOS, SCENARIOS_BY_NAME, collect_samples  # noqa: E402
+
+
+def load_module(function: str):
+    spec = importlib.util.spec_from_file_location(f'bench_{function}', REPO_ROOT / 'backend' / function / 'index.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_handler(function: str):
+    return load_module(function).handler
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    return statistics.quantiles(sorted_values, n=100, method='inclusive')[int(q) - 1]
+
+
+def run_worker(name: str, samples: Dict[str, Any], iterations: int, warmup: int) -> Dict[str, Any]:
+    scenario = SCENARIOS_BY_NAME[name]
+    handler = load_handler(scenario.function)
+    for i in range(warmup):
+        handler(scenario.build(samples, i), None)
+
+    latencies = []
+    errors = 0
+    response_bytes = 0
+    started = time.perf_counter()
+    for i in range(iterations):
+        event = scenario.build(samples, warmup + i)
+        call_started = time.perf_counter_ns()
+        response = handler(event, None)
+        latencies.append((time.perf_counter_ns() - call_started) / 1e6)
+        if response['statusCode'] >= 400:
+            errors += 1
+        response_bytes += len(response.get('body') or '')
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'name': name,
+        'function': scenario.function,
+        'iterations': iterations,
+        'errors': errors,
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'mean_ms': round(statistics.fmean(latencies), 3),
+        'max_ms': round(latencies[-1], 3),
+        'throughput_rps': round(iterations / elapsed, 1),
+        'avg_response_bytes': response_bytes // iterations,
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    }
+
+
+def git_revision() -> Dict[str, Any]:
+    def git(*args: str) -> str:
+        result = subprocess.run(['git', *args], cwd=REPO_ROOT, capture_output=True, text=True)
+        return result.stdout.strip()
+    return {'commit': git('rev-parse', 'HEAD'), 'dirty': bool(git('status', '--porcelain', '--', 'backend', 'db_migrations'))}
+
+
+def dataset_counts(dsn: str) -> Dict[str, int]:
+    import psycopg2
+    conn = psycopg2.connect(dsn)
+    try:
+        with conn.cursor() as cur:
+            counts = {}
+            for table in DEFAULT_SIZES:
+                cur.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", (table,))
+                counts[table] = cur.fetchone()[0]
+            return counts
+    finally:
+        conn.close()
+
+
+def command_seed(args: argparse.Namespace) -> None:
+    sizes = {table: int(args.sizes.get(table, default) * args.scale) for table, default in DEFAULT_SIZES.items()}
+    print(f'Seeding {sizes}', file=sys.stderr)
+    generate(args.dsn, sizes, args.seed, log=lambda line: print(line, file=sys.stderr))
+
+
+def command_run(args: argparse.Namespace) -> None:
+    names = [s.name for s in SCENARIOS if not args.only or any(s.name.startswith(p) for p in args.only)]
+    samples = collect_samples(args.dsn)
+    env = {**os.environ, 'DATABASE_URL': args.dsn, **({'CATALOG_CACHE_SIZE': '0'} if args.no_cache else {})}
+    results = []
+    for name in names:
+        completed = subprocess.run(
+            [sys.executable, __file__, 'worker', name, '--iterations', str(args.iterations), '--warmup', str(args.warmup)],
+            input=json.dumps(samples), capture_output=True, text=True, env={**env, **SCENARIOS_BY_NAME[name].env}
+        )
+        if completed.returncode != 0:
+            print(f'{name}: failed\n{completed.stderr}', file=sys.stderr)
+            results.append({'name': name, 'failed': True, 'stderr': completed.stderr[-2000:]})
+            continue
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        results.append(result)
+        print(
+            f"{name:36} p50 {result['p50_ms']:>9.2f}  p95 {result['p95_ms']:>9.2f}  p99 {result['p99_ms']:>9.2f} ms"
+            f"  {result['throughput_rps']:>8.1f} rps  {result['peak_rss_mb']:>7.1f} MB"
+            + (f"  errors {result['errors']}" if result['errors'] else ''),
+            file=sys.stderr
+        )
+
+    report = {
+        **git_revision(),
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'iterations': args.iterations,
+        'warmup': args.warmup,
+        'response_cache': not args.no_cache,
+        'dataset': dataset_counts(args.dsn),
+        'scenarios': results
+    }
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{datetime.now():%Y%m%d-%H%M%S}-{report['commit'][:8]}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, ensure_ascii=False) + '\n')
+    print(output)
+
+
+def command_compare(args: argparse.Namespace) -> None:
+    base, head = (json.loads(Path(path).read_text()) for path in (args.base, args.head))
+    base_by_name = {s['name']: s for s in base['scenarios'] if not s.get('failed')}
+    print(f"{'scenario':36} {'metric':>6} {'base':>10} {'head':>10} {'change':>8}")
+    for scenario in head['scenarios']:
+        previous = base_by_name.get(scenario['name'])
+        if not previous or scenario.get('failed'):
+            continue
+        for metric in ('p50_ms', 'p95_ms', 'p99_ms', 'peak_rss_mb'):
+            change = (scenario[metric] - previous[metric]) / previous[metric] * 100 if previous[metric] else 0.0
+            flag = ' !' if metric != 'peak_rss_mb' and change > args.threshold else ''
+            print(
+                f"{scenario['name']:36} {metric[:-3]:>6} {previous[metric]:>10.2f} {scenario[metric]:>10.2f} "
+                f"{change:>+7.1f}%{flag}"
+            )
+
+
+def command_explain(args: argparse.Namespace) -> None:
+    os.environ['DATABASE_URL'] = args.dsn
+    results = check_plans(args.dsn, load_module('api'), natural=args.natural)
+    for result in results:
+        params = '&'.join(f'{k}={v}' for k, v in result['params'].items())
+        status = 'ok  ' if result['ok'] else 'FAIL'
+        print(f"{status} {params:70} {result['scan'] or ', '.join(result['indexes']) or 'no index'}")
+    failed = [r for r in results if not r['ok']]
+    if failed:
+        print(f'{len(failed)} of {len(results)} hot shapes are not served by their index', file=sys.stderr)
+        sys.exit(1)
+
+
+def command_coldstart(args: argparse.Namespace) -> None:
+    samples = collect_samples(args.dsn)
+    env = {**os.environ, 'DATABASE_URL': args.dsn}
+    first_scenarios = {}
+    for scenario in SCENARIOS:
+        first_scenarios.setdefault(scenario.function, scenario)
+
+    over_budget = []
+    for function, scenario in first_scenarios.items():
+        runs = []
+        for _ in range(args.runs):
+            completed = subprocess.run(
+                [sys.executable, str(BENCH_DIR / 'coldstart.py'), str(REPO_ROOT / 'backend' / function / 'index.py')],
+                input=json.dumps(scenario.build(samples, len(runs))), capture_output=True, text=True, env=env
+            )
+            if completed.returncode != 0:
+                sys.exit(f'{function}: failed\n{completed.stderr}')
+            runs.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+        median = {key: statistics.median(run[key] for run in runs) for key in ('import_ms', 'preflight_ms', 'first_request_ms', 'total_ms')}
+        flag = ' !' if median['total_ms'] > args.budget_ms else ''
+        print(
+            f"{function:12} import {median['import_ms']:>7.1f}  preflight {median['preflight_ms']:>6.2f}"
+            f"  first {scenario.name} {median['first_request_ms']:>7.1f}  total {median['total_ms']:>7.1f} ms{flag}"
+        )
+        if flag:
+            over_budget.append(function)
+    if over_budget:
+        sys.exit(f"Cold start over {args.budget_ms:.0f} ms budget: {', '.join(over_budget)}")
+
+
+def command_compression(args: argparse.Namespace) -> None:
+    os.environ['DATABASE_URL'] = args.dsn
+    logging.disable(logging.CRITICAL)
+    samples = collect_samples(args.dsn)
+    bodies = []
+    for function in COMPRESSED_FUNCTIONS:
+        module = load_module(function)
+        for scenario in SCENARIOS:
+            if scenario.function != function:
+                continue
+            for i in range(args.samples):
+                response = module.handler(scenario.build(samples, i), None)
+                if not response.get('isBase64Encoded') and len(response.get('body') or '') >= module.COMPRESSION_MIN_BYTES:
+                    bodies.append(response['body'].encode())
+    if not bodies:
+        sys.exit('No response bodies above COMPRESSION_MIN_BYTES; run the seed command first')
+
+    print(f'{len(bodies)} bodies, mean {sum(map(len, bodies)) // len(bodies)} bytes, link {args.mbps:g} Mbit/s', file=sys.stderr)
+    results = measure(bodies, args.repeat, args.mbps)
+    best = recommend(results)
+    print(f"{'encoding':8} {'level':>5} {'ratio':>7} {'cpu':>8} {'saved':>8} {'net':>8}")
+    for result in results:
+        flag = ' *' if best[result['encoding']] is result else ''
+        print(
+            f"{result['encoding']:8} {result['level']:>5} {result['ratio']:>7.3f} {result['cpu_ms']:>8.3f}"
+            f" {result['saved_ms']:>8.3f} {result['net_ms']:>8.3f} ms{flag}"
+        )
+    settings = {'gzip': 'GZIP_LEVEL', 'br': 'BROTLI_QUALITY'}
+    print(' '.join(f"{settings[encoding]}={result['level']}" for encoding, result in best.items()), file=sys.stderr)
+
+
+def command_worker(args: argparse.Namespace) -> None:
+    samples = json.loads(sys.stdin.read())
+    print(json.dumps(run_worker(args.scenario, samples, args.iterations, args.warmup)))
+
+
+def parse_sizes(raw: str) -> Dict[str, int]:
+    sizes = {}
+    for part in filter(None, raw.split(',')):
+        table, _, value = part.partition('=')
+        if table not in DEFAULT_SIZES:
+            raise argparse.ArgumentTypeError(f'Unknown table {table}; expected one of {", ".join(DEFAULT_SIZES)}')
+        sizes[table] = int(value)
+    return sizes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Endpoint benchmarks for backend functions')
+    parser.add_argument('--dsn', default=os.environ.get('DATABASE_URL'), help='PostgreSQL DSN (default: $DATABASE_URL)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    seed = commands.add_parser('seed', help='Generate a synthetic dataset with COPY')
+    seed.add_argument('--scale', type=float, default=1.0, help='Multiplier for every table size')
+    seed.add_argument('--sizes', type=parse_sizes, default={}, help='Overrides, e.g. properties=100000,investors=50000')
+    seed.add_argument('--seed', type=int, default=42)
+    seed.set_defaults(func=command_seed)
+
+    run = commands.add_parser('run', help='Run scenarios, one subprocess each, and write a JSON report')
+    run.add_argument('--iterations', type=int, default=200)
+    run.add_argument('--warmup', type=int, default=20)
+    run.add_argument('--no-cache', action='store_true', help='Disable in-process response caches (CATALOG_CACHE_SIZE=0)')
+    run.add_argument('--only', nargs='*', help='Scenario name prefixes, e.g. properties. objects.search')
+    run.add_argument('--output', help=f'Report path (default: {RESULTS_DIR.relative_to(REPO_ROOT)}/<time>-<commit>.json)')
+    run.set_defaults(func=command_run)
+
+    compare = commands.add_parser('compare', help='Compare two reports')
+    compare.add_argument('base')
+    compare.add_argument('head')
+    compare.add_argument('--threshold', type=float, default=10.0, help='Flag latency regressions above this percent')
+    compare.set_defaults(func=command_compare)
+
+    explain = commands.add_parser('explain', help='Check that hot catalog shapes are served by ordered index scans')
+    explain.add_argument('--natural', action='store_true', help=f'Keep planner defaults instead of disabling {", ".join(PLANNER_OVERRIDES)}')
+    explain.set_defaults(func=command_explain)
+
+    coldstart = commands.add_parser('coldstart', help='Measure import and first-request time in fresh interpreters')
+    coldstart.add_argument('--runs', type=int, default=5)
+    coldstart.add_argument('--budget-ms', type=float, default=COLD_START_BUDGET_MS, help='Median import + first request budget')
+    coldstart.set_defaults(func=command_coldstart)
+
+    compression = commands.add_parser('compression', help='Pick gzip/brotli levels by CPU cost against bytes saved')
+    compression.add_argument('--samples', type=int, default=5, help='Responses per scenario')
+    compression.add_argument('--repeat', type=int, default=5, help='Timing runs per level, the fastest is kept')
+    compression.add_argument('--mbps', type=float, default=20.0, help='Client link bandwidth used to price saved bytes')
+    compression.set_defaults(func=command_compression)
+
+    worker = commands.add_parser('worker')
+    worker.add_argument('scenario', choices=sorted(SCENARIOS_BY_NAME))
+    worker.add_argument('--iterations', type=int, required=True)
+    worker.add_argument('--warmup', type=int, required=True)
+    worker.set_defaults(func=command_worker)
+
+    args = parser.parse_args()
+    if args.command != 'compare' and not args.dsn:
+        parser.error('--dsn or DATABASE_URL is required')
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,33 @@
+import sys
+import time
+
+started = time.perf_counter()
+
+import importlib.util  # noqa: E402
+import json  # noqa: E402
+
+
+def main() -> None:
+    path, raw_event = sys.argv[1], sys.stdin.read()
+    spec = importlib.util.spec_from_file_location('coldstart_handler', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    imported = time.perf_counter()
+
+    module.handler({'httpMethod': 'OPTIONS', 'headers': {}}, None)
+    preflight = time.perf_counter()
+    response = module.handler(json.loads(raw_event), None)
+    finished = time.perf_counter()
+
+    print(json.dumps({
+        'import_ms': round((imported - started) * 1000, 2),
+        'preflight_ms': round((preflight - imported) * 1000, 2),
+        'first_request_ms': round((finished - preflight) * 1000, 2),
+        'total_ms': round((finished - started) * 1000, 2),
+        'status': response['statusCode'],
+        'modules': len(sys.modules)
+    }))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+import gzip
+import time
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+GZIP_LEVELS = range(1, 10)
+BROTLI_QUALITIES = range(0, 12)
+
+
+def codecs() -> Iterable[Tuple[str, int, Callable[[bytes], bytes]]]:
+    for level in GZIP_LEVELS:
+        yield 'gzip', level, lambda raw, level=level: gzip.compress(raw, level, mtime=0)
+    if brotli:
+        for quality in BROTLI_QUALITIES:
+            yield 'br', quality, lambda raw, quality=quality: brotli.compress(raw, quality=quality)
+
+
+def measure(bodies: List[bytes], repeat: int, mbps: float) -> List[Dict[str, Any]]:
+    raw_bytes = sum(len(body) for body in bodies)
+    bytes_per_ms = mbps * 1000 / 8
+    results = []
+    for encoding, level, compress in codecs():
+        compressed_bytes = 0
+        best = float('inf')
+        for _ in range(repeat):
+            started = time.perf_counter()
+            sizes = [len(compress(body)) for body in bodies]
+            best = min(best, time.perf_counter() - started)
+            compressed_bytes = sum(sizes)
+        cpu_ms = best * 1000 / len(bodies)
+        saved_ms = (raw_bytes - compressed_bytes) / bytes_per_ms / len(bodies)
+        results.append({
+            'encoding': encoding,
+            'level': level,
+            'ratio': round(compressed_bytes / raw_bytes, 4),
+            'cpu_ms': round(cpu_ms, 3),
+            'saved_ms': round(saved_ms, 3),
+            'net_ms': round(saved_ms - cpu_ms, 3)
+        })
+    return results
+
+
+def recommend(results: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    best: Dict[str, Dict[str, Any]] = {}
+    for result in results:
+        current = best.get(result['encoding'])
+        if current is None or result['net_ms'] > current['net_ms']:
+            best[result['encoding']] = result
+    return best
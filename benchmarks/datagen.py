@@ -0,0 +1,289 @@
+import io
+import json
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, List, Sequence
+
+import psycopg2
+
+COPY_BATCH_ROWS = 50_000
+DATASET_PREFIX = 'bench'
+
+CITIES = [
+    ('Москва', 55.7558, 37.6173), ('Санкт-Петербург', 59.9343, 30.3351), ('Казань', 55.7961, 49.1064),
+    ('Екатеринбург', 56.8389, 60.6057), ('Новосибирск', 55.0084, 82.9357), ('Сочи', 43.6028, 39.7342),
+    ('Краснодар', 45.0355, 38.9753), ('Нижний Новгород', 56.2965, 43.9361)
+]
+DISTRICTS = ['Центральный', 'Северный', 'Южный', 'Западный', 'Восточный', 'Приморский', 'Ленинский']
+STREETS = ['Ленина', 'Мира', 'Гагарина', 'Советская', 'Пушкина', 'Садовая', 'Лесная', 'Набережная']
+TITLE_WORDS = ['Квартира', 'Апартаменты', 'Лофт', 'Студия', 'Пентхаус', 'Офис', 'Склад', 'Коттедж']
+DESCRIPTION_WORDS = [
+    'светлая', 'у метро', 'с ремонтом', 'вид на реку', 'новостройка', 'парковка', 'высокий доход',
+    'арендатор', 'охрана', 'рядом парк', 'школа', 'торговый центр', 'панорамные окна', 'терраса'
+]
+FIRST_NAMES = ['Иван', 'Анна', 'Пётр', 'Мария', 'Алексей', 'Ольга', 'Дмитрий', 'Елена', 'Сергей', 'Наталья']
+LAST_NAMES = ['Иванов', 'Смирнова', 'Кузнецов', 'Попова', 'Соколов', 'Лебедева', 'Козлов', 'Новикова']
+
+PROPERTY_TYPES = ['apartment', 'house', 'commercial', 'land', 'hotel', 'garage', 'parking', 'storage']
+PROPERTY_STATUSES = ['active'] * 7 + ['draft', 'reserved', 'sold']
+FINANCING_METHODS = ['cash', 'mortgage', 'installment', 'developer_installment', 'mixed']
+STRATEGIES = ['rental', 'resale', 'flip', 'development']
+RISK_LEVELS = ['low', 'medium', 'high']
+STAGES = ['lead'] * 4 + ['consultation'] * 3 + ['analysis'] * 2 + [
+    'offer_sent', 'negotiation', 'deal_preparation', 'active', 'inactive'
+]
+SOURCES = ['website', 'telegram', 'referral', 'vk', 'ads']
+INTERACTION_TYPES = ['call', 'email', 'meeting', 'property_view', 'offer_sent', 'note']
+OBJECT_TYPES = ['flats', 'apartments', 'commercial', 'country']
+OBJECT_STATUSES = ['available'] * 6 + ['reserved', 'sold']
+
+DEFAULT_SIZES = {
+    'brokers': 1_000,
+    'properties': 1_000_000,
+    'investors': 5_000_000,
+    'interactions': 5_000_000,
+    'users': 100_000,
+    'investment_objects': 200_000,
+    'favorites': 1_000_000
+}
+
+
+def copy_value(value: Any) -> str:
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (list, dict)):
+        value = json.dumps(value, ensure_ascii=False)
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n')
+
+
+def copy_rows(conn, table: str, columns: Sequence[str], rows: Iterator[Sequence[Any]]) -> int:
+    statement = f"COPY {table} ({', '.join(columns)}) FROM STDIN"
+    total = 0
+    buffer = io.StringIO()
+    batch = 0
+    for row in rows:
+        buffer.write('\t'.join(copy_value(value) for value in row))
+        buffer.write('\n')
+        batch += 1
+        if batch == COPY_BATCH_ROWS:
+            total += flush_copy(conn, statement, buffer)
+            buffer = io.StringIO()
+            batch = 0
+    if batch:
+        total += flush_copy(conn, statement, buffer)
+    return total
+
+
+def flush_copy(conn, statement: str, buffer: io.StringIO) -> int:
+    buffer.seek(0)
+    with conn.cursor() as cur:
+        cur.copy_expert(statement, buffer)
+        count = cur.rowcount
+    conn.commit()
+    return count
+
+
+def skewed_index(rng: random.Random, size: int) -> int:
+    return min(int(rng.paretovariate(1.2)) - 1, size - 1) if rng.random() < 0.3 else rng.randrange(size)
+
+
+def random_timestamp(rng: random.Random, now: datetime, days: int = 730) -> datetime:
+    return now - timedelta(seconds=rng.randrange(days * 86400))
+
+
+def broker_rows(rng: random.Random, count: int, now: datetime) -> Iterator[List[Any]]:
+    for i in range(count):
+        created_at = random_timestamp(rng, now, 1500)
+        yield [
+            f'{DATASET_PREFIX}-broker-{i}', f'{DATASET_PREFIX}.broker{i}@example.com',
+            rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES), f'+7900{i:07d}', f'Агентство {i % 97}',
+            f'BENCH{i:06d}', created_at, created_at
+        ]
+
+
+def property_rows(rng: random.Random, count: int, brokers: int, now: datetime) -> Iterator[List[Any]]:
+    for i in range(count):
+        city, lat, lng = rng.choice(CITIES)
+        area = round(rng.uniform(18, 250), 1)
+        price = round(area * rng.uniform(90_000, 600_000), -3)
+        expected_return = round(rng.uniform(4, 22), 1)
+        created_at = random_timestamp(rng, now)
+        words = rng.sample(DESCRIPTION_WORDS, 4)
+        row = [
+            f'{DATASET_PREFIX}-property-{i}', f'{DATASET_PREFIX}-broker-{skewed_index(rng, brokers)}',
+            f'{rng.choice(TITLE_WORDS)} {area} м² {city}', ', '.join(words).capitalize(),
+            rng.choice(PROPERTY_TYPES), rng.choice(PROPERTY_STATUSES), city, rng.choice(DISTRICTS),
+            f'ул. {rng.choice(STREETS)}, {rng.randrange(1, 200)}',
+            round(lat + rng.gauss(0, 0.08), 6), round(lng + rng.gauss(0, 0.12), 6),
+            price, round(price / area, 2), round(price * rng.choice([0.05, 0.1, 0.2]), -3),
+            rng.choice(FINANCING_METHODS), rng.sample(STRATEGIES, rng.randrange(1, 3)),
+            expected_return, rng.choice([12, 24, 36, 60]), rng.choice(RISK_LEVELS), price,
+            round(expected_return * rng.uniform(0.5, 0.9), 2), area, rng.randrange(1, 6),
+            rng.randrange(0, 5000), 'bench', str(i), created_at, created_at + timedelta(days=rng.randrange(30))
+        ]
+        financing, term, rental_yield = row[14], row[17], row[20]
+        mortgage = financing in ('mortgage', 'mixed')
+        yield row + [
+            round(price * rental_yield / 1200, -2), 80 + i % 21,
+            round(price * (1 + expected_return / 200 * term / 12), -3),
+            8 + i % 9 if mortgage else None, (10, 20, 30)[i % 3] if mortgage else None
+        ]
+
+
+def investor_rows(rng: random.Random, count: int, brokers: int, properties: int, now: datetime) -> Iterator[List[Any]]:
+    for i in range(count):
+        created_at = random_timestamp(rng, now)
+        stage = rng.choice(STAGES)
+        holdings = 5 + i % 40 if stage == 'active' and properties else 0
+        yield [
+            f'{DATASET_PREFIX}-investor-{i}', f'{DATASET_PREFIX}-broker-{skewed_index(rng, brokers)}',
+            rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES), f'{DATASET_PREFIX}.investor{i}@example.com',
+            f'+7901{i:07d}', stage, round(rng.uniform(1, 80), 1) * 1_000_000,
+            rng.sample(STRATEGIES, rng.randrange(1, 3)), rng.choice(RISK_LEVELS),
+            rng.sample(PROPERTY_TYPES, rng.randrange(1, 3)), [city for city, _, _ in rng.sample(CITIES, 2)],
+            rng.choice(SOURCES), created_at, created_at, created_at,
+            [f'{DATASET_PREFIX}-property-{(i * 7919 + j * 104729) % properties}' for j in range(holdings)]
+        ]
+
+
+def interaction_rows(rng: random.Random, count: int, investors: int, brokers: int, now: datetime) -> Iterator[List[Any]]:
+    for i in range(count):
+        created_at = random_timestamp(rng, now)
+        kind = rng.choice(INTERACTION_TYPES)
+        yield [
+            f'{DATASET_PREFIX}-interaction-{i}', f'{DATASET_PREFIX}-broker-{skewed_index(rng, brokers)}',
+            f'{DATASET_PREFIX}-investor-{skewed_index(rng, investors)}', kind,
+            rng.choice(['inbound', 'outbound']), ', '.join(rng.sample(DESCRIPTION_WORDS, 3)),
+            created_at, created_at
+        ]
+
+
+def user_rows(rng: random.Random, count: int, first_id: int, now: datetime) -> Iterator[List[Any]]:
+    for i in range(count):
+        created_at = random_timestamp(rng, now)
+        yield [
+            first_id + i, f'{DATASET_PREFIX}.user{first_id + i}@example.com',
+            f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}', 'broker' if i % 20 == 0 else 'investor',
+            created_at, created_at
+        ]
+
+
+def object_rows(rng: random.Random, count: int, first_id: int, brokers: Sequence[int], now: datetime) -> Iterator[List[Any]]:
+    for i in range(count):
+        city = rng.choice(CITIES)[0]
+        area = round(rng.uniform(18, 250), 1)
+        yield [
+            first_id + i, rng.choice(brokers), f'{rng.choice(TITLE_WORDS)} {area} м²', city,
+            f'ул. {rng.choice(STREETS)}, {rng.randrange(1, 200)}', rng.choice(OBJECT_TYPES), area,
+            round(area * rng.uniform(90_000, 600_000), -3), round(rng.uniform(4, 18), 1),
+            round(rng.uniform(5, 25), 1), ', '.join(rng.sample(DESCRIPTION_WORDS, 4)),
+            rng.choice(OBJECT_STATUSES), random_timestamp(rng, now)
+        ]
+
+
+def favorite_rows(rng: random.Random, count: int, users: Sequence[int], objects: range, now: datetime) -> Iterator[List[Any]]:
+    seen = set()
+    attempts = 0
+    while len(seen) < count and attempts < count * 3:
+        attempts += 1
+        pair = (rng.choice(users), objects[skewed_index(rng, len(objects))])
+        if pair in seen:
+            continue
+        seen.add(pair)
+        yield [pair[0], pair[1], random_timestamp(rng, now)]
+
+
+def next_id(conn, table: str) -> int:
+    with conn.cursor() as cur:
+        cur.execute(f"SELECT COALESCE(MAX(id), 0) + 1 FROM {table}")
+        return cur.fetchone()[0]
+
+
+def reset_sequence(conn, table: str) -> None:
+    with conn.cursor() as cur:
+        cur.execute(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT MAX(id) FROM {table}))")
+    conn.commit()
+
+
+def drop_dataset(conn) -> None:
+    pattern = f'{DATASET_PREFIX}-%'
+    with conn.cursor() as cur:
+        cur.execute("DELETE FROM interactions WHERE id LIKE %s", (pattern,))
+        cur.execute("DELETE FROM investors WHERE id LIKE %s", (pattern,))
+        cur.execute("DELETE FROM properties WHERE id LIKE %s", (pattern,))
+        cur.execute("DELETE FROM brokers WHERE id LIKE %s", (pattern,))
+        cur.execute("""
+            DELETE FROM favorites WHERE user_id IN (SELECT id FROM users WHERE email LIKE %s)
+        """, (f'{DATASET_PREFIX}.%',))
+        cur.execute("""
+            DELETE FROM investment_objects WHERE broker_id IN (SELECT id FROM users WHERE email LIKE %s)
+        """, (f'{DATASET_PREFIX}.%',))
+        cur.execute("DELETE FROM users WHERE email LIKE %s", (f'{DATASET_PREFIX}.%',))
+    conn.commit()
+
+
+def generate(dsn: str, sizes: Dict[str, int], seed: int, log: Callable[[str], None] = print) -> Dict[str, int]:
+    rng = random.Random(seed)
+    now = datetime.now().replace(microsecond=0)
+    conn = psycopg2.connect(dsn)
+    counts: Dict[str, int] = {}
+
+    def step(table: str, columns: Sequence[str], rows: Iterator[Sequence[Any]]) -> None:
+        started = time.perf_counter()
+        counts[table] = copy_rows(conn, table, columns, rows)
+        log(f'{table}: {counts[table]} rows in {time.perf_counter() - started:.1f}s')
+
+    try:
+        drop_dataset(conn)
+        brokers = max(sizes['brokers'], 1)
+        step('brokers', [
+            'id', 'email', 'first_name', 'last_name', 'phone', 'company', 'referral_code', 'created_at', 'updated_at'
+        ], broker_rows(rng, brokers, now))
+        step('properties', [
+            'id', 'broker_id', 'title', 'description', 'property_type', 'status', 'location_city',
+            'location_district', 'location_address', 'location_lat', 'location_lng', 'pricing_total_price',
+            'pricing_price_per_meter', 'pricing_min_investment', 'financing_method', 'investment_strategies',
+            'investment_expected_return', 'investment_term', 'investment_risk_level',
+            'investment_target_investment', 'rental_yield', 'details_area', 'details_rooms', 'metadata_views',
+            'metadata_source', 'metadata_external_id', 'created_at', 'updated_at', 'rental_monthly_income',
+            'rental_occupancy_rate', 'resale_expected_price', 'financing_mortgage_rate', 'financing_down_payment'
+        ], property_rows(rng, sizes['properties'], brokers, now))
+        investors = max(sizes['investors'], 1)
+        step('investors', [
+            'id', 'broker_id', 'first_name', 'last_name', 'email', 'phone', 'stage', 'profile_budget',
+            'profile_strategies', 'profile_risk_tolerance', 'profile_preferred_property_types',
+            'profile_preferred_locations', 'interaction_source', 'stage_entered_at', 'created_at', 'updated_at',
+            'portfolio_properties'
+        ], investor_rows(rng, investors, brokers, sizes['properties'], now))
+        step('interactions', [
+            'id', 'broker_id', 'investor_id', 'type', 'direction', 'description', 'created_at', 'updated_at'
+        ], interaction_rows(rng, sizes['interactions'], investors, brokers, now))
+
+        first_user = next_id(conn, 'users')
+        users = max(sizes['users'], 20)
+        step('users', ['id', 'email', 'name', 'role', 'created_at', 'updated_at'], user_rows(rng, users, first_user, now))
+        reset_sequence(conn, 'users')
+        user_ids = range(first_user, first_user + users)
+
+        first_object = next_id(conn, 'investment_objects')
+        objects = max(sizes['investment_objects'], 1)
+        step('investment_objects', [
+            'id', 'broker_id', 'title', 'city', 'address', 'property_type', 'area', 'price', 'yield_percent',
+            'payback_years', 'description', 'status', 'created_at'
+        ], object_rows(rng, objects, first_object, user_ids[::20], now))
+        reset_sequence(conn, 'investment_objects')
+
+        step('favorites', ['user_id', 'object_id', 'created_at'], favorite_rows(
+            rng, sizes['favorites'], user_ids, range(first_object, first_object + objects), now
+        ))
+
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            for table in DEFAULT_SIZES:
+                cur.execute(f"VACUUM ANALYZE {table}")
+    finally:
+        conn.close()
+    return counts
@@ -0,0 +1,70 @@
+from typing import Any, Dict, Iterator, List, Tuple
+
+import psycopg2
+
+PLANNER_OVERRIDES = ('enable_seqscan', 'enable_bitmapscan', 'enable_sort')
+ORDERED_SCANS = ('Index Scan', 'Index Only Scan')
+EMPTY_SAMPLE = ('Москва', 'apartment', '0', '100')
+
+
+def plan_nodes(node: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    yield node
+    for child in node.get('Plans', []):
+        yield from plan_nodes(child)
+
+
+def shape_params(shape: Tuple[str, ...], sample: Dict[str, str], hot_status: str) -> Dict[str, str]:
+    params = {}
+    for key in shape:
+        if key == hot_status:
+            params['status'] = hot_status
+        else:
+            params[key] = sample[key]
+    return params
+
+
+def hot_shapes(api, sample: Dict[str, str]) -> Iterator[Tuple[Dict[str, str], str]]:
+    for (shape, sort), index in api.OBJECT_LIST_INDEXES.items():
+        base = {**shape_params(shape, sample, api.OBJECT_HOT_STATUS), 'sort': sort}
+        for direction in api.SORT_DIRECTIONS:
+            yield {**base, 'order': direction}, index
+        yield {**base, 'min_price': sample['min_price'], 'max_yield': sample['max_yield']}, index
+
+
+def check_plans(dsn: str, api, natural: bool = False) -> List[Dict[str, Any]]:
+    conn = psycopg2.connect(dsn)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT city, property_type, percentile_disc(0.25) WITHIN GROUP (ORDER BY price)::text,
+                       percentile_disc(0.75) WITHIN GROUP (ORDER BY yield_percent)::text
+                FROM investment_objects GROUP BY city, property_type ORDER BY COUNT(*) DESC LIMIT 1
+            """)
+            sample = dict(zip(('city', 'property_type', 'min_price', 'max_yield'), cur.fetchone() or EMPTY_SAMPLE))
+            if not natural:
+                for setting in PLANNER_OVERRIDES:
+                    cur.execute(f"SET {setting} = off")
+
+            results = []
+            columns = ', '.join(name for name, _ in api.OBJECT_COLUMNS)
+            for params, index in hot_shapes(api, sample):
+                sort = params['sort']
+                direction = params.get('order', api.OBJECT_SORTS[sort][2])
+                filters = api.build_object_filters(params)
+                compiled = api.compile_object_list(columns, filters, sort, direction, None, api.DEFAULT_PAGE_LIMIT)
+                cur.execute(f"EXPLAIN (FORMAT JSON) {compiled['query']}", compiled['params'])
+                nodes = list(plan_nodes(cur.fetchone()[0][0]['Plan']))
+                scans = [n for n in nodes if n['Node Type'] in ORDERED_SCANS and n.get('Index Name') == compiled['index']]
+                sorted_in_memory = any(n['Node Type'] in ('Sort', 'Incremental Sort') for n in nodes)
+                results.append({
+                    'params': params,
+                    'expected_index': index,
+                    'compiled_index': compiled['index'],
+                    'scan': scans[0]['Node Type'] if scans else None,
+                    'indexes': sorted({n['Index Name'] for n in nodes if 'Index Name' in n}),
+                    'ordered': any(n['Node Type'] in ORDERED_SCANS for n in nodes) and not sorted_in_memory,
+                    'ok': compiled['index'] == index and bool(scans) and not sorted_in_memory
+                })
+            return results
+    finally:
+        conn.close()
@@ -0,0 +1,128 @@
+from typing import Any, Callable, Dict, List, NamedTuple
+
+import psycopg2
+
+SAMPLE_SIZE = 50
+
+
+class Scenario(NamedTuple):
+    name: str
+    function: str
+    build: Callable[[Dict[str, Any], int], Dict[str, Any]]
+    env: Dict[str, str] = {}
+
+
+def get(params: Dict[str, Any]) -> Dict[str, Any]:
+    return {'httpMethod': 'GET', 'queryStringParameters': {k: str(v) for k, v in params.items()}, 'headers': {}}
+
+
+def pick(samples: Dict[str, Any], key: str, i: int) -> Any:
+    values = samples[key]
+    return values[i % len(values)]
+
+
+def geo_box(samples: Dict[str, Any], i: int, size: float) -> str:
+    lat, lng = pick(samples, 'points', i)
+    return f'{lng - size},{lat - size},{lng + size},{lat + size}'
+
+
+SCENARIOS: List[Scenario] = [
+    Scenario('properties.by_id', 'properties', lambda s, i: get({'id': pick(s, 'property_ids', i)})),
+    Scenario('properties.by_id_flush', 'properties', lambda s, i: get({'id': pick(s, 'property_ids', i)}), {
+        'VIEW_FLUSH_INTERVAL': '0'
+    }),
+    Scenario('properties.by_id_sync', 'properties', lambda s, i: get({'id': pick(s, 'property_ids', i)}), {
+        'VIEW_FLUSH_INTERVAL': '0', 'VIEW_SYNC_INTERVAL': '0'
+    }),
+    Scenario('properties.by_ids', 'properties', lambda s, i: get({'ids': ','.join(s['property_ids'][:20])})),
+    Scenario('properties.broker_page', 'properties', lambda s, i: get({'brokerId': s['top_broker'], 'limit': 50})),
+    Scenario('properties.broker_page_fields', 'properties', lambda s, i: get({
+        'brokerId': s['top_broker'], 'limit': 50, 'fields': 'id,title,pricing_total_price'
+    })),
+    Scenario('properties.search', 'properties', lambda s, i: get({'q': pick(s, 'search_terms', i), 'limit': 20})),
+    Scenario('properties.near', 'properties', lambda s, i: get({
+        'near': '{},{}'.format(*pick(s, 'points', i)), 'radius': 2000, 'limit': 50
+    })),
+    Scenario('properties.bbox', 'properties', lambda s, i: get({'bbox': geo_box(s, i, 0.05), 'limit': 100})),
+    Scenario('properties.clusters', 'properties', lambda s, i: get({'bbox': geo_box(s, i, 0.5), 'zoom': 10})),
+    Scenario('properties.trending', 'properties', lambda s, i: get({'action': 'trending'})),
+    Scenario('properties.market', 'properties', lambda s, i: get({'action': 'market', 'city': 'Москва'})),
+    Scenario('brokers.list', 'brokers', lambda s, i: get({'limit': 100})),
+    Scenario('brokers.by_id', 'brokers', lambda s, i: get({'id': pick(s, 'broker_ids', i)})),
+    Scenario('brokers.dashboard', 'brokers', lambda s, i: get({'action': 'dashboard', 'id': s['top_broker']})),
+    Scenario('investors.broker_page', 'investors', lambda s, i: get({'brokerId': s['top_broker'], 'limit': 100})),
+    Scenario('investors.by_id', 'investors', lambda s, i: get({'id': pick(s, 'investor_ids', i)})),
+    Scenario('investors.funnel', 'investors', lambda s, i: get({'action': 'funnel', 'brokerId': s['top_broker']})),
+    Scenario('investors.match_investor', 'investors', lambda s, i: get({
+        'action': 'match', 'investorId': pick(s, 'investor_ids', i)
+    })),
+    Scenario('investors.portfolio', 'investors', lambda s, i: get({
+        'action': 'portfolio', 'investorId': pick(s, 'portfolio_investor_ids', i)
+    })),
+    Scenario('investors.portfolio_stress', 'investors', lambda s, i: get({
+        'action': 'portfolio', 'investorId': pick(s, 'portfolio_investor_ids', i), 'rateShock': 5, 'occupancyDrop': 40
+    })),
+    Scenario('interactions.investor_page', 'investors', lambda s, i: get({
+        'resource': 'interactions', 'investorId': pick(s, 'investor_ids', i), 'limit': 50
+    })),
+    Scenario('interactions.broker_page', 'investors', lambda s, i: get({
+        'resource': 'interactions', 'brokerId': s['top_broker'], 'limit': 50
+    })),
+    Scenario('objects.list', 'api', lambda s, i: get({'resource': 'objects', 'limit': 50})),
+    Scenario('objects.list_popular', 'api', lambda s, i: get({'resource': 'objects', 'sort': 'popular', 'limit': 50})),
+    Scenario('objects.available_by_price', 'api', lambda s, i: get({
+        'resource': 'objects', 'status': 'available', 'sort': 'price', 'limit': 50
+    })),
+    Scenario('objects.filter_city_price', 'api', lambda s, i: get({
+        'resource': 'objects', 'city': 'Москва', 'min_price': 5_000_000, 'max_price': 30_000_000, 'limit': 50
+    })),
+    Scenario('objects.filter_type_yield', 'api', lambda s, i: get({
+        'resource': 'objects', 'property_type': 'commercial', 'status': 'available', 'min_yield': 10, 'limit': 50
+    })),
+    Scenario('objects.search', 'api', lambda s, i: get({
+        'resource': 'objects', 'q': pick(s, 'search_terms', i), 'limit': 20
+    })),
+    Scenario('objects.by_ids', 'api', lambda s, i: get({
+        'resource': 'objects', 'ids': ','.join(map(str, s['object_ids'][:20]))
+    })),
+    Scenario('market.all', 'api', lambda s, i: get({'resource': 'market'})),
+    Scenario('favorites.user', 'api', lambda s, i: get({'resource': 'favorites', 'user_id': pick(s, 'user_ids', i)}))
+]
+
+SCENARIOS_BY_NAME = {scenario.name: scenario for scenario in SCENARIOS}
+
+
+def sample(cur, columns: str, table: str, where: str = 'TRUE') -> List[tuple]:
+    for source in (f'{table} TABLESAMPLE SYSTEM (1)', table):
+        cur.execute(f"SELECT DISTINCT {columns} FROM {source} WHERE {where} LIMIT %s", (SAMPLE_SIZE,))
+        rows = cur.fetchall()
+        if rows:
+            return rows
+    raise RuntimeError(f'No rows to sample in {table}; run the seed command first')
+
+
+def collect_samples(dsn: str) -> Dict[str, Any]:
+    conn = psycopg2.connect(dsn)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT id FROM brokers ORDER BY stats_total_properties DESC NULLS LAST, id LIMIT 1")
+            top_broker = cur.fetchone()[0]
+            properties = sample(
+                cur, 'id, location_lat::float8, location_lng::float8', 'properties',
+                "status = 'active' AND location_lat IS NOT NULL AND location_lng IS NOT NULL"
+            )
+            return {
+                'top_broker': top_broker,
+                'broker_ids': [row[0] for row in sample(cur, 'id', 'brokers')],
+                'property_ids': [row[0] for row in properties],
+                'points': [(round(row[1], 5), round(row[2], 5)) for row in properties],
+                'investor_ids': [row[0] for row in sample(cur, 'investor_id', 'interactions')],
+                'portfolio_investor_ids': [
+                    row[0] for row in sample(cur, 'id', 'investors', "portfolio_properties <> '[]'::jsonb")
+                ],
+                'user_ids': [row[0] for row in sample(cur, 'user_id', 'favorites')],
+                'object_ids': [row[0] for row in sample(cur, 'id', 'investment_objects')],
+                'search_terms': ['квартира', 'лофт у метро', 'Москва', 'офис парковка', 'панорамные окна']
+            }
+    finally:
+        conn.close()
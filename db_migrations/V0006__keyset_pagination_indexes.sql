@@ -0,0 +1,21 @@
+UPDATE users SET created_at = COALESCE(updated_at, CURRENT_TIMESTAMP) WHERE created_at IS NULL;
+UPDATE investment_objects SET created_at = COALESCE(updated_at, CURRENT_TIMESTAMP) WHERE created_at IS NULL;
+UPDATE favorites SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL;
+UPDATE brokers SET created_at = COALESCE(updated_at, CURRENT_TIMESTAMP) WHERE created_at IS NULL;
+UPDATE properties SET created_at = COALESCE(updated_at, CURRENT_TIMESTAMP) WHERE created_at IS NULL;
+UPDATE investors SET created_at = COALESCE(updated_at, CURRENT_TIMESTAMP) WHERE created_at IS NULL;
+
+ALTER TABLE users ALTER COLUMN created_at SET NOT NULL;
+ALTER TABLE investment_objects ALTER COLUMN created_at SET NOT NULL;
+ALTER TABLE favorites ALTER COLUMN created_at SET NOT NULL;
+ALTER TABLE brokers ALTER COLUMN created_at SET NOT NULL;
+ALTER TABLE properties ALTER COLUMN created_at SET NOT NULL;
+ALTER TABLE investors ALTER COLUMN created_at SET NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_users_created_id ON users(created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_objects_created_id ON investment_objects(created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_favorites_user_created_id ON favorites(user_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_brokers_created_id ON brokers(created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_properties_broker_created_id ON properties(broker_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_properties_active_created_id ON properties(created_at DESC, id DESC) WHERE status = 'active';
+CREATE INDEX IF NOT EXISTS idx_investors_broker_created_id ON investors(broker_id, created_at DESC, id DESC);
@@ -0,0 +1 @@
+CREATE UNIQUE INDEX IF NOT EXISTS idx_properties_source_external_id ON properties(metadata_source, metadata_external_id);
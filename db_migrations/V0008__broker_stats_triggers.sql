@@ -0,0 +1,154 @@
+CREATE OR REPLACE FUNCTION apply_property_stats_delta() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE brokers b
+        SET stats_total_properties = b.stats_total_properties + d.total,
+            stats_active_properties = b.stats_active_properties + d.active
+        FROM (
+            SELECT broker_id, COUNT(*) AS total, COUNT(*) FILTER (WHERE status = 'active') AS active
+            FROM new_rows GROUP BY broker_id
+        ) d
+        WHERE b.id = d.broker_id;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE brokers b
+        SET stats_total_properties = b.stats_total_properties - d.total,
+            stats_active_properties = b.stats_active_properties - d.active
+        FROM (
+            SELECT broker_id, COUNT(*) AS total, COUNT(*) FILTER (WHERE status = 'active') AS active
+            FROM old_rows GROUP BY broker_id
+        ) d
+        WHERE b.id = d.broker_id;
+    ELSE
+        UPDATE brokers b
+        SET stats_total_properties = b.stats_total_properties + d.total,
+            stats_active_properties = b.stats_active_properties + d.active
+        FROM (
+            SELECT broker_id, SUM(total) AS total, SUM(active) AS active
+            FROM (
+                SELECT broker_id, 1 AS total, (status = 'active')::int AS active FROM new_rows
+                UNION ALL
+                SELECT broker_id, -1, -(status = 'active')::int FROM old_rows
+            ) changes
+            GROUP BY broker_id
+            HAVING SUM(total) <> 0 OR SUM(active) <> 0
+        ) d
+        WHERE b.id = d.broker_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION apply_investor_stats_delta() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE brokers b
+        SET stats_total_investors = b.stats_total_investors + d.investors,
+            stats_total_deals = b.stats_total_deals + d.deals,
+            stats_total_revenue = b.stats_total_revenue + d.revenue
+        FROM (
+            SELECT broker_id, COUNT(*) AS investors,
+                   COUNT(*) FILTER (WHERE stage = 'active') AS deals,
+                   COALESCE(SUM(portfolio_total_invested) FILTER (WHERE stage = 'active'), 0) AS revenue
+            FROM new_rows GROUP BY broker_id
+        ) d
+        WHERE b.id = d.broker_id;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE brokers b
+        SET stats_total_investors = b.stats_total_investors - d.investors,
+            stats_total_deals = b.stats_total_deals - d.deals,
+            stats_total_revenue = b.stats_total_revenue - d.revenue
+        FROM (
+            SELECT broker_id, COUNT(*) AS investors,
+                   COUNT(*) FILTER (WHERE stage = 'active') AS deals,
+                   COALESCE(SUM(portfolio_total_invested) FILTER (WHERE stage = 'active'), 0) AS revenue
+            FROM old_rows GROUP BY broker_id
+        ) d
+        WHERE b.id = d.broker_id;
+    ELSE
+        UPDATE brokers b
+        SET stats_total_investors = b.stats_total_investors + d.investors,
+            stats_total_deals = b.stats_total_deals + d.deals,
+            stats_total_revenue = b.stats_total_revenue + d.revenue
+        FROM (
+            SELECT broker_id, SUM(investors) AS investors, SUM(deals) AS deals, SUM(revenue) AS revenue
+            FROM (
+                SELECT broker_id, 1 AS investors, (stage = 'active')::int AS deals,
+                       CASE WHEN stage = 'active' THEN COALESCE(portfolio_total_invested, 0) ELSE 0 END AS revenue
+                FROM new_rows
+                UNION ALL
+                SELECT broker_id, -1, -(stage = 'active')::int,
+                       CASE WHEN stage = 'active' THEN -COALESCE(portfolio_total_invested, 0) ELSE 0 END
+                FROM old_rows
+            ) changes
+            GROUP BY broker_id
+            HAVING SUM(investors) <> 0 OR SUM(deals) <> 0 OR SUM(revenue) <> 0
+        ) d
+        WHERE b.id = d.broker_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_properties_stats_insert AFTER INSERT ON properties
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_property_stats_delta();
+CREATE TRIGGER trg_properties_stats_update AFTER UPDATE ON properties
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_property_stats_delta();
+CREATE TRIGGER trg_properties_stats_delete AFTER DELETE ON properties
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_property_stats_delta();
+
+CREATE TRIGGER trg_investors_stats_insert AFTER INSERT ON investors
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_investor_stats_delta();
+CREATE TRIGGER trg_investors_stats_update AFTER UPDATE ON investors
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_investor_stats_delta();
+CREATE TRIGGER trg_investors_stats_delete AFTER DELETE ON investors
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_investor_stats_delta();
+
+CREATE OR REPLACE FUNCTION reconcile_broker_stats() RETURNS INTEGER AS $$
+DECLARE
+    corrected INTEGER;
+BEGIN
+    WITH property_stats AS (
+        SELECT broker_id, COUNT(*) AS total, COUNT(*) FILTER (WHERE status = 'active') AS active
+        FROM properties GROUP BY broker_id
+    ),
+    investor_stats AS (
+        SELECT broker_id, COUNT(*) AS investors,
+               COUNT(*) FILTER (WHERE stage = 'active') AS deals,
+               COALESCE(SUM(portfolio_total_invested) FILTER (WHERE stage = 'active'), 0) AS revenue
+        FROM investors GROUP BY broker_id
+    ),
+    actual AS (
+        SELECT b.id,
+               COALESCE(p.total, 0) AS total_properties,
+               COALESCE(p.active, 0) AS active_properties,
+               COALESCE(i.investors, 0) AS total_investors,
+               COALESCE(i.deals, 0) AS total_deals,
+               COALESCE(i.revenue, 0) AS total_revenue
+        FROM brokers b
+        LEFT JOIN property_stats p ON p.broker_id = b.id
+        LEFT JOIN investor_stats i ON i.broker_id = b.id
+    )
+    UPDATE brokers b
+    SET stats_total_properties = a.total_properties,
+        stats_active_properties = a.active_properties,
+        stats_total_investors = a.total_investors,
+        stats_total_deals = a.total_deals,
+        stats_total_revenue = a.total_revenue
+    FROM actual a
+    WHERE b.id = a.id
+      AND (b.stats_total_properties, b.stats_active_properties, b.stats_total_investors,
+           b.stats_total_deals, b.stats_total_revenue)
+          IS DISTINCT FROM
+          (a.total_properties, a.active_properties, a.total_investors, a.total_deals, a.total_revenue);
+    GET DIAGNOSTICS corrected = ROW_COUNT;
+    RETURN corrected;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT reconcile_broker_stats();
@@ -0,0 +1 @@
+CREATE INDEX IF NOT EXISTS idx_properties_updated_at ON properties(updated_at);
@@ -0,0 +1,30 @@
+ALTER TABLE investment_objects ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('russian', coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('russian', coalesce(description, '')), 'B') ||
+    setweight(to_tsvector('simple', coalesce(city, '') || ' ' || coalesce(address, '')), 'C')
+) STORED;
+
+ALTER TABLE properties ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('russian', coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('russian', coalesce(description, '')), 'B') ||
+    setweight(to_tsvector('simple',
+        coalesce(location_city, '') || ' ' || coalesce(location_district, '') || ' ' ||
+        coalesce(location_address, '') || ' ' || coalesce(location_metro, '')), 'C')
+) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_objects_search ON investment_objects USING GIN (search_vector);
+CREATE INDEX IF NOT EXISTS idx_properties_search ON properties USING GIN (search_vector);
+
+CREATE OR REPLACE FUNCTION catalog_search_query(input TEXT) RETURNS tsquery AS $$
+    SELECT coalesce(string_agg('(' || term::text || ')', ' & '), '')::tsquery
+    FROM (
+        SELECT CASE WHEN numnode(plainto_tsquery('russian', word)) = 0
+                    THEN plainto_tsquery('russian', word)
+                    ELSE plainto_tsquery('russian', word) || plainto_tsquery('simple', word)
+               END AS term
+        FROM regexp_split_to_table(input, '\s+') AS word
+    ) words
+    WHERE numnode(term) > 0
+$$ LANGUAGE sql IMMUTABLE;
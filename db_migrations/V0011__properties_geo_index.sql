@@ -0,0 +1,3 @@
+CREATE INDEX IF NOT EXISTS idx_properties_active_location ON properties
+    USING GIST (point(location_lng::float8, location_lat::float8))
+    WHERE status = 'active' AND location_lat IS NOT NULL AND location_lng IS NOT NULL;
@@ -0,0 +1,49 @@
+ALTER TABLE investment_objects ADD COLUMN IF NOT EXISTS favorites_count INTEGER NOT NULL DEFAULT 0;
+
+UPDATE investment_objects o
+SET favorites_count = f.total
+FROM (SELECT object_id, COUNT(*) AS total FROM favorites GROUP BY object_id) f
+WHERE o.id = f.object_id;
+
+CREATE INDEX IF NOT EXISTS idx_objects_favorites_id ON investment_objects(favorites_count DESC, id DESC);
+
+CREATE OR REPLACE FUNCTION apply_favorites_count_delta() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE investment_objects o
+        SET favorites_count = o.favorites_count + d.total
+        FROM (SELECT object_id, COUNT(*) AS total FROM new_rows GROUP BY object_id) d
+        WHERE o.id = d.object_id;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE investment_objects o
+        SET favorites_count = o.favorites_count - d.total
+        FROM (SELECT object_id, COUNT(*) AS total FROM old_rows GROUP BY object_id) d
+        WHERE o.id = d.object_id;
+    ELSE
+        UPDATE investment_objects o
+        SET favorites_count = o.favorites_count + d.total
+        FROM (
+            SELECT object_id, SUM(total) AS total
+            FROM (
+                SELECT object_id, 1 AS total FROM new_rows
+                UNION ALL
+                SELECT object_id, -1 FROM old_rows
+            ) changes
+            GROUP BY object_id
+            HAVING SUM(total) <> 0
+        ) d
+        WHERE o.id = d.object_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_favorites_count_insert AFTER INSERT ON favorites
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_favorites_count_delta();
+CREATE TRIGGER trg_favorites_count_update AFTER UPDATE ON favorites
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_favorites_count_delta();
+CREATE TRIGGER trg_favorites_count_delete AFTER DELETE ON favorites
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_favorites_count_delta();
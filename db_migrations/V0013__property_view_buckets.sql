@@ -0,0 +1,8 @@
+CREATE TABLE IF NOT EXISTS property_view_buckets (
+    property_id TEXT NOT NULL REFERENCES properties(id) ON DELETE CASCADE,
+    bucket TIMESTAMP NOT NULL,
+    views INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (property_id, bucket)
+);
+
+CREATE INDEX IF NOT EXISTS idx_property_view_buckets_bucket ON property_view_buckets(bucket) INCLUDE (property_id, views);
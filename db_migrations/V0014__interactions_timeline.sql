@@ -0,0 +1,37 @@
+UPDATE interactions SET created_at = COALESCE(updated_at, CURRENT_TIMESTAMP) WHERE created_at IS NULL;
+ALTER TABLE interactions ALTER COLUMN created_at SET NOT NULL;
+
+DROP INDEX IF EXISTS idx_interactions_broker_id;
+DROP INDEX IF EXISTS idx_interactions_investor_id;
+DROP INDEX IF EXISTS idx_interactions_property_id;
+
+CREATE INDEX IF NOT EXISTS idx_interactions_investor_created_id ON interactions(investor_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_interactions_broker_created_id ON interactions(broker_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_interactions_property_created_id ON interactions(property_id, created_at DESC, id DESC)
+    WHERE property_id IS NOT NULL;
+
+CREATE OR REPLACE FUNCTION pg_temp.try_cast_timestamp(value TEXT) RETURNS TIMESTAMP AS $$
+BEGIN
+    RETURN value::timestamp;
+EXCEPTION WHEN OTHERS THEN
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+INSERT INTO interactions (id, broker_id, investor_id, type, subject, description, metadata, created_at, updated_at)
+SELECT
+    md5(i.id || ':timeline:' || e.position),
+    i.broker_id,
+    i.id,
+    'note',
+    e.entry->>'action',
+    COALESCE(e.entry->>'details', ''),
+    e.entry || '{"source": "timeline"}'::jsonb,
+    COALESCE(pg_temp.try_cast_timestamp(e.entry->>'date'), i.created_at + e.position * INTERVAL '1 millisecond'),
+    CURRENT_TIMESTAMP
+FROM investors i
+CROSS JOIN LATERAL jsonb_array_elements(
+    CASE WHEN jsonb_typeof(i.timeline) = 'array' THEN i.timeline ELSE '[]'::jsonb END
+) WITH ORDINALITY AS e(entry, position)
+WHERE i.broker_id IS NOT NULL
+ON CONFLICT (id) DO NOTHING;
@@ -0,0 +1,106 @@
+ALTER TABLE investors ADD COLUMN IF NOT EXISTS stage_entered_at TIMESTAMP;
+UPDATE investors SET stage_entered_at = COALESCE(updated_at, created_at, CURRENT_TIMESTAMP) WHERE stage_entered_at IS NULL;
+ALTER TABLE investors ALTER COLUMN stage_entered_at SET DEFAULT CURRENT_TIMESTAMP;
+ALTER TABLE investors ALTER COLUMN stage_entered_at SET NOT NULL;
+
+CREATE TABLE IF NOT EXISTS investor_stage_events (
+    id BIGSERIAL PRIMARY KEY,
+    investor_id TEXT NOT NULL,
+    broker_id TEXT NOT NULL,
+    from_stage TEXT,
+    to_stage TEXT NOT NULL,
+    seconds_in_previous DOUBLE PRECISION,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_investor_stage_events_investor ON investor_stage_events(investor_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_investor_stage_events_broker ON investor_stage_events(broker_id, created_at DESC);
+
+CREATE TABLE IF NOT EXISTS investor_stage_funnel (
+    broker_id TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    current_count INTEGER NOT NULL DEFAULT 0,
+    entered_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (broker_id, stage)
+);
+
+CREATE TABLE IF NOT EXISTS investor_stage_transitions (
+    broker_id TEXT NOT NULL,
+    from_stage TEXT NOT NULL,
+    to_stage TEXT NOT NULL,
+    transitions INTEGER NOT NULL DEFAULT 0,
+    seconds_total DOUBLE PRECISION NOT NULL DEFAULT 0,
+    PRIMARY KEY (broker_id, from_stage, to_stage)
+);
+
+CREATE OR REPLACE FUNCTION apply_investor_funnel_delta() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO investor_stage_events (investor_id, broker_id, to_stage, created_at)
+        SELECT id, broker_id, stage, stage_entered_at FROM new_rows;
+
+        INSERT INTO investor_stage_funnel AS f (broker_id, stage, current_count, entered_count)
+        SELECT broker_id, stage, COUNT(*), COUNT(*) FROM new_rows GROUP BY broker_id, stage
+        ON CONFLICT (broker_id, stage) DO UPDATE
+        SET current_count = f.current_count + EXCLUDED.current_count,
+            entered_count = f.entered_count + EXCLUDED.entered_count;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE investor_stage_funnel f
+        SET current_count = f.current_count - d.total
+        FROM (SELECT broker_id, stage, COUNT(*) AS total FROM old_rows GROUP BY broker_id, stage) d
+        WHERE f.broker_id = d.broker_id AND f.stage = d.stage;
+    ELSE
+        WITH moves AS (
+            SELECT n.id AS investor_id, n.broker_id, o.stage AS from_stage, n.stage AS to_stage,
+                   EXTRACT(EPOCH FROM (LOCALTIMESTAMP - o.stage_entered_at)) AS seconds_in_previous
+            FROM new_rows n
+            JOIN old_rows o ON o.id = n.id
+            WHERE n.stage IS DISTINCT FROM o.stage
+        ),
+        events AS (
+            INSERT INTO investor_stage_events (investor_id, broker_id, from_stage, to_stage, seconds_in_previous)
+            SELECT investor_id, broker_id, from_stage, to_stage, seconds_in_previous FROM moves
+        ),
+        transitions AS (
+            INSERT INTO investor_stage_transitions AS t (broker_id, from_stage, to_stage, transitions, seconds_total)
+            SELECT broker_id, from_stage, to_stage, COUNT(*), SUM(seconds_in_previous)
+            FROM moves GROUP BY broker_id, from_stage, to_stage
+            ON CONFLICT (broker_id, from_stage, to_stage) DO UPDATE
+            SET transitions = t.transitions + EXCLUDED.transitions,
+                seconds_total = t.seconds_total + EXCLUDED.seconds_total
+        )
+        INSERT INTO investor_stage_funnel AS f (broker_id, stage, current_count, entered_count)
+        SELECT broker_id, stage, SUM(current_count), SUM(entered_count)
+        FROM (
+            SELECT broker_id, stage, 1 AS current_count, 0 AS entered_count FROM new_rows
+            UNION ALL
+            SELECT broker_id, stage, -1, 0 FROM old_rows
+            UNION ALL
+            SELECT broker_id, to_stage, 0, 1 FROM moves
+        ) changes
+        GROUP BY broker_id, stage
+        HAVING SUM(current_count) <> 0 OR SUM(entered_count) <> 0
+        ON CONFLICT (broker_id, stage) DO UPDATE
+        SET current_count = f.current_count + EXCLUDED.current_count,
+            entered_count = f.entered_count + EXCLUDED.entered_count;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_investors_funnel_insert AFTER INSERT ON investors
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_investor_funnel_delta();
+CREATE TRIGGER trg_investors_funnel_update AFTER UPDATE ON investors
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_investor_funnel_delta();
+CREATE TRIGGER trg_investors_funnel_delete AFTER DELETE ON investors
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_investor_funnel_delta();
+
+INSERT INTO investor_stage_events (investor_id, broker_id, to_stage, created_at)
+SELECT id, broker_id, stage, stage_entered_at FROM investors;
+
+INSERT INTO investor_stage_funnel (broker_id, stage, current_count, entered_count)
+SELECT broker_id, stage, COUNT(*), COUNT(*) FROM investors GROUP BY broker_id, stage
+ON CONFLICT (broker_id, stage) DO NOTHING;
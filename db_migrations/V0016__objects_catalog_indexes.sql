@@ -0,0 +1,24 @@
+CREATE INDEX IF NOT EXISTS idx_objects_price_id ON investment_objects(price, id);
+CREATE INDEX IF NOT EXISTS idx_objects_yield_id ON investment_objects(yield_percent, id);
+CREATE INDEX IF NOT EXISTS idx_objects_payback_id ON investment_objects(payback_years, id);
+CREATE INDEX IF NOT EXISTS idx_objects_city_created_id ON investment_objects(city, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_objects_city_price_id ON investment_objects(city, price, id);
+
+CREATE INDEX IF NOT EXISTS idx_objects_available_created_id
+    ON investment_objects(created_at DESC, id DESC) WHERE status = 'available';
+CREATE INDEX IF NOT EXISTS idx_objects_available_price_id
+    ON investment_objects(price, id) WHERE status = 'available';
+CREATE INDEX IF NOT EXISTS idx_objects_available_yield_id
+    ON investment_objects(yield_percent, id) WHERE status = 'available';
+CREATE INDEX IF NOT EXISTS idx_objects_available_payback_id
+    ON investment_objects(payback_years, id) WHERE status = 'available';
+CREATE INDEX IF NOT EXISTS idx_objects_available_city_price_id
+    ON investment_objects(city, price, id) WHERE status = 'available';
+CREATE INDEX IF NOT EXISTS idx_objects_available_city_type_price_id
+    ON investment_objects(city, property_type, price, id) WHERE status = 'available';
+
+DROP INDEX IF EXISTS idx_objects_price;
+DROP INDEX IF EXISTS idx_objects_yield;
+DROP INDEX IF EXISTS idx_objects_city;
+
+ANALYZE investment_objects;
@@ -0,0 +1,86 @@
+CREATE TABLE IF NOT EXISTS market_sketch_buckets (
+    source TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    city TEXT NOT NULL,
+    property_type TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (source, city, property_type, metric, bucket)
+);
+
+CREATE OR REPLACE FUNCTION market_sketch_bucket(value NUMERIC) RETURNS INTEGER AS $$
+    SELECT CASE WHEN value > 0 THEN ceil(ln(value::float8) / ln(1.01 / 0.99))::integer END;
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION properties_market_values(p properties)
+RETURNS TABLE (metric TEXT, city TEXT, property_type TEXT, value NUMERIC) AS $$
+    SELECT m.metric, p.location_city, p.property_type, m.value
+    FROM (VALUES ('price_per_meter', p.pricing_price_per_meter), ('yield', p.rental_yield)) m(metric, value)
+    WHERE p.status IN ('active', 'reserved', 'sold') AND m.value > 0;
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION objects_market_values(o investment_objects)
+RETURNS TABLE (metric TEXT, city TEXT, property_type TEXT, value NUMERIC) AS $$
+    SELECT m.metric, o.city, o.property_type, m.value
+    FROM (VALUES ('price_per_meter', o.price / NULLIF(o.area, 0)), ('yield', o.yield_percent)) m(metric, value)
+    WHERE m.value > 0;
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION apply_market_sketch_delta() RETURNS TRIGGER AS $$
+DECLARE
+    changes TEXT;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        changes := format('SELECT v.*, 1 AS delta FROM new_rows r CROSS JOIN LATERAL %I(r) v', TG_ARGV[1]);
+    ELSIF TG_OP = 'DELETE' THEN
+        changes := format('SELECT v.*, -1 AS delta FROM old_rows r CROSS JOIN LATERAL %I(r) v', TG_ARGV[1]);
+    ELSE
+        changes := format(
+            'SELECT v.*, 1 AS delta FROM new_rows r CROSS JOIN LATERAL %1$I(r) v
+             UNION ALL
+             SELECT v.*, -1 FROM old_rows r CROSS JOIN LATERAL %1$I(r) v',
+            TG_ARGV[1]
+        );
+    END IF;
+    
+    EXECUTE format($sql$
+        INSERT INTO market_sketch_buckets AS s (source, metric, city, property_type, bucket, count)
+        SELECT %L, metric, city, property_type, market_sketch_bucket(value), SUM(delta)
+        FROM (%s) changes
+        GROUP BY metric, city, property_type, market_sketch_bucket(value)
+        HAVING SUM(delta) <> 0
+        ON CONFLICT (source, city, property_type, metric, bucket) DO UPDATE SET count = s.count + EXCLUDED.count
+    $sql$, TG_ARGV[0], changes);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_properties_market_insert AFTER INSERT ON properties
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_market_sketch_delta('properties', 'properties_market_values');
+CREATE TRIGGER trg_properties_market_update AFTER UPDATE ON properties
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_market_sketch_delta('properties', 'properties_market_values');
+CREATE TRIGGER trg_properties_market_delete AFTER DELETE ON properties
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_market_sketch_delta('properties', 'properties_market_values');
+
+CREATE TRIGGER trg_objects_market_insert AFTER INSERT ON investment_objects
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_market_sketch_delta('objects', 'objects_market_values');
+CREATE TRIGGER trg_objects_market_update AFTER UPDATE ON investment_objects
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_market_sketch_delta('objects', 'objects_market_values');
+CREATE TRIGGER trg_objects_market_delete AFTER DELETE ON investment_objects
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_market_sketch_delta('objects', 'objects_market_values');
+
+INSERT INTO market_sketch_buckets (source, metric, city, property_type, bucket, count)
+SELECT 'properties', v.metric, v.city, v.property_type, market_sketch_bucket(v.value), COUNT(*)
+FROM properties p CROSS JOIN LATERAL properties_market_values(p) v
+GROUP BY 1, 2, 3, 4, 5
+UNION ALL
+SELECT 'objects', v.metric, v.city, v.property_type, market_sketch_bucket(v.value), COUNT(*)
+FROM investment_objects o CROSS JOIN LATERAL objects_market_values(o) v
+GROUP BY 1, 2, 3, 4, 5
+ON CONFLICT (source, city, property_type, metric, bucket) DO UPDATE SET count = EXCLUDED.count;
@@ -0,0 +1,8 @@
+CREATE TABLE IF NOT EXISTS property_view_totals (
+    property_id TEXT PRIMARY KEY REFERENCES properties(id) ON DELETE CASCADE,
+    views BIGINT NOT NULL DEFAULT 0
+);
+
+INSERT INTO property_view_totals (property_id, views)
+SELECT id, metadata_views FROM properties WHERE metadata_views > 0
+ON CONFLICT (property_id) DO NOTHING;
@@ -0,0 +1,50 @@
+def compressed(handle: Callable[[Dict[str, Any], Any], Dict[str, Any]]) -> Callable[[Dict[str, Any], Any], Dict[str, Any]]:
+    @functools.wraps(handle)
+    def wrapper(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+        response = handle(event, context)
+        body = response.get('body')
+        if response.get('isBase64Encoded') or not body or len(body) < COMPRESSION_MIN_BYTES:
+            return response
+        
+        headers = {**response['headers'], 'Vary': 'Accept-Encoding'}
+        request_headers = {k.lower(): v for k, v in (event.get('headers') or {}).items()}
+        encoding = negotiate_encoding(request_headers.get('accept-encoding', ''))
+        if not encoding:
+            return {**response, 'headers': headers}
+        
+        started = time.perf_counter()
+        raw = body.encode()
+        if encoding == 'br':
+            data = brotli.compress(raw, quality=BROTLI_QUALITY)
+        else:
+            data = gzip.compress(raw, GZIP_LEVEL, mtime=0)
+        record_phase('compress', started)
+        
+        headers['Content-Encoding'] = encoding
+        if 'ETag' in headers:
+            headers['ETag'] = 'W/' + headers['ETag'].removeprefix('W/')
+        return {**response, 'headers': headers, 'body': base64.b64encode(data).decode(), 'isBase64Encoded': True}
+    return wrapper
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.lower().split(','):
+        name, _, parameters = part.partition(';')
+        weight = 1.0
+        for parameter in parameters.split(';'):
+            key, _, value = parameter.strip().partition('=')
+            if key == 'q':
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        if name.strip():
+            weights[name.strip()] = weight
+    
+    best, best_weight = None, 0.0
+    for encoding in (('br', 'gzip') if brotli else ('gzip',)):
+        weight = weights.get(encoding, weights.get('*', 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
@@ -0,0 +1,21 @@
+def with_etag(response: Dict[str, Any]) -> Dict[str, Any]:
+    etag = '"' + hashlib.sha1(response['body'].encode()).hexdigest() + '"'
+    return {**response, 'headers': {**response['headers'], 'ETag': etag}}
+
+
+def conditional_response(event: Dict[str, Any], response: Dict[str, Any]) -> Dict[str, Any]:
+    headers = {k.lower(): v for k, v in (event.get('headers') or {}).items()}
+    if_none_match = headers.get('if-none-match')
+    if not if_none_match:
+        return response
+    
+    etag = response['headers']['ETag']
+    candidates = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+    if '*' in candidates or etag in candidates:
+        return {
+            'statusCode': 304,
+            'headers': {'ETag': etag, 'Access-Control-Allow-Origin': '*'},
+            'body': '',
+            'isBase64Encoded': False
+        }
+    return response
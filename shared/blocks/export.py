@@ -0,0 +1,68 @@
+def export_rows(
+    conn, table: str, select: str, encoder: RowEncoder, broker_id: str, params: Dict[str, str]
+) -> Dict[str, Any]:
+    export_format = params.get('export')
+    if export_format not in EXPORT_CONTENT_TYPES:
+        return {
+            'statusCode': 400,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': 'export must be ndjson or csv'}),
+            'isBase64Encoded': False
+        }
+    try:
+        limit, after = parse_page_params(params, EXPORT_PAGE_ROWS, EXPORT_PAGE_ROWS)
+    except ValueError:
+        return {
+            'statusCode': 400,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': 'Invalid pagination parameters'}),
+            'isBase64Encoded': False
+        }
+    
+    keyset = keyset_condition(after)
+    output = io.StringIO()
+    writer = csv.writer(output) if export_format == 'csv' else None
+    columns: List[str] = []
+    last_key = None
+    next_cursor = None
+    
+    conn.autocommit = False
+    with conn, conn.cursor(name=f'export_{table}') as cur:
+        cur.itersize = EXPORT_FETCH_SIZE
+        cur.execute(f"""
+            SELECT {select} FROM {table} WHERE broker_id = %s {keyset['query']}
+            ORDER BY created_at DESC, id DESC LIMIT %s
+        """, [broker_id] + keyset['params'] + [limit + 1])
+        
+        for count, row in enumerate(cur):
+            if not columns:
+                columns = [column[0] for column in cur.description]
+                created_at_index, id_index = columns.index('created_at'), columns.index('id')
+                if writer and not after:
+                    writer.writerow(columns)
+            if count == limit:
+                next_cursor = encode_page_cursor(*last_key)
+                break
+            
+            if writer:
+                writer.writerow([
+                    '' if value is None else json.dumps(value) if isinstance(value, (dict, list)) else value
+                    for value in row
+                ])
+            else:
+                output.write(encoder.encode_row(row, encoder.default_fields))
+                output.write('\n')
+            last_key = (row[created_at_index], row[id_index])
+    
+    filename = EXPORT_FILENAME_UNSAFE.sub('_', f'{table}-{broker_id}')
+    return {
+        'statusCode': 200,
+        'headers': {
+            'Content-Type': EXPORT_CONTENT_TYPES[export_format],
+            'Content-Disposition': f'attachment; filename="{filename}.{export_format}"',
+            'Access-Control-Allow-Origin': '*',
+            **cursor_headers(next_cursor)
+        },
+        'body': output.getvalue(),
+        'isBase64Encoded': False
+    }
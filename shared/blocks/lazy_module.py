@@ -0,0 +1,11 @@
+class LazyModule:
+    def __init__(self, name: str):
+        self.name = name
+        self.module = None
+    
+    def __getattr__(self, attr: str) -> Any:
+        if self.module is None:
+            started = time.perf_counter()
+            self.module = importlib.import_module(self.name)
+            record_phase('import', started)
+        return getattr(self.module, attr)
@@ -0,0 +1,48 @@
+_pool: Optional[pool.ThreadedConnectionPool] = None
+_last_used: Dict[int, float] = {}
+
+
+def get_connection():
+    global _pool
+    started = time.perf_counter()
+    try:
+        if _pool is None or _pool.closed:
+            _pool = pool.ThreadedConnectionPool(
+                DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, os.environ.get('DATABASE_URL'), cursor_factory=TimingCursor
+            )
+        for _ in range(DB_POOL_MAX_SIZE):
+            conn = _pool.getconn()
+            if connection_is_healthy(conn):
+                return conn
+            discard_connection(conn)
+        return _pool.getconn()
+    finally:
+        record_phase('connect', started)
+
+
+def release_connection(conn) -> None:
+    if conn.closed:
+        discard_connection(conn)
+        return
+    _last_used[id(conn)] = time.monotonic()
+    _pool.putconn(conn)
+
+
+def discard_connection(conn) -> None:
+    _last_used.pop(id(conn), None)
+    _pool.putconn(conn, close=True)
+
+
+def connection_is_healthy(conn) -> bool:
+    if conn.closed or conn.info.transaction_status == extensions.TRANSACTION_STATUS_UNKNOWN:
+        return False
+    last_used = _last_used.get(id(conn))
+    if last_used is None or time.monotonic() - last_used < DB_POOL_HEALTHCHECK_INTERVAL:
+        return True
+    try:
+        with conn.cursor() as cur:
+            cur.execute('SELECT 1')
+        conn.rollback()
+    except psycopg2.Error:
+        return False
+    return True
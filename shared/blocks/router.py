@@ -0,0 +1,27 @@
+class Router:
+    def __init__(self, resource_param: str, default_resource: str):
+        self.resource_param = resource_param
+        self.default_resource = default_resource
+        self.routes: Dict[Tuple[str, str, Optional[str]], Callable[..., Dict[str, Any]]] = {}
+        self.resources: set = set()
+    
+    def route(self, resource: str, *methods: str, action: Optional[str] = None) -> Callable:
+        def register(handle: Callable[..., Dict[str, Any]]) -> Callable[..., Dict[str, Any]]:
+            for method in methods:
+                self.routes[(method, resource, action)] = handle
+            self.resources.add(resource)
+            return handle
+        return register
+    
+    def resolve(
+        self, method: str, params: Dict[str, str]
+    ) -> Tuple[Optional[Callable[..., Dict[str, Any]]], Optional[Dict[str, Any]]]:
+        if method == 'OPTIONS':
+            return None, PREFLIGHT_RESPONSE
+        resource = params.get(self.resource_param, self.default_resource)
+        handle = self.routes.get((method, resource, params.get('action'))) or self.routes.get((method, resource, None))
+        if handle:
+            return handle, None
+        if resource in self.resources:
+            return None, METHOD_NOT_ALLOWED_RESPONSE
+        return None, NOT_FOUND_RESPONSE
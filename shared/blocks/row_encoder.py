@@ -0,0 +1,58 @@
+class RowEncoder:
+    def __init__(self, columns: List[Tuple[str, str]]):
+        self.kinds = dict(columns)
+        self.default_fields = tuple(self.kinds)
+        self._plans: Dict[Any, List[Tuple[str, Callable[[Any], str], str]]] = {}
+        self.plan(self.default_fields)
+    
+    def parse_fields(self, raw: Optional[str]) -> Tuple[str, ...]:
+        if not raw:
+            return self.default_fields
+        fields = tuple(dict.fromkeys(field.strip() for field in raw.split(',') if field.strip()))
+        if not fields or any(field not in self.kinds for field in fields):
+            raise ValueError('Unknown field')
+        return fields
+    
+    def plan(
+        self, fields: Tuple[str, ...], extra: Tuple[Tuple[str, str], ...] = ()
+    ) -> List[Tuple[str, Callable[[Any], str], str]]:
+        plan = self._plans.get((fields, extra))
+        if plan is None:
+            columns = [(field, self.kinds[field]) for field in fields] + list(extra)
+            plan = [
+                (
+                    ('{' if position == 0 else ', ') + encode_basestring_ascii(name) + ': ',
+                    COLUMN_ENCODERS[kind], COLUMN_NULLS.get(kind, 'null')
+                )
+                for position, (name, kind) in enumerate(columns)
+            ]
+            if len(self._plans) < ENCODER_PLAN_CACHE_SIZE:
+                self._plans[(fields, extra)] = plan
+        return plan
+    
+    def write(self, out: List[str], row: Tuple[Any, ...], plan: List[Tuple[str, Callable[[Any], str], str]]) -> None:
+        for (prefix, encode, null), value in zip(plan, row):
+            out.append(prefix)
+            out.append(null if value is None else encode(value))
+        out.append('}')
+    
+    def encode_row(self, row: Tuple[Any, ...], fields: Tuple[str, ...], extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+        started = time.perf_counter()
+        out: List[str] = []
+        self.write(out, row, self.plan(fields, extra))
+        record_phase('encode', started)
+        return ''.join(out)
+    
+    def encode_rows(
+        self, rows: List[Tuple[Any, ...]], fields: Tuple[str, ...], extra: Tuple[Tuple[str, str], ...] = ()
+    ) -> str:
+        started = time.perf_counter()
+        plan = self.plan(fields, extra)
+        out = ['[']
+        for position, row in enumerate(rows):
+            if position:
+                out.append(', ')
+            self.write(out, row, plan)
+        out.append(']')
+        record_phase('encode', started)
+        return ''.join(out)
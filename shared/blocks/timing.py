@@ -0,0 +1,211 @@
+class RequestTiming:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self.queries = 0
+        self._lock = threading.Lock()
+    
+    def add(self, phase: str, ms: float, query: bool = False) -> None:
+        with self._lock:
+            self.phases[phase] = self.phases.get(phase, 0.0) + ms
+            self.queries += query
+    
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+    
+    def header(self) -> str:
+        phases = [f'{name};dur={ms:.1f}' for name, ms in self.phases.items()]
+        return ', '.join(phases + [f'total;dur={self.elapsed_ms():.1f}'])
+
+
+class QueryStats:
+    def __init__(self, max_shapes: int):
+        self.max_shapes = max_shapes
+        self._shapes: Dict[str, List[float]] = {}
+        self._explained_at: Dict[str, float] = {}
+        self._logged_at = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def record(self, shape: str, ms: float) -> None:
+        with self._lock:
+            stats = self._shapes.get(shape)
+            if stats is None:
+                if len(self._shapes) >= self.max_shapes:
+                    shape = 'other'
+                stats = self._shapes.setdefault(shape, [0, 0.0, 0.0] + [0] * (len(QUERY_HISTOGRAM_BOUNDS_MS) + 1))
+            stats[0] += 1
+            stats[1] += ms
+            stats[2] = max(stats[2], ms)
+            stats[3 + bisect.bisect_left(QUERY_HISTOGRAM_BOUNDS_MS, ms)] += 1
+    
+    def should_explain(self, shape: str) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            if now - self._explained_at.get(shape, -SLOW_QUERY_EXPLAIN_INTERVAL) < SLOW_QUERY_EXPLAIN_INTERVAL:
+                return False
+            self._explained_at[shape] = now
+            return True
+    
+    def summary(self, limit: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            ranked = sorted(self._shapes.items(), key=lambda item: -item[1][1])[:limit]
+        return [{
+            'sql': shape,
+            'count': stats[0],
+            'total_ms': round(stats[1], 1),
+            'max_ms': round(stats[2], 1),
+            'p50_ms': histogram_quantile(stats, 0.5),
+            'p95_ms': histogram_quantile(stats, 0.95),
+            'p99_ms': histogram_quantile(stats, 0.99)
+        } for shape, stats in ranked]
+    
+    def maybe_log(self) -> None:
+        if time.monotonic() - self._logged_at < QUERY_STATS_LOG_INTERVAL:
+            return
+        self._logged_at = time.monotonic()
+        log_event('query_stats', shapes=self.summary(QUERY_STATS_LOG_TOP))
+
+
+class TimingCursor(extensions.cursor):
+    def execute(self, query, vars=None):
+        started = time.perf_counter()
+        result = super().execute(query, vars)
+        ms = (time.perf_counter() - started) * 1000
+        shape = normalize_sql(query)
+        _query_stats.record(shape, ms)
+        if _timing:
+            _timing.add('db', ms, query=True)
+        if ms >= SLOW_QUERY_MS and _query_stats.should_explain(shape):
+            log_event(
+                'slow_query', logging.WARNING,
+                sql=shape, duration_ms=round(ms, 1), plan=explain(self.connection, query, vars)
+            )
+        return result
+    
+    def fetchone(self):
+        started = time.perf_counter()
+        try:
+            return super().fetchone()
+        finally:
+            record_phase('fetch', started)
+    
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        try:
+            return super().fetchmany(size) if size is not None else super().fetchmany()
+        finally:
+            record_phase('fetch', started)
+    
+    def fetchall(self):
+        started = time.perf_counter()
+        try:
+            return super().fetchall()
+        finally:
+            record_phase('fetch', started)
+    
+    def __iter__(self):
+        while True:
+            rows = self.fetchmany(self.itersize)
+            if not rows:
+                return
+            yield from rows
+
+
+class JsonLogFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps({
+            'event': record.getMessage(),
+            'function': FUNCTION_NAME,
+            'level': record.levelname,
+            **getattr(record, 'fields', {})
+        }, default=str, ensure_ascii=False)
+
+
+def json_logger(name: str) -> logging.Logger:
+    logger = logging.getLogger(name)
+    if not logger.handlers:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(JsonLogFormatter())
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
+
+
+_logger = json_logger(FUNCTION_NAME)
+_timing: Optional[RequestTiming] = None
+_query_stats = QueryStats(QUERY_STATS_MAX_SHAPES)
+_cold_start = True
+
+
+@functools.lru_cache(maxsize=512)
+def normalize_sql(query: Any) -> str:
+    text = query.decode('utf-8', 'replace') if isinstance(query, bytes) else str(query)
+    text = SQL_LITERALS.sub('?', SQL_WHITESPACE.sub(' ', text).strip())
+    return SQL_REPEATED_TUPLES.sub('(?), ...', SQL_TUPLES.sub('(?)', text))
+
+
+def histogram_quantile(stats: List[float], q: float) -> Optional[float]:
+    target = stats[0] * q
+    seen = 0
+    for position, count in enumerate(stats[3:]):
+        seen += count
+        if count and seen >= target:
+            return QUERY_HISTOGRAM_BOUNDS_MS[position] if position < len(QUERY_HISTOGRAM_BOUNDS_MS) else round(stats[2], 1)
+    return None
+
+
+def explain(conn, query: Any, vars: Any) -> Optional[str]:
+    prefix = b'EXPLAIN ' if isinstance(query, bytes) else 'EXPLAIN '
+    in_transaction = conn.get_transaction_status() == extensions.TRANSACTION_STATUS_INTRANS
+    try:
+        with conn.cursor(cursor_factory=extensions.cursor) as cur:
+            if in_transaction:
+                cur.execute('SAVEPOINT slow_query_explain')
+            try:
+                cur.execute(prefix + query, vars)
+                return '\n'.join(row[0] for row in cur.fetchall())
+            finally:
+                if in_transaction:
+                    cur.execute('ROLLBACK TO SAVEPOINT slow_query_explain')
+    except psycopg2.Error as error:
+        return f'EXPLAIN failed: {error}'.strip()
+
+
+def record_phase(phase: str, started: float) -> None:
+    if _timing:
+        _timing.add(phase, (time.perf_counter() - started) * 1000)
+
+
+def log_event(event: str, level: int = logging.INFO, **fields: Any) -> None:
+    _logger.log(level, event, extra={'fields': fields})
+
+
+def instrumented(handle: Callable[[Dict[str, Any], Any], Dict[str, Any]]) -> Callable[[Dict[str, Any], Any], Dict[str, Any]]:
+    @functools.wraps(handle)
+    def wrapper(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+        global _timing, _cold_start
+        timing = _timing = RequestTiming()
+        cold_start, _cold_start = _cold_start, False
+        status = 500
+        try:
+            response = handle(event, context)
+            status = response['statusCode']
+            headers = {**(response.get('headers') or {}), 'Server-Timing': timing.header(), 'Timing-Allow-Origin': '*'}
+            return {**response, 'headers': headers}
+        finally:
+            _timing = None
+            params = event.get('queryStringParameters') or {}
+            log_event(
+                'request',
+                method=event.get('httpMethod', 'GET'),
+                route={key: params[key] for key in ROUTE_PARAMS if key in params},
+                params=sorted(params),
+                status=status,
+                duration_ms=round(timing.elapsed_ms(), 2),
+                phases={name: round(ms, 2) for name, ms in timing.phases.items()},
+                queries=timing.queries,
+                cold_start=cold_start
+            )
+            _query_stats.maybe_log()
+    return wrapper
@@ -0,0 +1,62 @@
+import argparse
+import re
+import sys
+from pathlib import Path
+from typing import List
+
+SHARED_DIR = Path(__file__).resolve().parent
+REPO_ROOT = SHARED_DIR.parent
+BLOCKS_DIR = SHARED_DIR / 'blocks'
+REGION_START = re.compile(r'^# >>> shared/blocks/\w+\.py', re.MULTILINE)
+REGION = re.compile(
+    r'^# >>> shared/blocks/(?P<name>\w+)\.py[^\n]*\n.*?^# <<< shared/blocks/(?P=name)\.py\n',
+    re.MULTILINE | re.DOTALL
+)
+
+
+def function_sources() -> List[Path]:
+    return sorted(REPO_ROOT.glob('backend/*/index.py'))
+
+
+def region(name: str) -> str:
+    body = (BLOCKS_DIR / f'{name}.py').read_text()
+    return (
+        f'# >>> shared/blocks/{name}.py (copied by shared/sync.py, edit the block and re-run)\n'
+        f'{body}'
+        f'# <<< shared/blocks/{name}.py\n'
+    )
+
+
+def render(source: str) -> str:
+    regions = REGION.findall(source)
+    if len(regions) != len(REGION_START.findall(source)):
+        raise ValueError('Unterminated shared block region')
+    return REGION.sub(lambda match: region(match['name']), source)
+
+
+def stale_sources() -> List[Path]:
+    return [path for path in function_sources() if render(path.read_text()) != path.read_text()]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description='Copy shared/blocks into the marked regions of every backend/<function>/index.py. '
+                    'Functions are deployed from their own directories, so shared code is vendored, not imported.'
+    )
+    parser.add_argument('--check', action='store_true', help='Only report copies that differ from their block')
+    args = parser.parse_args()
+
+    stale = stale_sources()
+    if args.check:
+        if stale:
+            names = ', '.join(str(path.relative_to(REPO_ROOT)) for path in stale)
+            sys.exit(f'Out of sync with shared/blocks: {names}. Run python shared/sync.py')
+        return
+
+    for path in stale:
+        path.write_text(render(path.read_text()))
+        print(f'Updated {path.relative_to(REPO_ROOT)}')
+
+
+if __name__ == '__main__':
+    main()
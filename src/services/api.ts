@@ -23,6 +23,51 @@ export interface InvestmentObjectDB {
   images?: string[];
   status: 'available' | 'reserved' | 'sold';
   created_at?: string;
+  favorites_count?: number;
+}
+
+export interface ObjectFilters {
+  city?: string;
+  property_type?: string;
+  status?: string;
+  min_price?: number;
+  max_price?: number;
+  min_yield?: number;
+  max_yield?: number;
+  max_payback?: number;
+  sort?: 'created' | 'popular' | 'price' | 'yield' | 'payback';
+  order?: 'asc' | 'desc';
+}
+
+export interface FacetRange {
+  from: number | null;
+  to: number | null;
+  count: number;
+}
+
+export interface ObjectFacets {
+  total: number;
+  facets: {
+    city: { value: string; count: number }[];
+    property_type: { value: InvestmentObjectDB['property_type']; count: number }[];
+    status: { value: InvestmentObjectDB['status']; count: number }[];
+    price: FacetRange[];
+    yield: FacetRange[];
+  };
+}
+
+export interface MarketQuantiles {
+  count: number;
+  p10: number;
+  p50: number;
+  p90: number;
+}
+
+export interface MarketStats {
+  city: string;
+  property_type: InvestmentObjectDB['property_type'];
+  price_per_meter?: MarketQuantiles;
+  yield?: MarketQuantiles;
 }
 
 export interface Favorite {
@@ -96,15 +141,20 @@ class ApiClient {
     return this.request<User>('users', 'PUT', { id, ...data });
   }
 
-  async getObjects(filters?: {
-    city?: string;
-    property_type?: string;
-    status?: string;
-    min_price?: number;
-    max_price?: number;
-    min_yield?: number;
-    max_yield?: number;
-  }): Promise<InvestmentObjectDB[]> {
+  async getObjects(filters?: ObjectFilters): Promise<InvestmentObjectDB[]> {
+    return this.request<InvestmentObjectDB[]>('objects', 'GET', undefined, this.filterParams(filters));
+  }
+
+  async getObjectFacets(filters?: Omit<ObjectFilters, 'sort' | 'order'>): Promise<ObjectFacets> {
+    return this.request<ObjectFacets>('objects', 'GET', undefined, { ...this.filterParams(filters), facets: '1' });
+  }
+
+  async getMarketStats(filters?: { city?: string; property_type?: InvestmentObjectDB['property_type'] }): Promise<MarketStats[]> {
+    const data = await this.request<{ markets: MarketStats[] }>('market', 'GET', undefined, this.filterParams(filters));
+    return data.markets;
+  }
+
+  private filterParams(filters?: ObjectFilters): Record<string, string> {
     const params: Record<string, string> = {};
     
     if (filters) {
@@ -115,13 +165,19 @@ class ApiClient {
       });
     }
     
-    return this.request<InvestmentObjectDB[]>('objects', 'GET', undefined, params);
+    return params;
   }
 
   async getObjectById(id: number): Promise<InvestmentObjectDB> {
     return this.request<InvestmentObjectDB>('objects', 'GET', undefined, { id: id.toString() });
   }
 
+  async getObjectsByIds(ids: number[]): Promise<{ items: InvestmentObjectDB[]; missing: number[] }> {
+    return this.request<{ items: InvestmentObjectDB[]; missing: number[] }>('objects', 'GET', undefined, {
+      ids: ids.join(','),
+    });
+  }
+
   async createObject(data: Omit<InvestmentObjectDB, 'id' | 'created_at'>): Promise<InvestmentObjectDB> {
     return this.request<InvestmentObjectDB>('objects', 'POST', data);
   }
@@ -144,6 +200,18 @@ class ApiClient {
       object_id: objectId.toString(),
     });
   }
+
+  async toggleFavorites(
+    userId: number,
+    objectIds: number[]
+  ): Promise<{ added: number[]; removed: number[]; missing: number[] }> {
+    return this.request<{ added: number[]; removed: number[]; missing: number[] }>(
+      'favorites',
+      'POST',
+      { user_id: userId, object_ids: objectIds },
+      { mode: 'toggle' }
+    );
+  }
 }
 
 export const api = new ApiClient(API_URL);
@@ -0,0 +1,29 @@
+import importlib.util
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DSN = os.environ.get('DATABASE_URL')
+
+sys.path.insert(0, str(REPO_ROOT / 'benchmarks'))
+
+from plans import check_plans  # noqa: E402
+
+pytestmark = pytest.mark.skipif(not DSN, reason='DATABASE_URL is not set')
+
+
+@pytest.fixture(scope='module')
+def api():
+    spec = importlib.util.spec_from_file_location('api_index', REPO_ROOT / 'backend' / 'api' / 'index.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_hot_catalog_shapes_use_ordered_index_scans(api):
+    results = check_plans(DSN, api)
+    failed = [f"{r['params']}: {r['indexes'] or 'no index'}" for r in results if not r['ordered']]
+    assert not failed, '\n'.join(failed)
@@ -0,0 +1,48 @@
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+INDEX = Path(__file__).resolve().parents[1] / 'backend' / 'investors' / 'index.py'
+
+
+@pytest.fixture(scope='module')
+def investors():
+    spec = importlib.util.spec_from_file_location('investors_index', INDEX)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def holding(term, price=10_000_000, resale=12_000_000, rent=0, rate=10, down_payment=20):
+    return ('p1', price, price * 0.8, 'mortgage', rate, down_payment, rent, 100, resale, term)
+
+
+def test_mortgage_paid_off_before_exit(investors):
+    mortgage_term = investors.PORTFOLIO_MORTGAGE_TERM_MONTHS
+    result = investors.value_portfolio([holding(mortgage_term + 120)], 0.0, {'base': (0.0, 0.0, 0.0)})
+    base = result['scenarios'][0]
+    share = result['holdings'][0]['share']
+    
+    monthly_rate = 10 / 1200
+    growth = (1 + monthly_rate) ** mortgage_term
+    payment = 8_000_000 * monthly_rate * growth / (growth - 1)
+    
+    assert base['debtService'] == pytest.approx(share * payment * mortgage_term, rel=1e-9)
+    assert base['saleProceeds'] == pytest.approx(share * 12_000_000, rel=1e-6)
+    assert len(base['cashFlows']) == mortgage_term + 120
+    assert base['cashFlows'][mortgage_term - 1] == pytest.approx(-share * payment, rel=1e-6)
+    assert base['cashFlows'][mortgage_term:-1] == [0.0] * 119
+
+
+def test_exit_before_mortgage_term_repays_balance(investors):
+    result = investors.value_portfolio([holding(12)], 0.0, {'base': (0.0, 0.0, 0.0)})
+    base = result['scenarios'][0]
+    share = result['holdings'][0]['share']
+    assert 0 < base['saleProceeds'] < share * 12_000_000 - share * 7_000_000
+
+
+def test_term_is_clamped(investors):
+    result = investors.value_portfolio([holding(10 ** 9)], 0.0, {'base': (0.0, 0.0, 0.0)})
+    assert result['holdings'][0]['termMonths'] == investors.PORTFOLIO_MAX_TERM_MONTHS
+    assert len(result['scenarios'][0]['cashFlows']) == investors.PORTFOLIO_MAX_TERM_MONTHS
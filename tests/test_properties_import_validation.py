@@ -0,0 +1,64 @@
+import copy
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+INDEX = Path(__file__).resolve().parents[1] / 'backend' / 'properties' / 'index.py'
+
+VALID_ROW = {
+    'brokerId': 'broker-1',
+    'title': 'Студия у метро',
+    'description': 'Описание',
+    'propertyType': 'apartment',
+    'location': {'city': 'Москва', 'address': 'ул. Ленина, 1', 'coordinates': {'lat': 55.75, 'lng': 37.61}},
+    'pricing': {'totalPrice': 9_500_000, 'minInvestment': 500_000},
+    'financing': {'method': 'mortgage', 'mortgageRate': 12.5},
+    'investment': {
+        'strategy': ['rent'], 'expectedReturn': 11.2, 'term': 36, 'riskLevel': 'low', 'targetInvestment': 9_500_000
+    },
+    'details': {'area': 28.5, 'rooms': 1, 'floor': 7.0},
+    'media': {'images': ['https://example.com/1.jpg']},
+    'metadata': {'source': 'feed', 'externalId': 42}
+}
+
+
+@pytest.fixture(scope='module')
+def properties():
+    spec = importlib.util.spec_from_file_location('properties_index', INDEX)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def with_value(path, value):
+    row = copy.deepcopy(VALID_ROW)
+    target = row
+    for key in path[:-1]:
+        target = target.setdefault(key, {})
+    target[path[-1]] = value
+    return row
+
+
+def test_valid_row_passes(properties):
+    assert properties.validate_property(copy.deepcopy(VALID_ROW)) is None
+    assert len(properties.property_values(copy.deepcopy(VALID_ROW), 'p1')) == len(properties.PROPERTY_INSERT_COLUMNS)
+
+
+@pytest.mark.parametrize('path, value, error', [
+    (('details',), ['rooms'], 'Field details must be an object'),
+    (('media',), 'images', 'Field media must be an object'),
+    (('location', 'coordinates'), [55.7, 37.6], 'Field location.coordinates must be an object'),
+    (('status',), ['active'], 'Unknown status: '),
+    (('propertyType',), {'kind': 'flat'}, 'Unknown propertyType: '),
+    (('details', 'rooms'), '3k', 'Field details.rooms must be a number'),
+    (('details', 'floor'), 2.5, 'Field details.floor must be an integer'),
+    (('investment', 'term'), 2 ** 31, 'Field investment.term must be an integer'),
+    (('location', 'coordinates', 'lat'), 'abc', 'Field location.coordinates.lat must be a number'),
+    (('financing', 'mortgageRate'), 'x', 'Field financing.mortgageRate must be a number'),
+    (('pricing', 'pricePerMeter'), float('nan'), 'Field pricing.pricePerMeter must be a finite number'),
+    (('title',), {'ru': 'Студия'}, 'Field title must be a string'),
+    (('media', 'images'), 'a.jpg', 'Field media.images must be a list'),
+])
+def test_invalid_optional_input_is_reported(properties, path, value, error):
+    assert properties.validate_property(with_value(path, value)).startswith(error)
@@ -0,0 +1,24 @@
+import importlib.util
+from pathlib import Path
+
+SYNC = Path(__file__).resolve().parents[1] / 'shared' / 'sync.py'
+
+
+def load_sync():
+    spec = importlib.util.spec_from_file_location('shared_sync', SYNC)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_functions_match_shared_blocks():
+    sync = load_sync()
+    assert sync.function_sources()
+    assert sync.stale_sources() == []
+
+
+def test_every_block_is_vendored():
+    sync = load_sync()
+    sources = ''.join(path.read_text() for path in sync.function_sources())
+    for block in sync.BLOCKS_DIR.glob('*.py'):
+        assert f'# >>> shared/blocks/{block.name}' in sources